@@ -3,6 +3,16 @@ ASGI config for placement_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serving through ASGI is what makes the live notification stream
+(users.views.notification_stream_view) cheap: each open connection is an idle
+coroutine rather than a blocked thread. For example:
+
+    uvicorn placement_project.asgi:application --workers 2
+
+Set NOTIFICATION_STREAM_ENABLED = True in the settings when serving this way; the
+pages only open the stream then. Run the task worker on the same machine, so its
+events reach the web workers through NOTIFICATION_EVENTS_SOCKET_DIR.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
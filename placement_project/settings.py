@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import tempfile
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -71,6 +73,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'users.context_processors.unread_notifications',
             ],
         },
     },
@@ -86,9 +89,119 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # SQLite allows one writer at a time. Wait up to 5s for it instead of failing
+            # with "database is locked" when applications arrive together near a deadline.
+            'timeout': 5,
+        },
+        'TEST': {
+            # A file rather than the default in-memory database, so tests that use several
+            # threads or processes (concurrent applies, the task worker) share one database
+            # and see real locking. Ignored by git; removed when the test run ends.
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Used for rendered job-list cards. Swap for a shared backend (e.g. Redis/Memcached)
+# when running more than one worker process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'campusconnect',
     }
 }
 
+JOB_CARD_CACHE_TIMEOUT = 60 * 60 * 24  # seconds
+UNREAD_COUNT_CACHE_TIMEOUT = 60 * 60  # seconds
+
+
+# Background tasks
+# Queued in the database and processed by `python manage.py run_task_worker`.
+# Set TASK_QUEUE_EAGER = True (e.g. in tests) to run tasks immediately instead.
+
+TASK_QUEUE_EAGER = False
+TASK_QUEUE_RETRY_BACKOFF = 30  # seconds, doubled on every retry
+TASK_QUEUE_STALE_LOCK_TIMEOUT = 15 * 60  # seconds before a stuck RUNNING task is requeued
+
+
+# Live notifications (Server-Sent Events)
+# Only turn this on when the site is served under ASGI (see placement_project/asgi.py).
+# Under WSGI each open stream would hold a worker thread for as long as the page is open.
+NOTIFICATION_STREAM_ENABLED = False
+# Seconds between keep-alive comments on idle streams.
+NOTIFICATION_STREAM_HEARTBEAT = 20
+# Local directory for the sockets that relay events between processes, so events
+# published by the task worker reach streams held by the web processes.
+NOTIFICATION_EVENTS_SOCKET_DIR = os.path.join(tempfile.gettempdir(), 'campusconnect-events')
+
+
+# Notification retention, applied by `python manage.py compact_notifications`
+NOTIFICATION_RETENTION = {
+    'read_after_days': 30,  # delete read notifications after this many days (None = keep forever)
+    'expired_jobs': True,  # delete notifications and broadcasts about jobs whose deadline has passed
+}
+
+
+# Email
+# Digests are sent through EMAIL_BACKEND over one reused connection. For local testing use
+# 'django.core.mail.backends.filebased.EmailBackend' with EMAIL_FILE_PATH.
+DEFAULT_FROM_EMAIL = 'CampusConnect <no-reply@campusconnect.local>'
+SITE_URL = 'http://localhost:8000'  # Used for links in emails
+
+# Notification digests, sent by `python manage.py send_notification_digests`
+NOTIFICATION_DIGEST = {
+    'period_days': 1,
+    'chunk_size': 500,  # students per chunk (queries and send_messages() calls)
+    'max_per_second': None,  # e.g. 50 if the SMTP relay enforces a rate limit
+    'max_items': 20,  # notifications listed per email; the rest are summarised as "and N more"
+}
+
+
+# Resume search index (users/resume_search.py), filled by the task worker
+# Worker processes used to extract text from PDFs; 1 = extract in the task worker thread.
+# pypdf, if installed, is used for extraction; otherwise a built-in reader handles simple PDFs.
+RESUME_TEXT_EXTRACTION_PROCESSES = 2
+
+# Largest resume accepted; uploads are rejected mid-stream once they pass it
+# (users/upload_handlers.py). Keep the web server's request body limit above this.
+RESUME_UPLOAD_MAX_SIZE = 5 * 1024 * 1024
+
+# A stored resume file is written before the row that owns it is committed, so a file
+# with no row is only treated as orphaned once it is older than this (users/resume_storage.py)
+RESUME_ORPHAN_GRACE_PERIOD = 60 * 60  # seconds
+
+
+# Password hashing (users/hashers.py)
+# 'algorithm' is 'argon2' (needs argon2-cffi), 'scrypt' (built into Python) or 'auto' (argon2 if installed).
+# The costs are per hash; tune them to ~50 ms on the production servers with
+# `python manage.py benchmark_logins --target-ms 50`. Stored hashes made with another
+# algorithm or other costs are re-hashed on the user's next successful login.
+PASSWORD_HASH_POLICY = {
+    'algorithm': 'auto',
+    'argon2': {'time_cost': 2, 'memory_cost': 19 * 1024, 'parallelism': 1},
+    'scrypt': {'work_factor': 2 ** 14, 'block_size': 8, 'parallelism': 1},
+}
+
+_PREFERRED_HASHER = PASSWORD_HASH_POLICY['algorithm']
+if _PREFERRED_HASHER == 'auto':
+    _PREFERRED_HASHER = 'argon2' if find_spec('argon2') else 'scrypt'
+
+# The first entry hashes new passwords; the rest can still verify existing hashes
+PASSWORD_HASHERS = [
+    'users.hashers.PolicyArgon2PasswordHasher',
+    'users.hashers.PolicyScryptPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+if _PREFERRED_HASHER == 'scrypt':
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(1))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -134,3 +247,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Resumes are private and only served by access-checked views (users/file_serving.py).
+# In production, let the web server send the file once Django has checked access:
+#   'x-accel-redirect' for nginx, with
+#       location /protected-media/ { internal; alias /path/to/media/; }
+#   'x-sendfile' for Apache mod_xsendfile or lighttpd.
+# None streams the file from Django (fine for development).
+PROTECTED_MEDIA_SENDFILE = None
+PROTECTED_MEDIA_INTERNAL_URL = '/protected-media/'
@@ -1,8 +1,6 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.shortcuts import redirect
-from django.conf import settings
-from django.conf.urls.static import static  # 👈 this is needed
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -11,6 +9,5 @@ urlpatterns = [
     path('accounts/', include('users.urls')),
 ]
 
-# ✅ Serve media files in development mode
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Media files (resumes) are not served publicly, not even with DEBUG on: they go through
+# access-checked views such as accounts/resumes/<id>/download/ (see users/file_serving.py)
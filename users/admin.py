@@ -1,8 +1,31 @@
 # users/admin.py
 
-from django.contrib import admin
+from collections import defaultdict
+
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ORDER_VAR
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Profile, Job, StudentApplication, Resume
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.core.paginator import Paginator
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+from django.utils import timezone
+from django.utils.text import slugify
+from .models import CustomUser, Profile, Job, StudentApplication, Resume, ResumeBlob, BackgroundTask, Notification
+from .forms import JobImportUploadForm
+from .job_import import JobImportError, import_jobs, read_job_definitions
+from .admin_filters import CompanyFilter, ProfileCompletionFilter
+from .paginators import EstimatedCountPaginator
+from .notifications import notify_users
+from .exports import applicants_csv_response, resume_zip_response
+from .relevance import has_stale_scores
+from .resume_search import search_resumes
+from .pipeline_stats import adjust_application_counts, job_pipeline, status_change_deltas
+from .tasks import refresh_relevance
 
 # --- 1. NEW: Define the custom admin "action" for approval ---
 @admin.action(description='Activate selected user accounts')
@@ -24,6 +47,12 @@ class CustomUserAdmin(UserAdmin):
 
     # ADDED: The new approval action to the actions dropdown
     actions = [make_active]
+
+    # Scale settings for large cohorts: no second COUNT(*) for the "N total" link,
+    # and an estimated count for the unfiltered list
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    list_per_page = 50
     
     fieldsets = UserAdmin.fieldsets + (
         (None, {'fields': ('role',)}),
@@ -34,9 +63,12 @@ class CustomUserAdmin(UserAdmin):
 
 
 class JobAdmin(admin.ModelAdmin):
-    list_display = ('title', 'company', 'job_type', 'location', 'deadline')
+    # Adds "Application pipeline" and "Import jobs" buttons next to "Add job"
+    change_list_template = 'admin/users/job/change_list.html'
+    list_display = ('title', 'company', 'job_type', 'location', 'deadline', 'is_archived')
     search_fields = ('title', 'company', 'description')
-    list_filter = ('job_type', 'location')
+    list_filter = ('is_archived', 'job_type', 'location')
+    actions = ['export_applicants_csv', 'export_resumes_zip']
     
     fieldsets = (
         ("Core Information", {
@@ -51,16 +83,288 @@ class JobAdmin(admin.ModelAdmin):
         ("Salary & Dates", {
             'fields': ('currency', 'salary_min', 'salary_max', 'joining_date', 'application_opens', 'deadline')
         }),
+        ("Archival", {
+            'fields': ('is_archived', 'archived_at')
+        }),
+    )
+
+    def get_urls(self):
+        custom_urls = [
+            path('import/', self.admin_site.admin_view(self.import_jobs_view), name='users_job_import'),
+            path('pipeline/', self.admin_site.admin_view(self.pipeline_view), name='users_job_pipeline'),
+            path('<int:job_id>/applicants.csv', self.admin_site.admin_view(self.applicants_csv_view), name='users_job_applicants_csv'),
+            path('<int:job_id>/resumes.zip', self.admin_site.admin_view(self.resumes_zip_view), name='users_job_resumes_zip'),
+        ]
+        return custom_urls + super().get_urls()
+
+    def import_jobs_view(self, request):
+        """Bulk-creates jobs from an uploaded CSV/JSON file and notifies students once for the whole batch."""
+        if not self.has_add_permission(request):
+            return redirect('admin:users_job_changelist')
+
+        errors = []
+        if request.method == 'POST':
+            form = JobImportUploadForm(request.POST, request.FILES)
+            if form.is_valid():
+                try:
+                    rows = read_job_definitions(form.cleaned_data['file'])
+                    jobs = import_jobs(rows)
+                except JobImportError as e:
+                    errors = e.errors
+                else:
+                    self.message_user(request, f"Imported {len(jobs)} job(s). Students will be notified shortly.", messages.SUCCESS)
+                    return redirect('admin:users_job_changelist')
+        else:
+            form = JobImportUploadForm()
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import jobs',
+            'form': form,
+            'import_errors': errors,
+        }
+        return TemplateResponse(request, 'admin/users/job/import_jobs.html', context)
+
+    # --- Applicant exports (streamed; see users/exports.py) ---
+
+    def _can_export(self, request):
+        return self.has_view_permission(request) and request.user.has_perm('users.view_studentapplication')
+
+    @admin.action(description="Export applicants of selected jobs as CSV")
+    def export_applicants_csv(self, request, queryset):
+        if not self._can_export(request):
+            raise PermissionDenied
+        applications = StudentApplication.objects.filter(job__in=queryset.values('id'))
+        return applicants_csv_response(applications, f"applicants-{timezone.now():%Y%m%d-%H%M}.csv")
+
+    @admin.action(description="Download resumes of selected jobs' applicants as ZIP")
+    def export_resumes_zip(self, request, queryset):
+        if not self._can_export(request):
+            raise PermissionDenied
+        applications = StudentApplication.objects.filter(job__in=queryset.values('id'))
+        return resume_zip_response(applications, f"resumes-{timezone.now():%Y%m%d-%H%M}.zip")
+
+    def applicants_csv_view(self, request, job_id):
+        if not self._can_export(request):
+            raise PermissionDenied
+        job = get_object_or_404(Job, pk=job_id)
+        return applicants_csv_response(StudentApplication.objects.filter(job=job), f"applicants-{slugify(job.company)}-{job.pk}.csv")
+
+    def resumes_zip_view(self, request, job_id):
+        if not self._can_export(request):
+            raise PermissionDenied
+        job = get_object_or_404(Job, pk=job_id)
+        return resume_zip_response(StudentApplication.objects.filter(job=job), f"resumes-{slugify(job.company)}-{job.pk}.zip")
+
+    def pipeline_view(self, request):
+        """Applications per status for each active job, read from the JobApplicationStat counters."""
+        if not self.has_view_permission(request):
+            return redirect('admin:index')
+
+        show_archived = request.GET.get('archived') == '1'
+        jobs = (Job.objects.filter(is_archived=True) if show_archived else Job.active.all()).order_by('-created_at')
+        paginator = Paginator(jobs.only('id', 'title', 'company', 'deadline'), 100)
+        page = paginator.get_page(request.GET.get('page'))
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Application pipeline',
+            'statuses': [label for _, label in StudentApplication.STATUS_CHOICES],
+            'rows': job_pipeline(page.object_list),
+            'page': page,
+            'show_archived': show_archived,
+        }
+        return TemplateResponse(request, 'admin/users/job/pipeline.html', context)
+
+
+class StatusChangedConcurrently(Exception):
+    pass
+
+
+def set_application_status(queryset, status, attempts=3):
+    """
+    Moves the selected applications to `status` with one UPDATE per current status and
+    tells each affected student with one batched notification insert. Returns the number updated.
+    update() skips the model signals, so the pipeline counters are adjusted here,
+    in the same transaction.
+
+    Each UPDATE only matches rows still in the status they were read with, so a row
+    changed by someone else in between is never counted twice. If that happens the
+    transaction is rolled back and the whole change is tried again from a fresh read.
+    (SELECT ... FOR UPDATE would not help here: SQLite ignores it.)
+    """
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                return _set_application_status(queryset, status)
+        except StatusChangedConcurrently:
+            if attempt == attempts - 1:
+                raise
+
+
+def _set_application_status(queryset, status):
+    changed = list(
+        queryset.exclude(status=status)
+        .values_list('id', 'student_id', 'job_id', 'status', 'job__title', 'job__company')
+    )
+    if not changed:
+        return 0
+    ids_by_status = defaultdict(list)
+    for application_id, _, _, old, _, _ in changed:
+        ids_by_status[old].append(application_id)
+    for old, ids in ids_by_status.items():
+        if StudentApplication.objects.filter(id__in=ids, status=old).update(status=status) != len(ids):
+            raise StatusChangedConcurrently
+    adjust_application_counts(status_change_deltas([(job_id, old) for _, _, job_id, old, _, _ in changed], status))
+    notify_users([
+        Notification(
+            user_id=student_id, job_id=job_id,
+            message=f"Your application for {title} at {company} is now '{status}'."[:255],
+        )
+        for _, student_id, job_id, _, title, company in changed
+    ])
+    return len(changed)
+
+
+def make_status_action(status):
+    def action(modeladmin, request, queryset):
+        updated = set_application_status(queryset, status)
+        modeladmin.message_user(request, f"{updated} application(s) marked as '{status}'.", messages.SUCCESS)
+    action.__name__ = f"mark_{status.lower().replace(' ', '_')}"
+    return admin.action(description=f"Mark selected applications as '{status}'")(action)
+
+
+@admin.action(description="Recompute relevance scores for the selected applications' jobs")
+def recompute_relevance(modeladmin, request, queryset):
+    # Queued like the changelist's own refresh, so a large selection never holds up the request
+    job_ids = list(queryset.order_by().values_list('job_id', flat=True).distinct())
+    for job_id in job_ids:
+        refresh_relevance.enqueue(job_id=job_id)
+    modeladmin.message_user(
+        request,
+        f"Queued relevance scoring for {len(job_ids)} job(s). Scores update once the task worker has run.",
+        messages.SUCCESS,
     )
 
 
 class StudentApplicationAdmin(admin.ModelAdmin):
-    list_display = ('student', 'job', 'applied_date', 'status')
-    list_filter = ('status', 'job__company')
+    list_display = ('student', 'job', 'applied_date', 'status', 'relevance')
+    # Text box instead of a SELECT DISTINCT dropdown of every company
+    list_filter = ('status', CompanyFilter)
+
+    # Scale settings for 100k+ applications
+    list_select_related = ('student', 'job')  # student/job __str__ come from the same joined query
+    ordering = ('-id',)  # primary-key order matches applied order and never needs a sort
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    list_per_page = 50
+    search_fields = ('student__username', 'job__title', 'job__company')
+
+    # Search-as-you-type widgets instead of <select>s listing every student and job
+    autocomplete_fields = ('student', 'job')
+    raw_id_fields = ('resume',)
+
+    actions = [make_status_action(status) for status, _ in StudentApplication.STATUS_CHOICES] + [recompute_relevance]
+
+    # Relevance ranking (see relevance.py). Scores only compare applicants of the same job,
+    # so they become the default order when the list is filtered to one job (e.g.
+    # ?job__id__exact=12, linked from the job pipeline page). Stale scores are queued for
+    # the task worker to refresh rather than recomputed while the page waits.
+    JOB_FILTER = 'job__id__exact'
+
+    @admin.display(description='Relevance', ordering=F('relevance_score').desc(nulls_last=True))
+    def relevance(self, obj):
+        return '-' if obj.relevance_score is None else f'{obj.relevance_score * 100:.0f}%'
+
+    def changelist_view(self, request, extra_context=None):
+        job_id = request.GET.get(self.JOB_FILTER, '')
+        if job_id.isdigit():
+            job = Job.objects.filter(pk=job_id).first()
+            if job is not None and has_stale_scores(job):
+                refresh_relevance.enqueue(job_id=job.pk)
+                self.message_user(request, "Relevance scores for this job are being updated; reload shortly.", messages.INFO)
+        return super().changelist_view(request, extra_context)
+
+    def get_ordering(self, request):
+        if request.GET.get(self.JOB_FILTER, '').isdigit():
+            return (F('relevance_score').desc(nulls_last=True), '-id')
+        return super().get_ordering(request)
+
+
+class BackgroundTaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'run_at', 'attempts', 'max_attempts', 'finished_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('claim_token', 'locked_at', 'created_at', 'finished_at', 'last_error')
+
+
+class ResumeBlobAdmin(admin.ModelAdmin):
+    list_display = ('digest', 'size', 'ref_count', 'created_at')
+    readonly_fields = ('digest', 'file', 'size', 'ref_count', 'created_at')
+    search_fields = ('digest',)
+
+    def has_add_permission(self, request):
+        # Blobs are only created by uploads (see resume_storage.py)
+        return False
+
+class ResumeAdmin(admin.ModelAdmin):
+    # The search box searches what the resumes say, not just names: "kubernetes docker"
+    # lists the students whose resumes mention those words, best matches first (see resume_search.py)
+    list_display = ('student', 'filename', 'uploaded_at', 'match_score', 'download')
+    list_select_related = ('student',)
+    search_fields = ('student__username',)
+    search_help_text = "Search resume contents (e.g. kubernetes python) or a username. Best matches first."
+    ordering = ('-uploaded_at',)
+    raw_id_fields = ('student',)
+    readonly_fields = ('blob', 'original_name')
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        ranked = search_resumes(search_term)
+        queryset = queryset.filter(
+            Q(blob_id__in=[digest for digest, _ in ranked]) | Q(student__username__icontains=search_term)
+        ).annotate(
+            search_rank=Case(
+                *[When(blob_id=digest, then=Value(score)) for digest, score in ranked],
+                default=Value(0.0), output_field=FloatField(),
+            )
+        )
+        # Best matches first, unless a column header was clicked to sort by something else
+        if ORDER_VAR not in request.GET:
+            queryset = queryset.order_by('-search_rank', '-pk')
+        return queryset, False
+
+    @admin.display(description='File')
+    def download(self, obj):
+        # Through the access-checked view; media files are not public
+        return format_html('<a href="{}">Open</a>', reverse('resume-download', args=[obj.pk]))
+
+    @admin.display(description='Match score')
+    def match_score(self, obj):
+        score = getattr(obj, 'search_rank', None)
+        return f'{score:.2f}' if score else '-'
+
+
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'profile_completion', 'phone_number')
+    list_filter = (ProfileCompletionFilter,)
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'user__email')
+    ordering = ('profile_completion', 'pk')
+    # Maintained from the profile, education and resumes (users/profile_completion.py)
+    readonly_fields = ('profile_completion',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
 
 # Your registrations remain the same, but the CustomUser is now enhanced.
 admin.site.register(CustomUser, CustomUserAdmin)
-admin.site.register(Profile)
+admin.site.register(Profile, ProfileAdmin)
 admin.site.register(Job, JobAdmin)
 admin.site.register(StudentApplication, StudentApplicationAdmin)
-admin.site.register(Resume)
\ No newline at end of file
+admin.site.register(Resume, ResumeAdmin)
+admin.site.register(ResumeBlob, ResumeBlobAdmin)
+admin.site.register(BackgroundTask, BackgroundTaskAdmin)
\ No newline at end of file
@@ -0,0 +1,69 @@
+# users/admin_filters.py
+from django.contrib import admin
+
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    A list filter shown as a text box instead of a list of every distinct value.
+    Used where a dropdown would need a SELECT DISTINCT over a large table (e.g. companies).
+    Subclasses set `parameter_name`, `title` and `lookup` (a queryset lookup such as
+    'job__company__istartswith').
+    """
+    template = 'admin/users/input_filter.html'
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        # There are no choices to list; the value is typed in
+        return ()
+
+    def has_output(self):
+        # SimpleListFilter hides filters without lookups
+        return True
+
+    def choices(self, changelist):
+        # Used by the template to keep the other active filters when this one is submitted
+        all_choice = next(super().choices(changelist))
+        query_parts = []
+        for key, values in changelist.get_filters_params().items():
+            if key == self.parameter_name:
+                continue
+            for value in values if isinstance(values, list) else [values]:
+                query_parts.append((key, value))
+        all_choice['query_parts'] = query_parts
+        yield all_choice
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if value:
+            return queryset.filter(**{self.lookup: value})
+        return queryset
+
+
+class CompanyFilter(InputFilter):
+    title = 'company'
+    parameter_name = 'company'
+    lookup = 'job__company__istartswith'
+
+
+class ProfileCompletionFilter(admin.SimpleListFilter):
+    """Completion score bands; each is a range query on the indexed profile_completion column."""
+    title = 'profile completion'
+    parameter_name = 'completion'
+    # value -> (label, lowest score, highest score)
+    BANDS = {
+        'low': ('Under 40%', 0, 39),
+        'partial': ('40-69%', 40, 69),
+        'most': ('70-99%', 70, 99),
+        'complete': ('Complete', 100, 100),
+    }
+    lookup = 'profile_completion'
+
+    def lookups(self, request, model_admin):
+        return [(value, label) for value, (label, _, _) in self.BANDS.items()]
+
+    def queryset(self, request, queryset):
+        band = self.BANDS.get(self.value())
+        if band is None:
+            return queryset
+        _, low, high = band
+        return queryset.filter(**{f'{self.lookup}__range': (low, high)})
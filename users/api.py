@@ -0,0 +1,126 @@
+# users/api.py
+"""
+Read-only JSON endpoints for the job list and job detail pages.
+
+These are polled by the campus mobile app and kiosk screens, so every response carries
+a strong ETag and a Last-Modified header. Both are computed from an aggregate query and
+the job-list ChangeMarker, which lets an unchanged poll return 304 before any job is
+loaded or serialized.
+"""
+import hashlib
+
+from django.contrib.auth.decorators import login_required
+from django.db.models import Count, Max
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import condition, require_GET
+
+from .models import ChangeMarker, Job
+from .views import filter_jobs
+
+# Fields a client may ask for with ?fields=a,b,c. Anything else is ignored.
+JOB_API_FIELDS = (
+    'id', 'title', 'company', 'location', 'job_type',
+    'description', 'key_responsibilities', 'minimum_qualifications', 'required_skills',
+    'recommendation', 'cgpa_requirement', 'min_cgpa',
+    'salary_min', 'salary_max', 'currency',
+    'joining_date', 'application_opens', 'deadline',
+    'created_at', 'updated_at',
+)
+
+# Returned when no ?fields= is given - enough to draw a job card.
+JOB_LIST_DEFAULT_FIELDS = (
+    'id', 'title', 'company', 'location', 'job_type',
+    'salary_min', 'salary_max', 'currency', 'deadline', 'updated_at',
+)
+
+
+def get_requested_fields(request, default=JOB_API_FIELDS):
+    """Reads ?fields= and keeps only known fields, in the order they were asked for."""
+    requested = request.GET.get('fields', '')
+    fields = [f.strip() for f in requested.split(',') if f.strip() in JOB_API_FIELDS]
+    # 'id' is always included so clients can link back to the detail endpoint
+    if fields and 'id' not in fields:
+        fields.insert(0, 'id')
+    return tuple(dict.fromkeys(fields)) or default
+
+
+def _make_etag(*parts):
+    return hashlib.sha256('|'.join(str(p) for p in parts).encode()).hexdigest()
+
+
+# --- Job list ---
+
+def _job_list_state(request):
+    """
+    Returns (last modified, row count, job list generation) for the filtered job list.
+    Cached on the request because the ETag and Last-Modified functions both need it.
+    """
+    if not hasattr(request, '_job_list_state'):
+        queryset, _ = filter_jobs(request, Job.active.all())
+        state = queryset.aggregate(newest=Max('updated_at'), total=Count('id'))
+        # Deleting or archiving a job leaves nothing newer among the remaining rows,
+        # so the list is also dated by the last change to any job
+        generation, changed_at = ChangeMarker.read(ChangeMarker.JOB_LIST)
+        last_modified = max(filter(None, (state['newest'], changed_at)), default=None)
+        request._job_list_state = (last_modified, state['total'], generation)
+    return request._job_list_state
+
+
+def job_list_etag(request):
+    last_modified, total, generation = _job_list_state(request)
+    # Only the eligibility filter depends on who is asking, so only then is the user part of the tag.
+    user_part = request.user.pk if request.GET.get('eligible') == '1' else ''
+    return _make_etag(
+        'job-list', user_part, request.GET.urlencode(),
+        last_modified.isoformat() if last_modified else '', total, generation,
+    )
+
+
+def job_list_last_modified(request):
+    last_modified, _, _ = _job_list_state(request)
+    return last_modified
+
+
+@login_required
+@require_GET
+@condition(etag_func=job_list_etag, last_modified_func=job_list_last_modified)
+def job_list_api(request):
+    """JSON version of job_list_view (active jobs only). Accepts the same q/location/type/eligible filters."""
+    fields = get_requested_fields(request, default=JOB_LIST_DEFAULT_FIELDS)
+    queryset, _ = filter_jobs(request, Job.active.order_by('-created_at'))
+
+    # values() skips model instantiation entirely; we only need the raw columns
+    jobs = list(queryset.values(*fields))
+    return JsonResponse({'count': len(jobs), 'results': jobs})
+
+
+# --- Job detail ---
+
+def _job_updated_at(request, job_id):
+    if not hasattr(request, '_job_updated_at'):
+        request._job_updated_at = Job.objects.filter(id=job_id).values_list('updated_at', flat=True).first()
+    return request._job_updated_at
+
+
+def job_detail_etag(request, job_id):
+    updated_at = _job_updated_at(request, job_id)
+    if updated_at is None:
+        return None
+    return _make_etag('job', job_id, request.GET.get('fields', ''), updated_at.isoformat())
+
+
+def job_detail_last_modified(request, job_id):
+    return _job_updated_at(request, job_id)
+
+
+@login_required
+@require_GET
+@condition(etag_func=job_detail_etag, last_modified_func=job_detail_last_modified)
+def job_detail_api(request, job_id):
+    fields = get_requested_fields(request)
+    job = Job.objects.filter(id=job_id).values(*fields).first()
+    if job is None:
+        raise Http404("No job found with that ID.")
+    if 'required_skills' in job:
+        job['skills_list'] = [skill.strip() for skill in (job['required_skills'] or '').split(',') if skill.strip()]
+    return JsonResponse(job)
@@ -0,0 +1,37 @@
+# users/applications.py
+"""
+The apply path for students.
+
+There is no "have they applied already?" query before the insert. The unique
+(student, job) constraint decides: the INSERT either succeeds or hits the constraint
+and is ignored. That way a double-click or two open tabs can never produce two
+applications, and a normal apply is a single INSERT (plus the pipeline counter
+update from signals.py) inside one transaction.
+"""
+from django.db import IntegrityError, transaction
+
+from .models import StudentApplication
+from .resume_storage import discard_rolled_back_blob, store_resume
+
+
+def apply_for_job(student, job, resume=None, new_resume_file=None):
+    """
+    Creates the student's application for `job`, using `resume` or a newly uploaded
+    `new_resume_file`. Returns the application, or None if the student had already applied,
+    in which case nothing is written (a resume uploaded for this attempt is discarded too).
+    """
+    new_resume = None
+    try:
+        with transaction.atomic():
+            if new_resume_file is not None:
+                resume = new_resume = store_resume(student, new_resume_file)
+            return StudentApplication.objects.create(student=student, job=job, resume=resume)
+    except IntegrityError:
+        if new_resume is not None:
+            # The new Resume row and its blob reference were rolled back with the application,
+            # but a blob file written only for this attempt is already in storage
+            discard_rolled_back_blob(new_resume.blob)
+        if not StudentApplication.objects.filter(student=student, job=job).exists():
+            # Some other constraint failed; that's a real error
+            raise
+        return None
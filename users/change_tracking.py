@@ -0,0 +1,54 @@
+# users/change_tracking.py
+"""
+Dirty-field tracking, so saves write only the columns that actually changed.
+
+signals.py snapshots the field values of tracked models (CustomUser, Profile)
+when an instance is loaded or saved. changed_fields() compares against that
+snapshot, and save_changed_fields() turns it into save(update_fields=...), or into
+no query at all when nothing changed.
+
+Values are read from __dict__, so fields deferred with .only()/.defer() are not
+fetched just to be remembered. A deferred field that is assigned afterwards counts
+as changed.
+"""
+from django.db.models import DEFERRED
+
+
+def _tracked_fields(instance):
+    return [field for field in instance._meta.concrete_fields if not field.primary_key]
+
+
+def remember_field_values(instance, fields=None):
+    """Snapshots the current values (of `fields` only, e.g. a save's update_fields)."""
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None or fields is None:
+        loaded = instance._loaded_values = {}
+    for field in _tracked_fields(instance):
+        if fields is None or field.name in fields or field.attname in fields:
+            loaded[field.name] = instance.__dict__.get(field.attname, DEFERRED)
+
+
+def changed_fields(instance):
+    """Names of the fields whose value differs from the snapshot."""
+    loaded = getattr(instance, '_loaded_values', {})
+    changed = []
+    for field in _tracked_fields(instance):
+        if field.attname not in instance.__dict__:
+            continue  # still deferred, so never touched
+        if loaded.get(field.name, DEFERRED) is DEFERRED or loaded[field.name] != instance.__dict__[field.attname]:
+            changed.append(field.name)
+    return changed
+
+
+def save_changed_fields(instance):
+    """
+    Saves only the changed fields of an existing row, or the whole instance if it
+    is new. Returns the names of the fields written ([] means no query was made).
+    """
+    if instance._state.adding:
+        instance.save()
+        return [field.name for field in _tracked_fields(instance)]
+    changed = changed_fields(instance)
+    if changed:
+        instance.save(update_fields=changed)
+    return changed
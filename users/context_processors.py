@@ -0,0 +1,27 @@
+# users/context_processors.py
+from django.conf import settings
+
+from .notifications import get_unread_count
+
+
+def unread_notifications(request):
+    """
+    Makes `unread_notification_count` available to every template.
+    The value is only computed (normally a single cache lookup) if a template actually uses it.
+    `live_notifications` says whether pages should open the notification stream.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    count = None
+
+    def unread_notification_count():
+        nonlocal count
+        if count is None:
+            count = get_unread_count(user)
+        return count
+
+    return {
+        'unread_notification_count': unread_notification_count,
+        'live_notifications': getattr(settings, 'NOTIFICATION_STREAM_ENABLED', False),
+    }
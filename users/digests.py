@@ -0,0 +1,146 @@
+# users/digests.py
+"""
+Email digests: one message per student per period, listing their unread notifications.
+
+Built for large cohorts. Students are streamed in chunks. The data for a whole chunk
+(read watermarks, last-digest times, unread personal notifications) is loaded with a
+few queries. Every message in the run goes out over a single reused SMTP connection
+(or whatever EMAIL_BACKEND is configured, e.g. the file or locmem backend in tests),
+with optional rate limiting.
+"""
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import BroadcastNotification, CustomUser, EmailDigestState, Notification, NotificationReadState
+
+
+def _chunks(iterator, size):
+    chunk = []
+    for item in iterator:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build_digest_messages(students, broadcasts, period_start, now, max_items):
+    """
+    Builds the digest emails for one chunk of students (dicts from .values()).
+    `broadcasts` are all broadcasts created since period_start, oldest first.
+    Returns a list of (user_id, message) pairs; students with nothing unread are skipped.
+    """
+    ids = [s['id'] for s in students]
+    watermarks = dict(NotificationReadState.objects.filter(user_id__in=ids).values_list('user_id', 'broadcasts_read_at'))
+    last_sent = dict(EmailDigestState.objects.filter(user_id__in=ids).values_list('user_id', 'last_sent_at'))
+
+    personal = defaultdict(list)
+    for notification in Notification.objects.filter(
+        user_id__in=ids, is_read=False, created_at__gte=period_start, created_at__lt=now,
+    ).order_by('created_at').values('user_id', 'message', 'job_id', 'created_at'):
+        personal[notification['user_id']].append(notification)
+
+    site_url = getattr(settings, 'SITE_URL', '').rstrip('/')
+    notifications_url = site_url + reverse('notification-list')
+    from_email = settings.DEFAULT_FROM_EMAIL
+
+    messages = []
+    for student in students:
+        since = max(
+            period_start,
+            student['date_joined'],
+            watermarks.get(student['id'], period_start),
+            last_sent.get(student['id'], period_start),
+        )
+        items = [n for n in personal[student['id']] if n['created_at'] > since]
+        items += [b for b in broadcasts if b['created_at'] > since]
+        if not items:
+            continue
+        items.sort(key=lambda n: n['created_at'], reverse=True)
+
+        context = {
+            'first_name': student['first_name'] or student['username'],
+            'items': items[:max_items],
+            'remaining': max(0, len(items) - max_items),
+            'total': len(items),
+            'notifications_url': notifications_url,
+            'site_url': site_url,
+        }
+        subject = f"CampusConnect: {len(items)} new update{'s' if len(items) != 1 else ''} for you"
+        message = EmailMultiAlternatives(
+            subject=subject,
+            body=render_to_string('users/emails/notification_digest.txt', context),
+            from_email=from_email,
+            to=[student['email']],
+        )
+        message.attach_alternative(render_to_string('users/emails/notification_digest.html', context), 'text/html')
+        messages.append((student['id'], message))
+    return messages
+
+
+def send_digests(period_days=None, chunk_size=None, max_per_second=None, dry_run=False, stdout=None):
+    """
+    Sends one digest email to every active student with unread notifications from the period.
+    Arguments left as None come from settings.NOTIFICATION_DIGEST.
+    Returns a dict with the number of students scanned and emails sent.
+    """
+    options = settings.NOTIFICATION_DIGEST
+    period_days = period_days or options['period_days']
+    chunk_size = chunk_size or options['chunk_size']
+    max_per_second = max_per_second or options['max_per_second']
+
+    now = timezone.now()
+    period_start = now - timedelta(days=period_days)
+    broadcasts = list(
+        BroadcastNotification.objects.filter(created_at__gte=period_start, created_at__lt=now)
+        .order_by('created_at').values('message', 'job_id', 'created_at')
+    )
+
+    students = (
+        CustomUser.objects.filter(role=CustomUser.Role.STUDENT, is_active=True)
+        .exclude(email='')
+        .order_by('id')
+        .values('id', 'username', 'first_name', 'email', 'date_joined')
+    )
+
+    stats = {'students': 0, 'sent': 0}
+    connection = None if dry_run else get_connection()
+    if connection is not None:
+        connection.open()
+    try:
+        for chunk in _chunks(students.iterator(chunk_size=chunk_size), chunk_size):
+            stats['students'] += len(chunk)
+            built = build_digest_messages(chunk, broadcasts, period_start, now, options['max_items'])
+            if not built:
+                continue
+            if dry_run:
+                stats['sent'] += len(built)
+                continue
+
+            # Rate limiting is applied per slice so the connection never idles long enough to time out
+            slice_size = max(1, int(max_per_second)) if max_per_second else len(built)
+            for start in range(0, len(built), slice_size):
+                batch = built[start:start + slice_size]
+                started = time.monotonic()
+                stats['sent'] += connection.send_messages([message for _, message in batch]) or 0
+                EmailDigestState.objects.bulk_create(
+                    [EmailDigestState(user_id=user_id, last_sent_at=now) for user_id, _ in batch],
+                    update_conflicts=True, unique_fields=['user'], update_fields=['last_sent_at'],
+                )
+                if max_per_second:
+                    elapsed = time.monotonic() - started
+                    time.sleep(max(0, len(batch) / max_per_second - elapsed))
+            if stdout:
+                stdout.write(f"... {stats['students']} students scanned, {stats['sent']} digests sent")
+    finally:
+        if connection is not None:
+            connection.close()
+    return stats
@@ -0,0 +1,184 @@
+# users/exports.py
+"""
+Streaming exports of a job's applicants for placement officers.
+
+Both exports are generators handed to a StreamingHttpResponse, so memory use stays
+flat however many applicants there are:
+  - the CSV reads applications with a chunked iterator() over one joined query
+    (student, profile, resume, plus the student's latest education via subqueries)
+  - the resume ZIP is written on the fly into a small buffer that is emptied after
+    every chunk. Nothing is written to a temporary file, and each resume is read
+    from storage in chunks.
+"""
+import csv
+import os
+import zipfile
+
+from django.db.models import OuterRef, Subquery
+from django.http import StreamingHttpResponse
+from django.utils.text import slugify
+
+from .models import EducationDetail
+
+EXPORT_CHUNK_SIZE = 500
+
+APPLICANT_CSV_HEADER = [
+    'Application ID', 'Job ID', 'Job', 'Company', 'Status', 'Applied',
+    'Username', 'First name', 'Last name', 'Email',
+    'Phone', 'Gender', 'Date of birth', 'Nationality', 'LinkedIn', 'GitHub', 'Portfolio',
+    'Degree', 'Institution', 'End year', 'CGPA',
+    'Resume',
+]
+
+
+def applications_for_export(applications):
+    """
+    One query for everything the CSV needs. The student's most recent education entry
+    comes from correlated subqueries rather than a join, so each application stays one row.
+    """
+    latest_education = EducationDetail.objects.filter(profile_id=OuterRef('student_id')).order_by('-start_year', '-id')
+    return (
+        applications
+        .select_related('job', 'student', 'student__profile', 'resume')
+        .annotate(
+            degree=Subquery(latest_education.values('degree')[:1]),
+            institution=Subquery(latest_education.values('institution')[:1]),
+            end_year=Subquery(latest_education.values('end_year')[:1]),
+            cgpa=Subquery(latest_education.values('cgpa')[:1]),
+        )
+        .order_by('job_id', 'id')
+    )
+
+
+# Spreadsheets treat a cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    """
+    Neutralises text that a spreadsheet would run as a formula (CSV injection) by
+    prefixing it with an apostrophe. Names, usernames and titles are typed in by students.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """A write-only file object for csv.writer: write() hands the line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def _applicant_row(application):
+    student = application.student
+    # Admin accounts have no profile
+    profile = getattr(student, 'profile', None)
+    return [
+        application.id, application.job_id, application.job.title, application.job.company,
+        application.status, application.applied_date.isoformat(),
+        student.username, student.first_name, student.last_name, student.email,
+        profile and profile.phone_number, profile and profile.gender, profile and profile.date_of_birth,
+        profile and profile.nationality, profile and profile.linkedin_url, profile and profile.github_url,
+        profile and profile.portfolio_url,
+        application.degree, application.institution, application.end_year,
+        # Some backends hand subquery decimals back unrounded
+        f'{application.cgpa:.2f}' if application.cgpa is not None else '',
+        application.resume.file.name if application.resume else '',
+    ]
+
+
+def stream_applicants_csv(applications):
+    """Yields the CSV line by line."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(APPLICANT_CSV_HEADER)
+    for application in applications_for_export(applications).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield writer.writerow([_csv_cell(value) for value in _applicant_row(application)])
+
+
+class _ZipBuffer:
+    """
+    An unseekable output for zipfile that just collects bytes until they are taken.
+    Because it can't seek, zipfile writes a data descriptor after each member instead
+    of going back to patch the local header, which is what makes streaming possible.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _resume_archive_name(application, used_names):
+    base = os.path.basename(application.resume.file.name) or 'resume.pdf'
+    name = f"{slugify(application.job.company)}-{application.job_id}/{application.student.username}-{application.id}-{base}"
+    # Never two members with the same name
+    if name in used_names:
+        root, ext = os.path.splitext(name)
+        name = f"{root}-{len(used_names)}{ext}"
+    used_names.add(name)
+    return name
+
+
+def stream_resume_zip(applications):
+    """
+    Yields a ZIP of the resume attached to each application, built as it is sent.
+    Files missing from storage are skipped and listed in MISSING.txt at the end.
+    """
+    buffer = _ZipBuffer()
+    used_names = set()
+    missing = []
+    queryset = (
+        applications.filter(resume__isnull=False)
+        .select_related('job', 'student', 'resume')
+        .only('id', 'job__id', 'job__company', 'student__id', 'student__username', 'resume__id', 'resume__file')
+        .order_by('job_id', 'id')
+    )
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        for application in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            file = application.resume.file
+            try:
+                source = file.storage.open(file.name, 'rb')
+            except (FileNotFoundError, OSError):
+                missing.append(file.name)
+                continue
+            with source, archive.open(_resume_archive_name(application, used_names), mode='w') as member:
+                for chunk in source.chunks():
+                    member.write(chunk)
+                    data = buffer.take()
+                    if data:
+                        yield data
+            # The data descriptor written when the member is closed
+            yield buffer.take()
+        if missing:
+            archive.writestr('MISSING.txt', '\n'.join(missing) + '\n')
+    # Whatever is left, plus the central directory written on close
+    yield buffer.take()
+
+
+def applicants_csv_response(applications, filename):
+    response = StreamingHttpResponse(stream_applicants_csv(applications), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def resume_zip_response(applications, filename):
+    response = StreamingHttpResponse(stream_resume_zip(applications), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,151 @@
+# users/file_serving.py
+"""
+Serving private media files (resumes) after the view has checked who may see them.
+
+With PROTECTED_MEDIA_SENDFILE set, Django only returns headers and the front-end
+server sends the file itself:
+  - 'x-accel-redirect' (nginx): X-Accel-Redirect: PROTECTED_MEDIA_INTERNAL_URL + name,
+    where that URL is an `internal;` location aliased to MEDIA_ROOT
+  - 'x-sendfile' (Apache mod_xsendfile, lighttpd): X-Sendfile: <absolute path>
+
+Without it (development, or a server that can't do either), the file is streamed from
+storage in chunks. Range requests are supported (PDF viewers fetch pages on demand),
+as are ETag/If-None-Match, so a large PDF is never read into memory in one piece.
+"""
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, quote_etag
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # Weak comparison, as If-None-Match requires
+    candidates = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return etag in candidates
+
+
+def _parse_range(header, size):
+    """
+    Returns (start, end) inclusive for a single "bytes=" range, None to send the whole
+    file (no header, several ranges, or a syntax we don't handle), or 'unsatisfiable'.
+    """
+    match = _RANGE_PATTERN.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # "bytes=-500" is the last 500 bytes
+        length = int(last)
+        if length == 0:
+            return 'unsatisfiable'
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'unsatisfiable'
+    return start, end
+
+
+def _read_range(file, start, length):
+    try:
+        file.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = file.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _content_disposition(filename, as_attachment):
+    kind = 'attachment' if as_attachment else 'inline'
+    ascii_name = filename.encode('ascii', 'ignore').decode().replace('"', '') or 'download'
+    return f"{kind}; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def serve_protected_file(request, name, filename, etag, content_type='application/pdf', as_attachment=False):
+    """
+    Sends the stored file `name` (a storage name such as resumes/blobs/ab/abc...pdf).
+    `etag` must change whenever the file's contents do; callers only invoke this after
+    their access check.
+    """
+    etag = quote_etag(etag)
+    headers = {
+        'ETag': etag,
+        # Per-user content: browsers may cache it, shared caches must not
+        'Cache-Control': 'private, max-age=3600',
+        'Content-Disposition': _content_disposition(filename, as_attachment),
+        'X-Content-Type-Options': 'nosniff',
+    }
+
+    if _etag_matches(request.headers.get('If-None-Match'), etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Cache-Control'] = headers['Cache-Control']
+        return response
+
+    sendfile_mode = settings.PROTECTED_MEDIA_SENDFILE
+    if sendfile_mode == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        # nginx takes over, including Range handling, and ignores this body
+        response['X-Accel-Redirect'] = settings.PROTECTED_MEDIA_INTERNAL_URL.rstrip('/') + '/' + quote(name)
+        return response
+    if sendfile_mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Sendfile'] = default_storage.path(name)
+        return response
+
+    file = default_storage.open(name, 'rb')
+    size = file.size
+    headers['Accept-Ranges'] = 'bytes'
+    try:
+        headers['Last-Modified'] = http_date(default_storage.get_modified_time(name).timestamp())
+    except (NotImplementedError, OSError):
+        pass
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    # A Range is only honoured while the client's copy is still current
+    if if_range is None or if_range.strip() == etag:
+        byte_range = _parse_range(request.headers.get('Range'), size)
+
+    if byte_range == 'unsatisfiable':
+        file.close()
+        return HttpResponse(status=416, headers={'Content-Range': f'bytes */{size}'})
+
+    start, end = byte_range or (0, size - 1)
+    length = max(0, end - start + 1)
+    response = StreamingHttpResponse(
+        _read_range(file, start, length),
+        status=206 if byte_range else 200,
+        content_type=content_type,
+        headers=headers,
+    )
+    response['Content-Length'] = str(length)
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+def file_etag(name, digest=None):
+    """A content digest when there is one, otherwise the size and modification time."""
+    if digest:
+        return digest
+    modified = default_storage.get_modified_time(name)
+    return f'{default_storage.size(name):x}-{int(modified.timestamp() * 1_000_000):x}'
@@ -1,6 +1,8 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from .models import CustomUser, Resume, Profile, EducationDetail
+from .models import CustomUser, Resume, Profile, EducationDetail, Job
+from .upload_handlers import validate_resume_file
+from .change_tracking import save_changed_fields
 from django.contrib.auth.forms import AuthenticationForm
 
 class RegistrationForm(forms.ModelForm):
@@ -33,7 +35,8 @@ class RegistrationForm(forms.ModelForm):
 
     def clean_username(self):
         username = self.cleaned_data.get('username')
-        if CustomUser.objects.filter(username=username).exists():
+        # Usernames are matched case-insensitively at login, so "Alice" would clash with "alice"
+        if CustomUser.objects.username_matches(username).exists():
             raise ValidationError("This username is already taken. Please choose another one.")
         return username
 
@@ -78,8 +81,9 @@ class ResumeUploadForm(forms.ModelForm):
 
     def clean_file(self):
         file = self.cleaned_data.get('file', False)
-        if file and not file.name.endswith('.pdf'):
-            raise forms.ValidationError("Only PDF files are allowed.")
+        if file:
+            # Checks the contents (PDF signature, size), not just the filename
+            validate_resume_file(file)
         return file
 
 
@@ -121,8 +125,11 @@ class ApplicationForm(forms.Form):
             raise forms.ValidationError("Please either select an existing resume or upload a new one, not both.")
         
         # Validate that the new resume is a PDF
-        if new_resume and not new_resume.name.endswith('.pdf'):
-            self.add_error('new_resume', "Only PDF files are allowed.")
+        if new_resume:
+            try:
+                validate_resume_file(new_resume)
+            except forms.ValidationError as e:
+                self.add_error('new_resume', e)
             
         return cleaned_data
     
@@ -157,11 +164,13 @@ class ProfileUpdateForm(forms.ModelForm):
         user.first_name = self.cleaned_data['first_name']
         user.last_name = self.cleaned_data['last_name']
         user.email = self.cleaned_data['email']
-        
+
+        profile = super().save(commit=False)
         if commit:
-            user.save()
-            
-        profile = super().save(commit=commit)
+            # Each row is written only if something in it changed, and only the changed columns
+            save_changed_fields(user)
+            save_changed_fields(profile)
+            self._save_m2m()
         return profile
     
 
@@ -175,4 +184,38 @@ class EducationForm(forms.ModelForm):
             'start_year': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'e.g., 2020'}),
             'end_year': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Leave blank if current'}),
             'cgpa': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'e.g., 8.5'}),
-        }
\ No newline at end of file
+        }
+
+
+class JobImportForm(forms.ModelForm):
+    """Validates a single row of a bulk job import (see job_import.py)."""
+    class Meta:
+        model = Job
+        fields = [
+            'title', 'company', 'location', 'job_type',
+            'description', 'key_responsibilities', 'minimum_qualifications', 'required_skills',
+            'recommendation', 'cgpa_requirement',
+            'salary_min', 'salary_max', 'currency',
+            'joining_date', 'application_opens', 'deadline',
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Fields with a model default may be left out of the file; the default is then kept
+        for name in ('location', 'job_type', 'currency'):
+            self.fields[name].required = False
+
+    def clean(self):
+        cleaned_data = super().clean()
+        salary_min = cleaned_data.get('salary_min')
+        salary_max = cleaned_data.get('salary_max')
+        if salary_min is not None and salary_max is not None and salary_min > salary_max:
+            self.add_error('salary_max', "Maximum salary cannot be lower than the minimum salary.")
+        return cleaned_data
+
+
+class JobImportUploadForm(forms.Form):
+    file = forms.FileField(
+        label="CSV or JSON file",
+        help_text="CSV needs a header row with job field names (title, company, deadline, ...). JSON must be a list of objects.",
+    )
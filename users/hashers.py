@@ -0,0 +1,111 @@
+# users/hashers.py
+"""
+Password hashers whose cost comes from settings.PASSWORD_HASH_POLICY.
+
+Login time is dominated by verifying the password hash, and that is deliberately
+expensive. The policy picks a memory-hard algorithm (Argon2id, or scrypt when
+argon2-cffi isn't installed) and sets its cost so one verification takes a chosen
+time on our servers. That keeps it costly for an attacker with a stolen
+database, without making result day's login rush CPU-bound. The old
+PBKDF2 default burned about half a second of CPU per login.
+
+Hashes are upgraded transparently. Django's check_password re-hashes the password
+with the first entry of PASSWORD_HASHERS whenever the stored hash uses another
+algorithm or different costs (must_update), and saves it. Changing the policy
+therefore takes effect for each user at their next successful login.
+
+`manage.py benchmark_logins --target-ms 50` measures this machine and suggests costs.
+"""
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+def policy_costs(algorithm):
+    """
+    The policy's costs for 'argon2' or 'scrypt'. The hashers look them up on every hash,
+    not in __init__, because get_hashers() caches the instances for the whole process.
+    """
+    return getattr(settings, 'PASSWORD_HASH_POLICY', {}).get(algorithm, {})
+
+
+class PolicyArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with the policy's costs (memory_cost is in KiB)."""
+
+    @property
+    def time_cost(self):
+        return policy_costs('argon2').get('time_cost', Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return policy_costs('argon2').get('memory_cost', Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return policy_costs('argon2').get('parallelism', Argon2PasswordHasher.parallelism)
+
+
+class PolicyScryptPasswordHasher(ScryptPasswordHasher):
+    """scrypt with the policy's costs; uses 128 x block_size x work_factor bytes per hash."""
+
+    @property
+    def work_factor(self):
+        return policy_costs('scrypt').get('work_factor', ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return policy_costs('scrypt').get('block_size', ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return policy_costs('scrypt').get('parallelism', ScryptPasswordHasher.parallelism)
+
+    @property
+    def maxmem(self):
+        # hashlib refuses anything over 32 MiB by default. The headroom lets hashes
+        # made under a costlier earlier policy still be verified.
+        return max(2 ** 26, 256 * self.block_size * self.work_factor)
+
+
+def time_verify(hasher, rounds=5):
+    """Median seconds this machine takes to verify one password with `hasher`."""
+    encoded = hasher.encode('benchmark-password', hasher.salt())
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hasher.verify('benchmark-password', encoded)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def suggest_costs(hasher_class, target_ms):
+    """
+    The costliest settings for `hasher_class` whose verification stays within
+    target_ms here, as (costs dict, measured ms). Never goes below the cheapest candidate.
+    scrypt varies work_factor, and Argon2 varies time_cost at the policy's memory_cost.
+    """
+    # The costs are properties, so read the current ones from an instance
+    current = hasher_class()
+    if issubclass(hasher_class, ScryptPasswordHasher):
+        candidates = [
+            {'work_factor': 2 ** exponent, 'block_size': current.block_size, 'parallelism': current.parallelism}
+            for exponent in range(12, 21)
+        ]
+    else:
+        candidates = [
+            {'time_cost': time_cost, 'memory_cost': current.memory_cost, 'parallelism': current.parallelism}
+            for time_cost in range(1, 11)
+        ]
+
+    best = None
+    for costs in candidates:
+        attributes = dict(costs)
+        if 'work_factor' in costs:
+            attributes['maxmem'] = max(2 ** 26, 256 * costs['block_size'] * costs['work_factor'])
+        hasher = type('CandidateHasher', (hasher_class,), attributes)()
+        elapsed_ms = time_verify(hasher, rounds=3) * 1000
+        if best is not None and elapsed_ms > target_ms:
+            break
+        best = (costs, elapsed_ms)
+    return best
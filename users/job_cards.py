@@ -0,0 +1,49 @@
+# users/job_cards.py
+"""
+Fragment cache for the job cards on the job list page.
+
+Each card is rendered once per version of its Job and kept in the cache together with
+the job's updated_at. The list page fetches all cards in one get_many() call and only
+renders the ones that are missing or stale. users/signals.py drops a job's entry
+whenever that job is saved or deleted.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+JOB_CARD_TEMPLATE = 'users/partials/job_card.html'
+
+
+def job_card_cache_key(job_id):
+    return f'job-card:{job_id}'
+
+
+def invalidate_job_card(job_id):
+    cache.delete(job_card_cache_key(job_id))
+
+
+def get_job_cards(jobs):
+    """
+    Returns the rendered HTML card for each job, in the same order as `jobs`.
+    Cached entries are (updated_at, html) pairs, so an entry for an older version is
+    treated as a miss even if the invalidation signal was somehow skipped.
+    """
+    jobs = list(jobs)
+    keys = {job.id: job_card_cache_key(job.id) for job in jobs}
+    cached = cache.get_many(keys.values())
+
+    cards = []
+    to_cache = {}
+    for job in jobs:
+        entry = cached.get(keys[job.id])
+        if entry and entry[0] == job.updated_at:
+            html = entry[1]
+        else:
+            html = render_to_string(JOB_CARD_TEMPLATE, {'job': job})
+            to_cache[keys[job.id]] = (job.updated_at, str(html))
+        cards.append(mark_safe(html))
+
+    if to_cache:
+        cache.set_many(to_cache, settings.JOB_CARD_CACHE_TIMEOUT)
+    return cards
@@ -0,0 +1,99 @@
+# users/job_import.py
+"""
+Bulk import of job postings from CSV or JSON, used by the JobAdmin "Import jobs" page
+and the import_jobs management command.
+
+Every row is validated before anything is written. If any row is invalid nothing is
+imported and all the errors are reported together. Valid batches are inserted with a
+single bulk_create inside one transaction, together with one queued task that
+announces the whole batch to students.
+"""
+import csv
+import io
+import json
+import os
+
+from django.db import transaction
+
+from .forms import JobImportForm
+from .models import Job, parse_cgpa_requirement
+from .tasks import announce_jobs
+
+
+class JobImportError(Exception):
+    """Raised when the file cannot be read or one or more rows fail validation."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors))
+
+
+def read_job_definitions(file, file_format=None):
+    """
+    Reads job definitions from an open file (text or bytes) and returns a list of dicts.
+    CSV files need a header row with Job field names. JSON files must hold a list of objects.
+    The format is guessed from the file name when not given.
+    """
+    if file_format is None:
+        name = getattr(file, 'name', '') or ''
+        file_format = os.path.splitext(name)[1].lstrip('.').lower() or 'csv'
+
+    content = file.read()
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise JobImportError(["The file must be UTF-8 encoded."])
+
+    if file_format == 'json':
+        try:
+            rows = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise JobImportError([f"Invalid JSON: {e}"])
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise JobImportError(["The JSON file must contain a list of job objects."])
+        return rows
+
+    if file_format == 'csv':
+        return list(csv.DictReader(io.StringIO(content)))
+
+    raise JobImportError([f"Unsupported file format '{file_format}'. Use CSV or JSON."])
+
+
+def validate_job_definitions(rows):
+    """Validates every row and returns unsaved Job instances, or raises JobImportError listing all problems."""
+    jobs = []
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        # Blank CSV cells mean "not given", so let the model defaults apply
+        data = {key: value for key, value in row.items() if key and value not in (None, '')}
+        form = JobImportForm(data=data)
+        if form.is_valid():
+            job = form.save(commit=False)
+            # bulk_create skips Job.save(), so fill in the derived column here
+            job.min_cgpa = parse_cgpa_requirement(job.cgpa_requirement)
+            jobs.append(job)
+        else:
+            for field, field_errors in form.errors.items():
+                label = 'row' if field == '__all__' else field
+                for error in field_errors:
+                    errors.append(f"Row {number} ({label}): {error}")
+    if not rows:
+        errors.append("The file does not contain any jobs.")
+    if errors:
+        raise JobImportError(errors)
+    return jobs
+
+
+def import_jobs(rows, notify=True):
+    """
+    Validates and inserts all rows in one transaction. Returns the created jobs.
+    The announcement for the whole batch is queued in the same transaction, so it
+    only exists if the jobs do.
+    """
+    jobs = validate_job_definitions(rows)
+    with transaction.atomic():
+        created = Job.objects.bulk_create(jobs)
+        if notify:
+            announce_jobs.enqueue(job_ids=[job.pk for job in created])
+    return created
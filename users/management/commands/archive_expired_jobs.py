@@ -0,0 +1,45 @@
+# users/management/commands/archive_expired_jobs.py
+"""
+Moves jobs whose application deadline has passed out of the active listing.
+
+Meant to be run on a schedule, e.g. once a night from cron:
+    0 1 * * * /path/to/venv/bin/python manage.py archive_expired_jobs
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.job_cards import invalidate_job_card
+from users.models import ChangeMarker, Job
+
+
+class Command(BaseCommand):
+    help = "Archives jobs whose deadline is in the past so they drop out of the job list, search and filters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only report how many jobs would be archived.",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        expired = Job.active.filter(deadline__lt=today)
+        expired_ids = list(expired.values_list('id', flat=True))
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(expired_ids)} job(s) would be archived.")
+            return
+
+        now = timezone.now()
+        # A single UPDATE. updated_at is set by hand because update() skips auto_now,
+        # and the jobs API relies on it to invalidate cached responses.
+        archived = Job.objects.filter(id__in=expired_ids).update(
+            is_archived=True, archived_at=now, updated_at=now,
+        )
+        for job_id in expired_ids:
+            invalidate_job_card(job_id)
+        if archived:
+            # update() sends no signals; the jobs API needs to see the list shrink
+            ChangeMarker.bump(ChangeMarker.JOB_LIST)
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} expired job(s)."))
@@ -0,0 +1,101 @@
+# users/management/commands/benchmark_logins.py
+"""
+Measures login throughput: how many logins per second one core can serve.
+
+Creates throwaway students, sends each one through login_view (form, user lookup,
+password check, session creation, last_login update), then rolls everything back.
+Nothing is left in the database. CPU time is measured next to wall time, and
+logins per CPU-second is the number to multiply by the number of cores in
+the web tier.
+
+    python manage.py benchmark_logins                   # with the current default hasher
+    python manage.py benchmark_logins --hasher pbkdf2_sha256
+        # stored hashes use PBKDF2, as before the policy: includes the one-off upgrade on login
+    python manage.py benchmark_logins --target-ms 50    # suggest PASSWORD_HASH_POLICY costs instead
+"""
+import time
+
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from django.urls import reverse
+
+from users.hashers import suggest_costs
+from users.models import CustomUser
+from users.views import login_view
+
+PASSWORD = 'Benchmark-Passw0rd!'
+
+
+class Command(BaseCommand):
+    help = "Benchmarks logins per second per core, or suggests password hash costs for a target latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=100, help="Number of logins to time (one per throwaway user).")
+        parser.add_argument(
+            '--hasher', default='default',
+            help="Algorithm the throwaway users' passwords are stored with, e.g. pbkdf2_sha256 (default: the current default hasher).",
+        )
+        parser.add_argument(
+            '--target-ms', type=float,
+            help="Instead of benchmarking, suggest costs for the default hasher that verify within this many milliseconds.",
+        )
+
+    def handle(self, *args, **options):
+        if options['target_ms']:
+            self.suggest(options['target_ms'])
+            return
+
+        try:
+            hasher = get_hasher(options['hasher'])
+        except ValueError as e:
+            raise CommandError(e)
+        count = max(1, options['logins'])
+        self.stdout.write(f"Creating {count} throwaway user(s) with {hasher.algorithm} hashes...")
+
+        with transaction.atomic():
+            encoded = make_password(PASSWORD, hasher=hasher)
+            users = []
+            for i in range(count):
+                # One shared hash keeps setup fast; every login still verifies it in full
+                user = CustomUser.objects.create(username=f'benchmark-login-{i}', password=encoded)
+                users.append(user.username)
+
+            factory = RequestFactory()
+            failures = 0
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            for username in users:
+                # Upper case, so the case-insensitive lookup is exercised too
+                request = factory.post('/accounts/login/', {'username': username.upper(), 'password': PASSWORD})
+                request.session = SessionStore()
+                request._messages = FallbackStorage(request)
+                response = login_view(request)
+                if response.status_code != 302 or response.url == reverse('login'):
+                    failures += 1
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+
+            upgraded = CustomUser.objects.filter(username__in=users).exclude(password=encoded).count()
+            # Throw away the users, profiles and sessions
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"{failures} of {count} login(s) failed; the benchmark is not meaningful.")
+        self.stdout.write(
+            f"{count} logins in {wall:.2f} s wall, {cpu:.2f} s CPU: "
+            f"{count / wall:.1f} logins/s, {1000 * wall / count:.1f} ms per login."
+        )
+        self.stdout.write(self.style.SUCCESS(f"{count / cpu:.1f} logins per second per core."))
+        if upgraded:
+            self.stdout.write(f"{upgraded} stored hash(es) were upgraded to {get_hasher().algorithm} during the run.")
+
+    def suggest(self, target_ms):
+        hasher = get_hasher()
+        if not hasattr(hasher, 'work_factor') and not hasattr(hasher, 'time_cost'):
+            raise CommandError(f"The default hasher ({hasher.algorithm}) has no tunable cost; set PASSWORD_HASH_POLICY['algorithm'].")
+        costs, elapsed_ms = suggest_costs(type(hasher), target_ms)
+        self.stdout.write(f"{hasher.algorithm}: {elapsed_ms:.1f} ms per verification with {costs}")
+        self.stdout.write(self.style.SUCCESS(f"Set PASSWORD_HASH_POLICY['{hasher.algorithm}'] = {costs}"))
@@ -0,0 +1,153 @@
+# users/management/commands/compact_notifications.py
+"""
+Applies the notification retention policies (settings.NOTIFICATION_RETENTION).
+
+Rows are deleted in small batches, each in its own short transaction, so SQLite's
+database-wide write lock is never held for long while students are using the site.
+Meant to be run on a schedule, e.g. nightly from cron:
+    30 1 * * * /path/to/venv/bin/python manage.py compact_notifications
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from users.models import BroadcastNotification, Notification
+
+
+def table_size_bytes(model):
+    """On-disk size of a model's table (indexes included where the database reports them), or None if unknown."""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        try:
+            if connection.vendor == 'sqlite':
+                # dbstat is compiled into most SQLite builds; it includes the table's indexes by name
+                index_names = [
+                    row[0] for row in cursor.execute(
+                        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s", [table],
+                    ).fetchall()
+                ]
+                names = [table] + index_names
+                placeholders = ', '.join(['%s'] * len(names))
+                cursor.execute(f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({placeholders})", names)
+            elif connection.vendor == 'postgresql':
+                cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+            elif connection.vendor == 'mysql':
+                cursor.execute(
+                    "SELECT data_length + index_length FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = %s", [table],
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+        except Exception:
+            return None
+    return row[0] if row else None
+
+
+def format_size(size):
+    if size is None:
+        return 'unknown size'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+class Command(BaseCommand):
+    help = "Deletes old read notifications and notifications for expired jobs, in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--read-after-days', type=int,
+            help="Override the retention period for read notifications.",
+        )
+        parser.add_argument(
+            '--keep-expired-jobs', action='store_true',
+            help="Do not delete notifications for jobs whose deadline has passed.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Rows deleted per transaction (default: 500).",
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help="Seconds to sleep between batches so other writers can get in (default: 0.05).",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only count the rows each policy would delete.",
+        )
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help="Run VACUUM afterwards (SQLite/PostgreSQL) to return freed pages to the OS. Locks the database while it runs.",
+        )
+
+    def handle(self, *args, **options):
+        policy = dict(settings.NOTIFICATION_RETENTION)
+        if options['read_after_days'] is not None:
+            policy['read_after_days'] = options['read_after_days']
+        if options['keep_expired_jobs']:
+            policy['expired_jobs'] = False
+
+        now = timezone.now()
+        targets = []
+        if policy['read_after_days'] is not None:
+            cutoff = now - timedelta(days=policy['read_after_days'])
+            targets.append((
+                f"read notifications older than {policy['read_after_days']} days",
+                Notification.objects.filter(is_read=True, created_at__lt=cutoff),
+            ))
+        if policy['expired_jobs']:
+            today = now.date()
+            targets.append((
+                "notifications for expired jobs",
+                Notification.objects.filter(job__deadline__lt=today),
+            ))
+            targets.append((
+                "broadcasts for expired jobs",
+                BroadcastNotification.objects.filter(job__deadline__lt=today),
+            ))
+
+        if options['dry_run']:
+            for label, queryset in targets:
+                self.stdout.write(f"{label}: {queryset.count()} row(s) would be deleted")
+            return
+
+        models = (Notification, BroadcastNotification)
+        before = {model: (model.objects.count(), table_size_bytes(model)) for model in models}
+        started = time.monotonic()
+
+        for label, queryset in targets:
+            removed = self.delete_in_batches(queryset, options['batch_size'], options['pause'])
+            self.stdout.write(f"{label}: {removed} row(s) deleted")
+
+        if options['vacuum'] and connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute("VACUUM")
+
+        duration = time.monotonic() - started
+        for model in models:
+            rows_before, size_before = before[model]
+            rows_after, size_after = model.objects.count(), table_size_bytes(model)
+            self.stdout.write(
+                f"{model._meta.db_table}: {rows_before} -> {rows_after} rows, "
+                f"{format_size(size_before)} -> {format_size(size_after)}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Compaction finished in {duration:.2f}s."))
+
+    def delete_in_batches(self, queryset, batch_size, pause):
+        removed = 0
+        while True:
+            with transaction.atomic():
+                ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                queryset.model.objects.filter(id__in=ids).delete()
+            removed += len(ids)
+            if pause:
+                time.sleep(pause)
+        return removed
@@ -0,0 +1,106 @@
+# users/management/commands/dedupe_resumes.py
+"""
+Moves resumes uploaded before content-addressed storage onto shared blobs.
+
+For every Resume without a blob, the file is hashed and attached to the blob for
+its contents. The first file with given contents is copied into resumes/blobs/, and
+later identical files just take a reference. The old per-upload files are deleted
+once their rows point at the blob. Afterwards every blob's reference count is
+recomputed from the Resume rows, and with --remove-orphans, blob files that no
+ResumeBlob row owns are deleted once they are past RESUME_ORPHAN_GRACE_PERIOD.
+
+Safe to re-run; resumes that already have a blob are skipped.
+    python manage.py dedupe_resumes --dry-run
+    python manage.py dedupe_resumes --remove-orphans
+"""
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from users.models import Resume, ResumeBlob
+from users.resume_storage import acquire_blob, hash_file, orphaned_blob_files
+
+
+class Command(BaseCommand):
+    help = "Deduplicates stored resume files into content-addressed blobs and repairs blob reference counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only hash the files and report how much space deduplication would save.",
+        )
+        parser.add_argument(
+            '--remove-orphans', action='store_true',
+            help="Also delete blob files that have no ResumeBlob row and are past the grace period.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        legacy = Resume.objects.filter(blob__isnull=True).only('id', 'file').order_by('id')
+
+        seen = {}  # digest -> size, for the dry-run report
+        stats = {'resumes': 0, 'duplicates': 0, 'saved_bytes': 0, 'missing': 0}
+        for resume in legacy.iterator(chunk_size=500):
+            name = resume.file.name
+            try:
+                file = default_storage.open(name, 'rb')
+            except (FileNotFoundError, OSError):
+                stats['missing'] += 1
+                self.stderr.write(f"Resume {resume.id}: file {name} is missing, skipped.")
+                continue
+
+            with file:
+                digest, size = hash_file(file)
+                stats['resumes'] += 1
+                already_stored = digest in seen or ResumeBlob.objects.filter(digest=digest).exists()
+                if already_stored:
+                    stats['duplicates'] += 1
+                    stats['saved_bytes'] += size
+                seen[digest] = size
+                if dry_run:
+                    continue
+
+                with transaction.atomic():
+                    blob = acquire_blob(file, digest=digest, size=size)
+                    Resume.objects.filter(id=resume.id).update(
+                        blob=blob, file=blob.file.name, original_name=os.path.basename(name)[:255],
+                    )
+            # The old copy is no longer referenced by anything
+            if name != blob.file.name and default_storage.exists(name):
+                default_storage.delete(name)
+
+        prefix = "Would deduplicate" if dry_run else "Deduplicated"
+        self.stdout.write(
+            f"{prefix} {stats['resumes']} resume(s): {stats['duplicates']} duplicate(s), "
+            f"{stats['saved_bytes'] / (1024 * 1024):.1f} MB saved, {stats['missing']} missing."
+        )
+        if dry_run:
+            return
+
+        # The counts are maintained incrementally; this catches anything that slipped past
+        actual = Coalesce(
+            Subquery(
+                Resume.objects.filter(blob=OuterRef('pk')).values('blob').annotate(total=Count('id')).values('total')
+            ),
+            Value(0),
+        )
+        repaired = ResumeBlob.objects.annotate(actual=actual).exclude(ref_count=actual).update(ref_count=actual)
+        unreferenced = list(ResumeBlob.objects.filter(ref_count=0).values_list('digest', flat=True))
+        if repaired or unreferenced:
+            from users.tasks import delete_resume_blob
+            for digest in unreferenced:
+                delete_resume_blob.enqueue(digest=digest)
+            self.stdout.write(f"Repaired {repaired} reference count(s); {len(unreferenced)} unreferenced blob(s) queued for deletion.")
+
+        if options['remove_orphans']:
+            removed = 0
+            for name in orphaned_blob_files():
+                default_storage.delete(name)
+                removed += 1
+            self.stdout.write(f"Removed {removed} orphaned blob file(s).")
+
+        self.stdout.write(self.style.SUCCESS("Done."))
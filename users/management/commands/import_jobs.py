@@ -0,0 +1,44 @@
+# users/management/commands/import_jobs.py
+from django.core.management.base import BaseCommand, CommandError
+
+from users.job_import import JobImportError, import_jobs, read_job_definitions, validate_job_definitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports job postings from a CSV or JSON file in one transaction. "
+        "Students are notified about the whole batch at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to a .csv or .json file of job definitions.")
+        parser.add_argument(
+            '--format', choices=['csv', 'json'], dest='file_format',
+            help="File format. Guessed from the file extension when omitted.",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Validate the file without importing anything.",
+        )
+        parser.add_argument(
+            '--no-notify', action='store_true',
+            help="Import the jobs without notifying students.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as file:
+                rows = read_job_definitions(file, options['file_format'])
+            if options['dry_run']:
+                jobs = validate_job_definitions(rows)
+                self.stdout.write(self.style.SUCCESS(f"{len(jobs)} job(s) are valid. Nothing was imported (dry run)."))
+                return
+            jobs = import_jobs(rows, notify=not options['no_notify'])
+        except OSError as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+        except JobImportError as e:
+            for error in e.errors:
+                self.stderr.write(error)
+            raise CommandError(f"Import failed with {len(e.errors)} error(s). No jobs were imported.")
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {len(jobs)} job(s)."))
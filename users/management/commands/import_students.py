@@ -0,0 +1,109 @@
+# users/management/commands/import_students.py
+"""
+Onboards a batch of students from the registrar's CSV (see users/student_import.py).
+
+    python manage.py import_students students.csv --credentials-out credentials.csv
+    python manage.py import_students students.csv --activate --processes 8
+    python manage.py import_students students.csv --dry-run
+
+Rows without a password column value get a random password. Those are written to
+--credentials-out, which is then required.
+"""
+import csv
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from users.student_import import StudentImportError, import_students, read_student_rows, validate_student_rows
+
+
+class Command(BaseCommand):
+    help = "Creates student accounts in bulk from a CSV keyed on College_ID."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to the CSV file.")
+        parser.add_argument(
+            '--activate', action='store_true',
+            help="Create the accounts active instead of awaiting administrator approval.",
+        )
+        parser.add_argument(
+            '--credentials-out',
+            help="Where to write College_ID,password for the generated passwords.",
+        )
+        parser.add_argument(
+            '--processes', type=int, default=None,
+            help="Processes used to hash passwords (default: one per CPU).",
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help="Users inserted per query.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate the file without creating anything.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as file:
+                rows = read_student_rows(file)
+        except OSError as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+        except StudentImportError as e:
+            return self.fail(e)
+
+        if options['dry_run']:
+            try:
+                students = validate_student_rows(rows)
+            except StudentImportError as e:
+                return self.fail(e)
+            self.stdout.write(self.style.SUCCESS(f"{len(students)} student(s) are valid. Nothing was imported (dry run)."))
+            return
+
+        path = options['credentials_out']
+        if not path and any(not row.get('password') for row in rows):
+            raise CommandError("Some rows have no password; pass --credentials-out to receive the generated ones.")
+        try:
+            # Created up front so a bad path fails before any account exists, and never
+            # overwrites the credentials of an earlier batch. Only the owner may read it.
+            if path:
+                credentials = os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'w', newline='')
+            else:
+                credentials = None
+        except OSError as e:
+            raise CommandError(f"Could not create {path}: {e}")
+
+        try:
+            # The passwords are written and flushed to disk before the accounts commit, so a
+            # full disk or a crash can't leave accounts whose generated passwords nobody has
+            with transaction.atomic():
+                created, generated, skipped = import_students(
+                    rows, activate=options['activate'],
+                    processes=options['processes'], batch_size=max(1, options['batch_size']),
+                )
+                if credentials:
+                    writer = csv.writer(credentials)
+                    writer.writerow(['College_ID', 'password'])
+                    writer.writerows(generated.items())
+                    credentials.flush()
+                    os.fsync(credentials.fileno())
+        except BaseException as e:
+            # Nothing was imported (one transaction), so don't leave a partial file blocking the rerun
+            if credentials:
+                credentials.close()
+                os.remove(path)
+            if isinstance(e, StudentImportError):
+                return self.fail(e)
+            raise
+
+        if credentials:
+            credentials.close()
+            self.stdout.write(f"Wrote {len(generated)} generated password(s) to {path}.")
+
+        state = "active" if options['activate'] else "awaiting approval"
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(created)} student(s) ({state}) in {time.perf_counter() - started:.1f} s; "
+            f"skipped {skipped} existing."
+        ))
+
+    def fail(self, error):
+        for message in error.errors:
+            self.stderr.write(message)
+        raise CommandError(f"Import failed with {len(error.errors)} error(s). No students were imported.")
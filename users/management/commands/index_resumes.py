@@ -0,0 +1,52 @@
+# users/management/commands/index_resumes.py
+"""
+Brings the resume search index up to date.
+
+New uploads are indexed by the task worker as they arrive, so this is for the
+initial backfill, for blobs whose task failed, and after EXTRACTOR_VERSION changes.
+Only blobs without current text are touched, so re-running is cheap.
+
+    python manage.py index_resumes            # queue the work for run_task_worker
+    python manage.py index_resumes --now      # do it here, in a pool of processes
+"""
+from django.core.management.base import BaseCommand
+
+from users.resume_search import index_blobs, pending_blobs
+from users.tasks import extract_resume_text
+
+
+class Command(BaseCommand):
+    help = "Extracts and indexes the text of resumes that are not in the search index yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--now', action='store_true',
+            help="Index in this process instead of queueing tasks for the worker.",
+        )
+        parser.add_argument(
+            '--processes', type=int,
+            help="Extraction processes to use with --now (default: settings.RESUME_TEXT_EXTRACTION_PROCESSES).",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help="Blobs read and parsed per batch with --now.",
+        )
+
+    def handle(self, *args, **options):
+        digests = list(pending_blobs().values_list('digest', flat=True))
+        if not digests:
+            self.stdout.write(self.style.SUCCESS("The resume index is up to date."))
+            return
+
+        if not options['now']:
+            for digest in digests:
+                extract_resume_text.enqueue(digest=digest)
+            self.stdout.write(self.style.SUCCESS(f"Queued {len(digests)} resume(s) for indexing."))
+            return
+
+        done = 0
+        batch_size = max(1, options['batch_size'])
+        for start in range(0, len(digests), batch_size):
+            done += index_blobs(digests[start:start + batch_size], processes=options['processes'])
+            self.stdout.write(f"... {done}/{len(digests)} indexed")
+        self.stdout.write(self.style.SUCCESS(f"Indexed {done} resume(s)."))
@@ -0,0 +1,34 @@
+# users/management/commands/reconcile_application_stats.py
+"""
+Rebuilds the per-job, per-status application counters from the applications table.
+
+The counters are kept current as applications change, so this only has work to do
+after applications were written around the ORM signals (raw SQL, queryset.update()
+in a shell, restoring a backup). Safe to run on a schedule, e.g. weekly from cron:
+    0 3 * * 0 /path/to/venv/bin/python manage.py reconcile_application_stats
+"""
+from django.core.management.base import BaseCommand
+
+from users.pipeline_stats import reconcile_application_stats
+
+
+class Command(BaseCommand):
+    help = "Recounts applications per job and status and repairs any counter that has drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only report the counters that are wrong.",
+        )
+
+    def handle(self, *args, **options):
+        drift = reconcile_application_stats(dry_run=options['dry_run'])
+        for job_id, status, stored, actual in drift:
+            self.stdout.write(f"Job {job_id} / {status}: stored {stored}, actual {actual}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("All application counters are correct."))
+        elif options['dry_run']:
+            self.stdout.write(f"{len(drift)} counter(s) would be repaired.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drift)} counter(s)."))
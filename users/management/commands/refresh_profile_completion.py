@@ -0,0 +1,25 @@
+# users/management/commands/refresh_profile_completion.py
+"""
+Recomputes Profile.profile_completion for every student in bulk.
+
+Scores are kept current as profiles, education entries and resumes change (see
+users/profile_completion.py). This is for the initial backfill, for profiles created
+or edited in ways that skip signals (bulk_create, queryset.update), and after the
+weights change. Only profiles whose stored score is wrong are written.
+
+    python manage.py refresh_profile_completion
+"""
+from django.core.management.base import BaseCommand
+
+from users.profile_completion import refresh_all_profile_completion
+
+
+class Command(BaseCommand):
+    help = "Recomputes the stored profile completion score of every profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Profiles updated per query.")
+
+    def handle(self, *args, **options):
+        changed = refresh_all_profile_completion(batch_size=max(1, options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(f"Updated the completion score of {changed} profile(s)."))
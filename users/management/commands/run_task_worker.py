@@ -0,0 +1,70 @@
+# users/management/commands/run_task_worker.py
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from users.task_queue import claim_tasks, execute_tasks
+
+
+class Command(BaseCommand):
+    help = "Processes queued background tasks (see users/task_queue.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help="Number of worker threads in this process (default: 1).",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help="Seconds to wait before checking again when the queue is empty (default: 2).",
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help="Exit once there are no more due tasks instead of waiting for new ones.",
+        )
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        self.processed = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+
+        threads = [
+            threading.Thread(target=self.work, args=(options['poll_interval'], options['burst']), daemon=True)
+            for _ in range(max(1, options['concurrency']))
+        ]
+        self.stdout.write(f"Starting {len(threads)} task worker thread(s)...")
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the current tasks finish...")
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {self.processed} task(s), {self.failed} failed."
+        ))
+
+    def work(self, poll_interval, burst):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                tasks = claim_tasks()
+                if not tasks:
+                    if burst:
+                        return
+                    self.stop.wait(poll_interval)
+                    continue
+                ok = execute_tasks(tasks)
+                with self.lock:
+                    self.processed += len(tasks)
+                    if not ok:
+                        self.failed += len(tasks)
+        finally:
+            connection.close()
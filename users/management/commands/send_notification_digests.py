@@ -0,0 +1,49 @@
+# users/management/commands/send_notification_digests.py
+"""
+Emails each student one digest of their unread notifications for the period.
+
+Meant to be run on a schedule matching the period, e.g. daily from cron:
+    0 8 * * * /path/to/venv/bin/python manage.py send_notification_digests --period-days 1
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.digests import send_digests
+
+
+class Command(BaseCommand):
+    help = "Sends one email per student summarising their unread notifications, over a single mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period-days', type=int,
+            help="Include notifications from the last N days (default: settings.NOTIFICATION_DIGEST['period_days']).",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            help="Students loaded and emailed per chunk.",
+        )
+        parser.add_argument(
+            '--max-per-second', type=float,
+            help="Limit the sending rate for the mail server.",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Build the digests and report how many would be sent, without sending.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        stats = send_digests(
+            period_days=options['period_days'],
+            chunk_size=options['chunk_size'],
+            max_per_second=options['max_per_second'],
+            dry_run=options['dry_run'],
+            stdout=self.stdout,
+        )
+        verb = "would be sent" if options['dry_run'] else "sent"
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['sent']} digest(s) {verb} to {stats['students']} student(s) scanned "
+            f"in {time.monotonic() - started:.1f}s."
+        ))
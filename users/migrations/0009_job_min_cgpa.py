@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:11
+
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+# A frozen copy of users.models.parse_cgpa_requirement as it was when this migration
+# was written, so later changes to the model module can't change what it does.
+CGPA_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+
+def parse_cgpa_requirement(text):
+    if not text:
+        return None
+    match = CGPA_PATTERN.search(text)
+    if not match:
+        return None
+    try:
+        value = Decimal(match.group())
+    except InvalidOperation:
+        return None
+    if value <= 0 or value > 10:
+        return None
+    return value.quantize(Decimal('0.01'))
+
+
+def backfill_min_cgpa(apps, schema_editor):
+    Job = apps.get_model('users', 'Job')
+    jobs = list(Job.objects.only('id', 'cgpa_requirement'))
+    for job in jobs:
+        job.min_cgpa = parse_cgpa_requirement(job.cgpa_requirement)
+    Job.objects.bulk_update(jobs, ['min_cgpa'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_educationdetail_delete_education'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='min_cgpa',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=4, null=True),
+        ),
+        migrations.RunPython(backfill_min_cgpa, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:12
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    # Existing jobs have never been edited as far as we know, so start them at their creation time
+    Job = apps.get_model('users', 'Job')
+    Job.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_job_min_cgpa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_job_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='is_archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_archived', '-created_at'], name='job_archived_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_archived', 'deadline'], name='job_archived_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_background_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailDigestState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='email_digest_state', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_sent_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_email_digest_state'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentapplication',
+            index=models.Index(fields=['student', '-applied_date'], name='app_student_applied_idx'),
+        ),
+    ]
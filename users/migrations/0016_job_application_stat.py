@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_stats(apps, schema_editor):
+    StudentApplication = apps.get_model('users', 'StudentApplication')
+    JobApplicationStat = apps.get_model('users', 'JobApplicationStat')
+    rows = StudentApplication.objects.values('job_id', 'status').annotate(total=Count('id')).order_by()
+    JobApplicationStat.objects.bulk_create(
+        [JobApplicationStat(job_id=row['job_id'], status=row['status'], count=row['total']) for row in rows],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0015_studentapplication_student_applied_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobApplicationStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('Applied', 'Applied'), ('Under Review', 'Under Review'), ('Rejected', 'Rejected'), ('Accepted', 'Accepted')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='application_stats', to='users.job')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('job', 'status'), name='unique_job_status_stat')],
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:26
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_applications(apps, schema_editor):
+    """Keeps the earliest application for each (student, job) pair so the constraint can be added."""
+    StudentApplication = apps.get_model('users', 'StudentApplication')
+    JobApplicationStat = apps.get_model('users', 'JobApplicationStat')
+    duplicates = (
+        StudentApplication.objects.values('student_id', 'job_id')
+        .annotate(total=Count('id'), first_id=Min('id')).filter(total__gt=1).order_by()
+    )
+    affected_jobs = set()
+    for row in duplicates:
+        StudentApplication.objects.filter(
+            student_id=row['student_id'], job_id=row['job_id'],
+        ).exclude(id=row['first_id']).delete()
+        affected_jobs.add(row['job_id'])
+    if not affected_jobs:
+        return
+    # Recount the pipeline counters of the jobs that lost rows
+    JobApplicationStat.objects.filter(job_id__in=affected_jobs).delete()
+    rows = (
+        StudentApplication.objects.filter(job_id__in=affected_jobs)
+        .values('job_id', 'status').annotate(total=Count('id')).order_by()
+    )
+    JobApplicationStat.objects.bulk_create(
+        [JobApplicationStat(job_id=row['job_id'], status=row['status'], count=row['total']) for row in rows]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0016_job_application_stat'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_applications, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='studentapplication',
+            constraint=models.UniqueConstraint(fields=('student', 'job'), name='unique_student_job_application'),
+        ),
+    ]
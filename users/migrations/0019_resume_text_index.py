@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0018_resume_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeText',
+            fields=[
+                ('blob', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='text', serialize=False, to='users.resumeblob')),
+                ('text', models.TextField(blank=True)),
+                ('term_count', models.PositiveIntegerField(default=0)),
+                ('extractor_version', models.PositiveSmallIntegerField(default=0)),
+                ('extracted_at', models.DateTimeField(auto_now=True)),
+                ('error', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResumeTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('count', models.PositiveIntegerField()),
+                ('blob', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='users.resumeblob')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('term', 'blob'), name='unique_resume_term_blob')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:36
+
+import math
+
+from django.db import migrations, models
+
+
+def fill_term_weights(apps, schema_editor):
+    """Computes ResumeTerm.weight for resumes indexed before it existed, one blob at a time."""
+    ResumeTerm = apps.get_model('users', 'ResumeTerm')
+    digests = ResumeTerm.objects.values_list('blob_id', flat=True).distinct().order_by()
+    for digest in list(digests):
+        terms = list(ResumeTerm.objects.filter(blob_id=digest))
+        norm = math.sqrt(sum((1 + math.log(t.count)) ** 2 for t in terms)) or 1
+        for t in terms:
+            t.weight = (1 + math.log(t.count)) / norm
+        ResumeTerm.objects.bulk_update(terms, ['weight'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0019_resume_text_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumeterm',
+            name='weight',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studentapplication',
+            name='relevance_score',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentapplication',
+            name='relevance_version',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='studentapplication',
+            index=models.Index(fields=['job', '-relevance_score'], name='app_job_relevance_idx'),
+        ),
+        migrations.RunPython(fill_term_weights, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0021_username_lower_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['profile_completion'], name='profile_completion_idx'),
+        ),
+    ]
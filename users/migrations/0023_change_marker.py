@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0022_profile_completion_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeMarker',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('generation', models.PositiveBigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
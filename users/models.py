@@ -1,10 +1,37 @@
 # users/models.py
 
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
+from decimal import Decimal, InvalidOperation
 import os
+import re
+
+from .change_tracking import save_changed_fields
+
+class CustomUserManager(UserManager):
+    def username_matches(self, username):
+        # LOWER(username) = LOWER(%s), which the username_lower_idx index answers
+        return self.filter(Exact(Lower(self.model.USERNAME_FIELD), Lower(Value(username))))
+
+    def get_by_natural_key(self, username):
+        """
+        Case-insensitive: "Alice" signs in as "alice", in one indexed query.
+        Used by login_view and Django's authenticate() (admin login included).
+        """
+        matches = list(self.username_matches(username)[:2])
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            # Accounts created before this that differ only in case: the exact spelling wins
+            return self.get(**{self.model.USERNAME_FIELD: username})
+        raise self.model.DoesNotExist
+
 
 # --- Your Existing CustomUser Model (Unchanged) ---
 class CustomUser(AbstractUser):
@@ -14,13 +41,21 @@ class CustomUser(AbstractUser):
 
     role = models.CharField(max_length=50, choices=Role.choices, default=Role.STUDENT)
 
+    objects = CustomUserManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(Lower('username'), name='username_lower_idx'),
+        ]
+
 # --- NEW MODELS FOR THE DASHBOARD ---
 
 # 1. Profile Model
 # This will store extra information about a student, like their profile completion.
 class Profile(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='profile')
-    profile_completion = models.IntegerField(default=20) # Start at 20% for a new account
+    # Start at 20% for a new account; kept up to date by users/profile_completion.py
+    profile_completion = models.IntegerField(default=20)
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     fathers_name = models.CharField(max_length=100, blank=True, null=True)
     date_of_birth = models.DateField(blank=True, null=True)
@@ -33,6 +68,12 @@ class Profile(models.Model):
     github_url = models.URLField(blank=True, null=True)
     portfolio_url = models.URLField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # For the admin's completion filter and ordering
+            models.Index(fields=['profile_completion'], name='profile_completion_idx'),
+        ]
+
     def __str__(self):
         return f'{self.user.username} Profile'
 
@@ -44,8 +85,38 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=CustomUser)
 def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
+    # Only a profile that was loaded along with this user can hold unsaved edits, and
+    # only the edited columns are written. A plain user save (e.g. last_login on every
+    # login) no longer fetches and rewrites the profile.
+    if CustomUser.profile.is_cached(instance):
+        save_changed_fields(instance.profile)
+
+# Pulls the first number out of free-text requirements like "7.5 CGPA" or "Min. 6.0/10"
+CGPA_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+def parse_cgpa_requirement(text):
+    """
+    Turns a Job's free-text cgpa_requirement into a numeric threshold on the 10-point scale.
+    Returns None when no usable number is found (e.g. "Not specified"), meaning everyone is eligible.
+    """
+    if not text:
+        return None
+    match = CGPA_PATTERN.search(text)
+    if not match:
+        return None
+    try:
+        value = Decimal(match.group())
+    except InvalidOperation:
+        return None
+    if value <= 0 or value > 10:
+        return None
+    return value.quantize(Decimal('0.01'))
+
+# Jobs still open for applications. Expired jobs are archived by the archive_expired_jobs
+# command, so listing pages only ever scan this "hot" set.
+class ActiveJobManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(is_archived=False)
 
 # 2. Job Model
 # This will be created by the Admin in the Django Admin Panel.
@@ -73,6 +144,8 @@ class Job(models.Model):
     # Sidebar Info
     recommendation = models.TextField(blank=True, null=True, help_text="A short recommendation or highlight for the job.")
     cgpa_requirement = models.CharField(max_length=50, blank=True, null=True, default="Not specified")
+    # Numeric version of cgpa_requirement, kept in sync on save so eligibility can be filtered in SQL
+    min_cgpa = models.DecimalField(max_digits=4, decimal_places=2, blank=True, null=True, editable=False, db_index=True)
     
     # Salary & Dates
     salary_min = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
@@ -83,10 +156,30 @@ class Job(models.Model):
     deadline = models.DateField(blank=True, null=True) # This is the Application Deadline
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Archival - set by the archive_expired_jobs management command once the deadline has passed
+    is_archived = models.BooleanField(default=False)
+    archived_at = models.DateTimeField(blank=True, null=True)
+
+    objects = models.Manager()  # Every job, including archived ones (detail pages, admin)
+    active = ActiveJobManager()  # Only jobs still accepting applications (listings, API)
+
+    class Meta:
+        indexes = [
+            # Serves the default job list: active jobs, newest first
+            models.Index(fields=['is_archived', '-created_at'], name='job_archived_created_idx'),
+            # Lets the archive command find expired jobs without a full scan
+            models.Index(fields=['is_archived', 'deadline'], name='job_archived_deadline_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title} at {self.company}'
 
+    def save(self, *args, **kwargs):
+        self.min_cgpa = parse_cgpa_requirement(self.cgpa_requirement)
+        super().save(*args, **kwargs)
+
     # A helper method to get skills as a list
     def get_skills_as_list(self):
         if self.required_skills:
@@ -111,15 +204,95 @@ class StudentApplication(models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE)
     applied_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Applied')
+    # How well the resume and profile match the job (0-1), cached by users/relevance.py.
+    # relevance_version says which job and resume versions the score was computed from.
+    relevance_score = models.FloatField(null=True, blank=True, editable=False)
+    relevance_version = models.CharField(max_length=100, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Serves "my applications, newest first"
+            models.Index(fields=['student', '-applied_date'], name='app_student_applied_idx'),
+            # Serves "this job's applicants, best match first"
+            models.Index(fields=['job', '-relevance_score'], name='app_job_relevance_idx'),
+        ]
+        constraints = [
+            # One application per student per job, enforced by the database so racing requests can't both insert
+            models.UniqueConstraint(fields=['student', 'job'], name='unique_student_job_application'),
+        ]
 
     def __str__(self):
         return f'{self.student.username} applied for {self.job.title}'
 
+# Materialized per-job, per-status application counts behind the admin pipeline overview.
+# Kept in step with StudentApplication by users/pipeline_stats.py; reconcile_application_stats repairs drift.
+class JobApplicationStat(models.Model):
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='application_stats')
+    status = models.CharField(max_length=20, choices=StudentApplication.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'status'], name='unique_job_status_stat'),
+        ]
+
+    def __str__(self):
+        return f'{self.job}: {self.count} {self.status}'
+
+# One stored copy of a resume file, named after the SHA-256 of its contents, shared
+# by every Resume row with identical contents. ref_count is the number of those rows;
+# the file is deleted when it drops to zero. See users/resume_storage.py.
+class ResumeBlob(models.Model):
+    digest = models.CharField(max_length=64, primary_key=True)
+    file = models.FileField(upload_to='resumes/blobs/')
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.digest[:12]} ({self.ref_count} reference(s))'
+
+# Text extracted from a resume blob by the background indexer (users/resume_search.py).
+# Blobs never change, so each one is extracted once (again only if EXTRACTOR_VERSION goes up).
+class ResumeText(models.Model):
+    blob = models.OneToOneField(ResumeBlob, on_delete=models.CASCADE, primary_key=True, related_name='text')
+    text = models.TextField(blank=True)
+    # Number of indexed terms, for length normalisation when ranking
+    term_count = models.PositiveIntegerField(default=0)
+    extractor_version = models.PositiveSmallIntegerField(default=0)
+    extracted_at = models.DateTimeField(auto_now=True)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'Text of {self.blob_id[:12]}'
+
+# Inverted index over ResumeText: how often each normalised term occurs in each blob.
+class ResumeTerm(models.Model):
+    term = models.CharField(max_length=64)
+    blob = models.ForeignKey(ResumeBlob, on_delete=models.CASCADE, related_name='terms')
+    count = models.PositiveIntegerField()
+    # (1 + ln count), divided by the length of the blob's whole vector of those values:
+    # the blob's unit term vector, precomputed once per blob for relevance ranking (users/relevance.py)
+    weight = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also the lookup index: every search starts from WHERE term IN (...)
+            models.UniqueConstraint(fields=['term', 'blob'], name='unique_resume_term_blob'),
+        ]
+
+    def __str__(self):
+        return f'{self.term} x{self.count} in {self.blob_id[:12]}'
+
 # 4. Resume Model
 # To store student resumes.
 class Resume(models.Model):
     student = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    # Points at the shared blob's file; resumes uploaded before deduplication have no blob
+    # until `manage.py dedupe_resumes` has run
     file = models.FileField(upload_to='resumes/')
+    blob = models.ForeignKey(ResumeBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='resumes')
+    original_name = models.CharField(max_length=255, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -128,7 +301,8 @@ class Resume(models.Model):
     # ADD THIS HELPER METHOD
     @property
     def filename(self):
-        return os.path.basename(self.file.name)
+        # Blob files are named by digest, so show the name the student uploaded
+        return self.original_name or os.path.basename(self.file.name)
     
 class Notification(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
@@ -137,8 +311,34 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Serves "this user's unread notifications, newest first"
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_unread_idx'),
+        ]
+
     def __str__(self):
         return f'Notification for {self.user.username}: {self.message[:30]}'
+
+
+# One row per announcement (e.g. a new job), shared by every student instead of copied to each of them.
+# Students see the broadcasts created since they joined; NotificationReadState says which ones they've read.
+class BroadcastNotification(models.Model):
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, null=True, blank=True, related_name='broadcasts')
+    message = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f'Broadcast: {self.message[:30]}'
+
+
+# Per-user read watermark for broadcasts: everything created at or before broadcasts_read_at counts as read.
+class NotificationReadState(models.Model):
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='notification_read_state')
+    broadcasts_read_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.user.username} read broadcasts up to {self.broadcasts_read_at}'
     
 
 class EducationDetail(models.Model):
@@ -152,4 +352,94 @@ class EducationDetail(models.Model):
     cgpa = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
 
     def __str__(self):
-        return f"{self.degree} from {self.institution}"
\ No newline at end of file
+        return f"{self.degree} from {self.institution}"
+
+
+# When each user was last sent an email digest of their unread notifications (see users/digests.py)
+class EmailDigestState(models.Model):
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='email_digest_state')
+    last_sent_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.user.username} digest last sent {self.last_sent_at}'
+
+
+# Named counters for changes that leave no row behind to compare against, such as a
+# deleted job. Shared by every process through the database, unlike the local cache.
+class ChangeMarker(models.Model):
+    # Bumped whenever any job is saved or deleted (users/api.py)
+    JOB_LIST = 'job-list'
+    # Bumped whenever jobs are announced, which retires every cached unread count (users/notifications.py)
+    BROADCASTS = 'broadcasts'
+    # Bumped whenever resumes are indexed, which shifts the IDF of every job vector (users/relevance.py)
+    RESUME_INDEX = 'resume-index'
+    # There is also a 'notifications-<user id>' marker per user, bumped whenever that user's
+    # personal notifications change (users/notifications.py)
+
+    name = models.CharField(max_length=50, primary_key=True)
+    generation = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.name} #{self.generation}'
+
+    @classmethod
+    def bump(cls, name):
+        """Records a change: one UPDATE, or an INSERT the first time."""
+        changes = {'generation': models.F('generation') + 1, 'changed_at': timezone.now()}
+        if not cls.objects.filter(name=name).update(**changes):
+            _, created = cls.objects.get_or_create(name=name, defaults={'generation': 1})
+            if not created:
+                # Someone else created it in the meantime
+                cls.objects.filter(name=name).update(**changes)
+
+    @classmethod
+    def bump_many(cls, names):
+        """bump() for several markers at once: one INSERT for any that are new, then one UPDATE."""
+        names = list(names)
+        if not names:
+            return
+        cls.objects.bulk_create([cls(name=name) for name in names], ignore_conflicts=True)
+        cls.objects.filter(name__in=names).update(
+            generation=models.F('generation') + 1, changed_at=timezone.now(),
+        )
+
+    @classmethod
+    def read(cls, name):
+        """Returns (generation, changed_at); (0, None) if it has never been bumped."""
+        row = cls.objects.filter(name=name).values_list('generation', 'changed_at').first()
+        return row or (0, None)
+
+
+# Queue of deferred work (notification fan-out, file clean-up, ...), processed by
+# `python manage.py run_task_worker`. See users/task_queue.py.
+class BackgroundTask(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    name = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)  # Earliest time the task may run
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+
+    # Set while a worker holds the task, so crashed workers' tasks can be picked up again
+    claim_token = models.CharField(max_length=32, blank=True, db_index=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Serves the worker's "next due tasks" query
+            models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
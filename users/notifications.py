@@ -0,0 +1,197 @@
+# users/notifications.py
+"""
+Helpers for telling students about new job openings.
+
+New jobs are announced with one BroadcastNotification row per job instead of one
+Notification row per student per job (fan-out on read). A student's inbox is built
+at read time by merging the broadcasts created since they joined with their personal
+Notification rows. Read state for broadcasts is a single per-user watermark
+(NotificationReadState), so marking everything as read is one row write.
+
+Each user's unread count is cached. The cache key includes two ChangeMarker
+generations: the broadcasts marker, and a per-user marker bumped whenever that user's
+personal notifications change. They are kept in the database because notifications
+are created by the task worker and by other web processes, whose LocMemCache this
+process can't reach. So the nav badge on every page costs one indexed lookup of the
+two markers plus a cache lookup.
+"""
+import heapq
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import BroadcastNotification, ChangeMarker, CustomUser, Notification, NotificationReadState
+from .realtime import hub, notification_event
+
+logger = logging.getLogger(__name__)
+
+
+def job_notification_message(job):
+    """The text shown in a student's notification list for a new job."""
+    deadline = job.deadline.strftime('%b %d, %Y') if job.deadline else 'Not specified'
+    message = (
+        f"New Opening: {job.title} at {job.company}. "
+        f"Salary: {job.currency} {job.salary_min}-{job.salary_max}. "
+        f"Apply by: {deadline}."
+    )
+    # BroadcastNotification.message is a CharField(max_length=255)
+    return message[:255]
+
+
+def notify_students_of_jobs(jobs):
+    """
+    Announces each job in `jobs` to all students with a single broadcast row per job.
+    Returns the created broadcasts.
+    """
+    broadcasts = [
+        BroadcastNotification(job=job, message=job_notification_message(job))
+        for job in jobs
+    ]
+    created = BroadcastNotification.objects.bulk_create(broadcasts)
+    if created:
+        # Every student's unread count just changed; moving to a new generation retires all cached counts at once
+        bump_broadcast_generation()
+        transaction.on_commit(lambda: publish_notifications(created))
+        logger.info("Announced %d job(s) to students.", len(created))
+    return created
+
+
+def publish_notifications(notifications, user_id=None):
+    """Pushes notifications to connected browsers (see realtime.py). user_id None means all students."""
+    for notification in notifications:
+        hub.publish(notification_event(notification, user_id=user_id))
+
+
+def notify_users(notifications):
+    """
+    Inserts personal Notification rows in batches (bulk_create skips the post_save signal),
+    then does what that signal would have done: refresh the users' cached unread counts
+    and push the notifications to their open browser tabs.
+    """
+    created = Notification.objects.bulk_create(notifications, batch_size=500)
+    forget_unread_counts({n.user_id for n in created})
+
+    def publish():
+        for notification in created:
+            publish_notifications([notification], user_id=notification.user_id)
+    transaction.on_commit(publish)
+    return created
+
+
+# --- Reading ---
+
+def get_broadcasts_read_at(user):
+    """The user's broadcast watermark. Students who have never read anything start at their join date."""
+    state = NotificationReadState.objects.filter(user=user).values_list('broadcasts_read_at', flat=True).first()
+    return state or user.date_joined
+
+
+def unread_broadcasts_for(user):
+    """Broadcasts the user has not read yet. Only students receive broadcasts."""
+    if user.role != CustomUser.Role.STUDENT:
+        return BroadcastNotification.objects.none()
+    return BroadcastNotification.objects.filter(created_at__gt=get_broadcasts_read_at(user))
+
+
+def unread_notifications_for(user):
+    """
+    Returns the user's unread personal notifications and broadcasts merged into
+    one list, newest first. Both querysets come back already sorted from their indexes,
+    so they only need merging, not re-sorting.
+    """
+    personal = Notification.objects.filter(user=user, is_read=False).select_related('job').order_by('-created_at')
+    broadcasts = unread_broadcasts_for(user).select_related('job').order_by('-created_at')
+    return list(heapq.merge(personal, broadcasts, key=lambda n: n.created_at, reverse=True))
+
+
+def notifications_since(user, since):
+    """
+    Personal notifications and broadcasts created after `since`, oldest first.
+    Used to replay what a live-notification client missed while it was disconnected.
+    """
+    personal = Notification.objects.filter(user=user, created_at__gt=since).order_by('created_at')
+    broadcasts = BroadcastNotification.objects.none()
+    if user.role == CustomUser.Role.STUDENT:
+        broadcasts = BroadcastNotification.objects.filter(
+            created_at__gt=max(since, user.date_joined),
+        ).order_by('created_at')
+    events = [notification_event(n, user_id=user.pk) for n in personal]
+    events += [notification_event(b) for b in broadcasts]
+    return sorted(events, key=lambda event: event['id'])
+
+
+def mark_broadcasts_read(user, until):
+    """
+    Marks the broadcasts created up to `until` as read by moving the user's watermark there.
+    `until` should be the newest broadcast the user was actually shown, not the current time:
+    a broadcast created after the page was rendered must stay unread. The watermark never
+    moves back, e.g. when an old page is submitted again.
+    """
+    moved = NotificationReadState.objects.filter(user=user, broadcasts_read_at__lt=until).update(
+        broadcasts_read_at=until,
+    )
+    if not moved:
+        NotificationReadState.objects.get_or_create(user=user, defaults={'broadcasts_read_at': until})
+    forget_unread_count(user.pk)
+
+
+def mark_all_read(user, broadcasts_until=None):
+    """
+    Marks every personal notification as read, and the broadcasts up to `broadcasts_until`
+    (the newest one shown to the user; None if none were shown).
+    Returns the number of personal rows updated.
+    """
+    updated = Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+    if broadcasts_until is not None:
+        mark_broadcasts_read(user, until=broadcasts_until)
+    else:
+        forget_unread_count(user.pk)
+    return updated
+
+
+# --- Cached unread counts ---
+
+def bump_broadcast_generation():
+    ChangeMarker.bump(ChangeMarker.BROADCASTS)
+
+
+def personal_notifications_marker(user_id):
+    return f'notifications-{user_id}'
+
+
+def unread_count_key(user_id):
+    personal = personal_notifications_marker(user_id)
+    generations = dict(
+        ChangeMarker.objects.filter(name__in=[ChangeMarker.BROADCASTS, personal]).values_list('name', 'generation')
+    )
+    return (
+        f'notifications:unread:{user_id}:'
+        f'{generations.get(ChangeMarker.BROADCASTS, 0)}:{generations.get(personal, 0)}'
+    )
+
+
+def get_unread_count(user):
+    """Unread personal notifications plus unread broadcasts, served from the cache when possible."""
+    key = unread_count_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = (
+            Notification.objects.filter(user=user, is_read=False).count()
+            + unread_broadcasts_for(user).count()
+        )
+        cache.set(key, count, settings.UNREAD_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def forget_unread_count(user_id):
+    """
+    Retires the user's cached count in every process, for when their personal notifications
+    are created, read or deleted. The count is recomputed on the next page view.
+    """
+    ChangeMarker.bump(personal_notifications_marker(user_id))
+
+
+def forget_unread_counts(user_ids):
+    ChangeMarker.bump_many([personal_notifications_marker(user_id) for user_id in user_ids])
@@ -0,0 +1,53 @@
+# users/paginators.py
+from django.core.paginator import Paginator
+from django.db import connections, router
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+# Below this many rows an exact COUNT(*) is cheap enough to always run
+EXACT_COUNT_THRESHOLD = 10_000
+
+
+def estimate_row_count(model, using=None):
+    """
+    A fast approximate row count for a whole table, or None if the database can't provide one.
+    PostgreSQL and MySQL keep statistics for this. Elsewhere (SQLite) the largest primary key
+    is read from the end of the pk index, which is close as long as few rows were deleted.
+    `using` is the database alias, by default the one the routers pick for reading `model`.
+    """
+    using = using or router.db_for_read(model)
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s", [table],
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
+    if model._meta.pk.get_internal_type() in ('AutoField', 'BigAutoField', 'SmallAutoField'):
+        return model._base_manager.db_manager(using).aggregate(max_pk=Max('pk'))['max_pk'] or 0
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for admin change lists on very large tables.
+    An unfiltered list uses estimate_row_count() instead of COUNT(*) once the table is big.
+    Filtered lists still get an exact count, because the filters narrow the scan.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimate_row_count(queryset.model, using=queryset.db)
+            if estimate is not None and estimate > EXACT_COUNT_THRESHOLD:
+                return estimate
+        return super().count
@@ -0,0 +1,83 @@
+# users/pdf_text.py
+"""
+Text extraction from PDF resumes, used by the resume indexer (resume_search.py).
+
+This module deliberately imports nothing from Django, because it runs in the
+indexer's worker processes, which only receive file contents and return text.
+
+pypdf is used when it is installed. Otherwise a small built-in reader decodes the
+content streams and collects the text-showing operators (Tj, TJ, ', "). That covers
+the simply-encoded PDFs most resume builders produce, but not text drawn with
+custom-encoded fonts.
+"""
+import io
+import re
+import zlib
+
+# Text kept per resume (about 30 pages); anything beyond it is not indexed
+MAX_TEXT_LENGTH = 200_000
+
+_STREAM_PATTERN = re.compile(rb'stream\r?\n(.*?)\r?\nendstream', re.S)
+_TEXT_OPERATOR_PATTERN = re.compile(
+    rb'\((?P<string>(?:\\.|[^\\)])*)\)\s*(?:Tj|\'|")'   # (text) Tj
+    rb'|\[(?P<array>(?:\\.|[^\]\\])*)\]\s*TJ'           # [(te) -20 (xt)] TJ
+    rb'|(?P<break>T\*|Td|TD|ET)',                      # line moves
+    re.S,
+)
+_ARRAY_ITEM_PATTERN = re.compile(rb'\((?P<string>(?:\\.|[^\\)])*)\)|(?P<number>-?\d+(?:\.\d+)?)')
+_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f', b'(': b'(', b')': b')', b'\\': b'\\'}
+
+
+def _unescape_pdf_string(raw):
+    def replace(match):
+        escaped = match.group(1)
+        if escaped[:1].isdigit():
+            return bytes([int(escaped, 8) & 0xFF])
+        return _ESCAPES.get(escaped, escaped)
+    return re.sub(rb'\\([0-7]{1,3}|.)', replace, raw, flags=re.S).decode('latin-1')
+
+
+def _extract_with_builtin_reader(data):
+    parts = []
+    for match in _STREAM_PATTERN.finditer(data):
+        stream = match.group(1)
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            pass  # uncompressed, or a filter we can't decode (images, fonts)
+        if b'BT' not in stream:
+            continue
+        for op in _TEXT_OPERATOR_PATTERN.finditer(stream):
+            if op.group('string') is not None:
+                parts.append(_unescape_pdf_string(op.group('string')))
+            elif op.group('array') is not None:
+                for item in _ARRAY_ITEM_PATTERN.finditer(op.group('array')):
+                    if item.group('string') is not None:
+                        parts.append(_unescape_pdf_string(item.group('string')))
+                    elif float(item.group('number')) < -200:
+                        # A large negative kern between words is how many PDFs draw a space
+                        parts.append(' ')
+            else:
+                parts.append('\n')
+    return ''.join(parts)
+
+
+def extract_pdf_text(data):
+    """Returns the text of a PDF given its bytes. Runs in the worker processes, so it only uses its argument."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        text = _extract_with_builtin_reader(data)
+    else:
+        reader = PdfReader(io.BytesIO(data))
+        text = '\n'.join(page.extract_text() or '' for page in reader.pages)
+    return text[:MAX_TEXT_LENGTH]
+
+
+def extract_text_safely(job):
+    """(digest, bytes) -> (digest, text, error). Never raises, so one broken PDF can't sink a batch."""
+    digest, data = job
+    try:
+        return digest, extract_pdf_text(data), ''
+    except Exception as e:
+        return digest, '', f'{type(e).__name__}: {e}'
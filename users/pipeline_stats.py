@@ -0,0 +1,90 @@
+# users/pipeline_stats.py
+"""
+Per-job, per-status application counters (JobApplicationStat).
+
+The admin pipeline overview reads these rows instead of running a GROUP BY over
+every application. They are adjusted in the same transaction as the change that
+moves an application in or out of a status:
+  - signals.py handles save() and delete() of single applications
+  - admin.set_application_status handles the bulk status actions
+
+Anything that writes applications some other way (raw SQL, queryset.update() in a
+shell) makes the counters drift; `manage.py reconcile_application_stats` rebuilds
+them from the applications table.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import JobApplicationStat, StudentApplication
+
+
+def adjust_application_counts(deltas):
+    """
+    Applies {(job_id, status): delta} to the counters. Rows that are about to go up are
+    created first if missing (insert-or-ignore), then each counter is moved with an
+    UPDATE ... SET count = count + delta, so concurrent adjustments never overwrite each other.
+    Decrements never create rows: while a job is being deleted its applications are
+    deleted too, and a recreated counter row would point at the vanished job.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        JobApplicationStat.objects.bulk_create(
+            [JobApplicationStat(job_id=job_id, status=status) for (job_id, status), delta in deltas.items() if delta > 0],
+            ignore_conflicts=True,
+        )
+        for (job_id, status), delta in deltas.items():
+            JobApplicationStat.objects.filter(job_id=job_id, status=status).update(count=F('count') + delta)
+
+
+def status_change_deltas(rows, new_status):
+    """Deltas for moving (job_id, old_status) rows to new_status."""
+    deltas = Counter()
+    for job_id, old_status in rows:
+        deltas[(job_id, old_status)] -= 1
+        deltas[(job_id, new_status)] += 1
+    return deltas
+
+
+def job_pipeline(jobs):
+    """
+    Returns [(job, counts, total)] for the given jobs, read from the counters with one
+    query. `counts` is a list of (status, count) pairs in STATUS_CHOICES order.
+    """
+    jobs = list(jobs)
+    statuses = [status for status, _ in StudentApplication.STATUS_CHOICES]
+    counts = {job.pk: dict.fromkeys(statuses, 0) for job in jobs}
+    for job_id, status, count in JobApplicationStat.objects.filter(job__in=jobs).values_list('job_id', 'status', 'count'):
+        counts[job_id][status] = count
+    return [(job, list(counts[job.pk].items()), sum(counts[job.pk].values())) for job in jobs]
+
+
+def reconcile_application_stats(dry_run=False):
+    """
+    Recounts applications per (job, status) and repairs every counter that disagrees.
+    Returns a list of (job_id, status, stored, actual) for the counters that had drifted.
+    """
+    with transaction.atomic():
+        actual = {
+            (row['job_id'], row['status']): row['total']
+            for row in StudentApplication.objects.values('job_id', 'status').annotate(total=Count('id')).order_by()
+        }
+        stored = {
+            (job_id, status): count
+            for job_id, status, count in JobApplicationStat.objects.select_for_update().values_list('job_id', 'status', 'count')
+        }
+        drift = [
+            (job_id, status, stored.get((job_id, status), 0), actual.get((job_id, status), 0))
+            for job_id, status in sorted(set(actual) | set(stored))
+            if stored.get((job_id, status), 0) != actual.get((job_id, status), 0)
+        ]
+        if drift and not dry_run:
+            JobApplicationStat.objects.bulk_create(
+                [JobApplicationStat(job_id=job_id, status=status, count=count) for job_id, status, _, count in drift],
+                update_conflicts=True, unique_fields=['job', 'status'], update_fields=['count'],
+                batch_size=500,
+            )
+    return drift
@@ -0,0 +1,102 @@
+# users/profile_completion.py
+"""
+The profile completion score (0-100) stored on Profile.profile_completion.
+
+  20  for having an account (what every new profile starts with)
+  50  spread over the profile's own fields (PROFILE_FIELD_WEIGHTS)
+  15  for at least one education entry
+  15  for at least one resume
+
+The score is kept up to date when something that affects it changes (see signals.py):
+a profile save that fills in or empties a weighted field, or an education entry or
+resume being added or removed. Each of those runs refresh_profile_completion(): a
+single UPDATE of that one profile, with the score computed in the database by
+completion_expression(), so nothing has to be loaded first. The dashboard just
+reads the column, and the admin filters on it through its index.
+
+`manage.py refresh_profile_completion` applies the same expression to every
+profile, e.g. after the weights change.
+"""
+from django.db.models import DEFERRED, Case, CharField, Exists, IntegerField, OuterRef, Q, Value, When
+
+from .models import EducationDetail, Profile, Resume
+
+BASE_SCORE = 20
+
+PROFILE_FIELD_WEIGHTS = {
+    'phone_number': 10,
+    'date_of_birth': 5,
+    'gender': 5,
+    'nationality': 5,
+    'address': 5,
+    'fathers_name': 5,
+    'linkedin_url': 5,
+    'github_url': 5,
+    'portfolio_url': 5,
+}
+
+EDUCATION_WEIGHT = 15
+RESUME_WEIGHT = 15
+
+
+def _filled(field_name):
+    condition = Q(**{f'{field_name}__isnull': False})
+    if isinstance(Profile._meta.get_field(field_name), CharField):
+        condition &= ~Q(**{field_name: ''})
+    return condition
+
+
+def completion_expression():
+    """The score of each Profile row, as a database expression for .update() or .annotate()."""
+    parts = [When(_filled(name), then=Value(weight)) for name, weight in PROFILE_FIELD_WEIGHTS.items()]
+    parts.append(When(Exists(EducationDetail.objects.filter(profile=OuterRef('pk'))), then=Value(EDUCATION_WEIGHT)))
+    # Profile's primary key is the user's id, which is what Resume.student points at
+    parts.append(When(Exists(Resume.objects.filter(student=OuterRef('pk'))), then=Value(RESUME_WEIGHT)))
+
+    score = Value(BASE_SCORE)
+    for part in parts:
+        score = score + Case(part, default=Value(0), output_field=IntegerField())
+    return score
+
+
+def _is_filled(value):
+    return value not in (None, '')
+
+
+def completion_may_change(profile, update_fields=None):
+    """
+    Whether saving `profile` can change its score: a weighted field went from empty to
+    filled or back. Editing a phone number that was already there can't. Compares
+    against the values change_tracking remembered when the profile was loaded.
+    """
+    if profile._state.adding:
+        # A new, empty profile already has the right (default) score
+        return any(_is_filled(getattr(profile, name)) for name in PROFILE_FIELD_WEIGHTS)
+    loaded = getattr(profile, '_loaded_values', {})
+    for name in PROFILE_FIELD_WEIGHTS:
+        if update_fields is not None and name not in update_fields:
+            continue
+        if name not in profile.__dict__:
+            continue  # deferred and untouched
+        before = loaded.get(name, DEFERRED)
+        if before is DEFERRED or _is_filled(before) != _is_filled(profile.__dict__[name]):
+            return True
+    return False
+
+
+def refresh_profile_completion(profile_id):
+    """Recomputes one profile's score in a single UPDATE. A missing profile is a no-op."""
+    return Profile.objects.filter(pk=profile_id).update(profile_completion=completion_expression())
+
+
+def refresh_all_profile_completion(batch_size=1000):
+    """Recomputes every stale score, in primary key batches. Returns the number of profiles changed."""
+    changed = 0
+    ids = list(Profile.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        changed += (
+            Profile.objects.filter(pk__in=ids[start:start + batch_size])
+            .exclude(profile_completion=completion_expression())
+            .update(profile_completion=completion_expression())
+        )
+    return changed
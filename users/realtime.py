@@ -0,0 +1,184 @@
+# users/realtime.py
+"""
+In-process publish/subscribe hub for live notifications, used by the Server-Sent
+Events endpoint (views.notification_stream_view). The endpoint is only used when
+settings.NOTIFICATION_STREAM_ENABLED is on, which requires running under ASGI.
+
+Each connected browser holds one small asyncio.Queue, so thousands of idle
+connections cost very little. publish() can be called from any thread (views,
+signals, the task worker). It hands the event to the event loop that owns each
+subscriber.
+
+Events are mostly published by the task worker, a different process from the ones
+holding the streams. So every process that has subscribers binds a Unix datagram
+socket in settings.NOTIFICATION_EVENTS_SOCKET_DIR (a temporary directory by default),
+and publish() also sends each event to all of those sockets. This is a stand-in for
+a real broker: good enough for a handful of processes on a single machine. A system
+check refuses to start with the stream enabled and the relay switched off.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import weakref
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core import checks
+
+logger = logging.getLogger(__name__)
+
+# Events waiting for a slow client beyond this are dropped (it can catch up via Last-Event-ID)
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def event_id_for(created_at):
+    """Event ids are creation times in microseconds, so a reconnecting client can resume from one."""
+    return (created_at - EPOCH) // timedelta(microseconds=1)
+
+
+def event_id_to_datetime(event_id):
+    return EPOCH + timedelta(microseconds=int(event_id))
+
+
+class Subscription:
+    def __init__(self, user_id, is_student, loop):
+        self.user_id = user_id
+        self.is_student = is_student
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def wants(self, event):
+        # Personal events go to one user; broadcasts (user_id None) go to every student
+        if event.get('user_id') is None:
+            return self.is_student
+        return event['user_id'] == self.user_id
+
+    def deliver(self, event):
+        """Runs on the subscriber's event loop."""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class NotificationHub:
+    def __init__(self, socket_dir=None):
+        self.socket_dir = socket_dir
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._relay_socket_path = None
+        # A forked child (e.g. a task worker) holds none of the parent's streams or sockets
+        hub = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: hub() and hub()._forget_after_fork())
+
+    def _forget_after_fork(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._relay_socket_path = None
+
+    # --- Subscribing (async side) ---
+
+    async def subscribe(self, user_id, is_student):
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(user_id, is_student, loop)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        if self.socket_dir and self._relay_socket_path is None:
+            await self._start_relay_listener(loop)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscriptions)
+
+    # --- Publishing (any thread) ---
+
+    def publish(self, event, relay=True):
+        """Delivers an event to matching local subscribers and, if configured, to the other processes."""
+        with self._lock:
+            targets = [s for s in self._subscriptions if s.wants(event)]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has closed; it will be unsubscribed when its stream ends
+                pass
+        if relay and self.socket_dir:
+            self._relay(event)
+
+    # --- Local socket relay between processes ---
+
+    def _relay(self, event):
+        payload = json.dumps(event).encode()
+        try:
+            names = os.listdir(self.socket_dir)
+        except FileNotFoundError:
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            for name in names:
+                path = os.path.join(self.socket_dir, name)
+                if not name.endswith('.sock') or path == self._relay_socket_path:
+                    continue
+                try:
+                    sock.sendto(payload, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # That process has gone away; clean up its socket file
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                except OSError as e:
+                    logger.warning("Could not relay notification event to %s: %s", path, e)
+
+    async def _start_relay_listener(self, loop):
+        os.makedirs(self.socket_dir, exist_ok=True)
+        path = os.path.join(self.socket_dir, f'{os.getpid()}.sock')
+        if os.path.exists(path):
+            os.unlink(path)
+        self._relay_socket_path = path
+        hub = self
+
+        class RelayProtocol(asyncio.DatagramProtocol):
+            def datagram_received(self, data, addr):
+                try:
+                    event = json.loads(data)
+                except ValueError:
+                    return
+                hub.publish(event, relay=False)
+
+        await loop.create_datagram_endpoint(RelayProtocol, local_addr=path, family=socket.AF_UNIX)
+
+
+hub = NotificationHub(socket_dir=getattr(settings, 'NOTIFICATION_EVENTS_SOCKET_DIR', None))
+
+
+@checks.register()
+def check_notification_relay(app_configs, **kwargs):
+    """Without the relay, events published by the task worker never reach any stream."""
+    if getattr(settings, 'NOTIFICATION_STREAM_ENABLED', False) and not hub.socket_dir:
+        return [checks.Error(
+            "NOTIFICATION_STREAM_ENABLED is on but NOTIFICATION_EVENTS_SOCKET_DIR is not set.",
+            hint="Set it to a local directory, so job announcements from the task worker reach open pages.",
+            id='users.E001',
+        )]
+    return []
+
+
+def notification_event(notification, user_id=None):
+    """Builds the event payload for a personal Notification or a BroadcastNotification."""
+    return {
+        'id': event_id_for(notification.created_at),
+        'user_id': user_id,
+        'message': notification.message,
+        'job_id': notification.job_id,
+        'created_at': notification.created_at.isoformat(),
+    }
@@ -0,0 +1,180 @@
+# users/relevance.py
+"""
+Ranks a job's applicants by how well their resume and profile match the job.
+
+Both sides are sparse term vectors over the same vocabulary as the resume search
+index (resume_search.tokenize):
+  - resume vectors are the unit weights stored on ResumeTerm when a blob is indexed.
+    Blobs never change, so each is computed once per document version.
+  - the job vector weights the job's required skills, qualifications, responsibilities
+    and title by field, then by IDF over all indexed resumes, so rare skills count for
+    more than words every resume contains. It depends on the job (updated_at) and on
+    the index (the resume-index ChangeMarker, bumped whenever resumes are indexed), and
+    is cached under a version token made of those two. The token is the same in every
+    process and after a cache expiry, so a score only goes stale when its inputs change.
+
+Scoring every applicant of a job is one sparse matrix-vector product: a single query
+fetches the (resume, term, weight) entries of all the applicants' resumes, restricted
+to the job's terms, and sums weight x job weight per resume. The profile part (degree
+and institution) is a small vector per applicant, built from one query.
+
+Scores are cached on StudentApplication.relevance_score, so the admin can sort by them
+in the database. relevance_version records the job vector and resume version each
+score came from. refresh_relevance_scores() recomputes only the scores that are stale;
+the admin checks for stale scores with one query and leaves the recomputing to the
+refresh_relevance task.
+"""
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Cast, Coalesce, Concat, Substr
+
+from .models import ChangeMarker, EducationDetail, ResumeTerm, ResumeText, StudentApplication
+from .resume_search import tokenize
+
+# How much each part of the posting counts towards the job vector
+JOB_FIELD_WEIGHTS = {
+    'required_skills': 3.0,
+    'title': 2.0,
+    'minimum_qualifications': 2.0,
+    'key_responsibilities': 1.0,
+}
+
+# Share of the score that comes from the profile (education) rather than the resume
+PROFILE_WEIGHT = 0.2
+
+# How long a built job vector stays in the cache. Only memory: the key is its version token
+JOB_VECTOR_TIMEOUT = getattr(settings, 'RELEVANCE_JOB_VECTOR_TIMEOUT', 24 * 60 * 60)
+
+
+def _unit(vector):
+    norm = math.sqrt(sum(w * w for w in vector.values())) or 1
+    return {term: w / norm for term, w in vector.items()}
+
+
+def _dot(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(term, 0.0) for term, w in a.items())
+
+
+def job_vector_token(job):
+    """The version of the job's vector: the job's and the resume index's last change."""
+    index_generation, _ = ChangeMarker.read(ChangeMarker.RESUME_INDEX)
+    return f"{job.updated_at:%Y%m%d%H%M%S%f}-{index_generation}"
+
+
+def job_vector(job):
+    """Returns (version token, unit vector) for the job, cached per version."""
+    token = job_vector_token(job)
+    key = f"job-vector:{job.pk}:{token}"
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    frequencies = Counter()
+    for field, field_weight in JOB_FIELD_WEIGHTS.items():
+        for term in tokenize(getattr(job, field) or ''):
+            frequencies[term] += field_weight
+
+    total_docs = ResumeText.objects.count()
+    document_frequency = dict(
+        ResumeTerm.objects.filter(term__in=list(frequencies)).values('term')
+        .annotate(df=Count('id')).values_list('term', 'df').order_by()
+    )
+    vector = {}
+    for term, frequency in frequencies.items():
+        idf = math.log(1 + total_docs / (1 + document_frequency.get(term, 0))) if total_docs else 1.0
+        vector[term] = (1 + math.log(frequency)) * idf
+
+    result = (token, _unit(vector))
+    cache.set(key, result, JOB_VECTOR_TIMEOUT)
+    return result
+
+
+def _profile_vectors(student_ids):
+    """Unit vectors of each student's degrees and institutions, from one query."""
+    text = defaultdict(list)
+    for profile_id, degree, institution in EducationDetail.objects.filter(
+        profile_id__in=student_ids,
+    ).values_list('profile_id', 'degree', 'institution'):
+        text[profile_id].append(f'{degree} {institution}')
+    return {student_id: _unit(Counter(tokenize(' '.join(parts)))) for student_id, parts in text.items()}
+
+
+def score_applications(job, applications):
+    """
+    Returns {application id: score in [0, 1]} for applications to `job`
+    (which need resume__blob_id and student_id loaded).
+    """
+    _, vector = job_vector(job)
+    if not vector:
+        return {application.id: 0.0 for application in applications}
+
+    blob_ids = {application.resume.blob_id for application in applications if application.resume_id and application.resume.blob_id}
+    # The sparse product: resumes x job terms, in one query
+    resume_scores = defaultdict(float)
+    for blob_id, term, weight in ResumeTerm.objects.filter(
+        blob_id__in=blob_ids, term__in=list(vector),
+    ).values_list('blob_id', 'term', 'weight'):
+        resume_scores[blob_id] += weight * vector[term]
+
+    profiles = _profile_vectors({application.student_id for application in applications})
+    scores = {}
+    for application in applications:
+        blob_id = application.resume.blob_id if application.resume_id else None
+        resume_score = resume_scores.get(blob_id, 0.0)
+        profile_score = _dot(vector, profiles.get(application.student_id, {}))
+        scores[application.id] = (1 - PROFILE_WEIGHT) * resume_score + PROFILE_WEIGHT * profile_score
+    return scores
+
+
+def _score_version(token, application):
+    blob_id = application.resume.blob_id if application.resume_id else None
+    # Includes the resume's extractor version, so a resume that was still waiting
+    # to be indexed gets rescored once its text is in
+    return f"{token}:{(blob_id or '-')[:16]}:{application.text_version or 0}"
+
+
+def has_stale_scores(job):
+    """Whether any of the job's applicants needs rescoring: one query, _score_version() in SQL."""
+    current_version = Concat(
+        Value(f'{job_vector_token(job)}:'),
+        Coalesce(Substr('resume__blob_id', 1, 16), Value('-')),
+        Value(':'),
+        Coalesce(Cast('resume__blob__text__extractor_version', CharField()), Value('0')),
+        output_field=CharField(),
+    )
+    return (
+        StudentApplication.objects.filter(job=job)
+        .annotate(current_version=current_version)
+        .exclude(relevance_version=F('current_version'))
+        .exists()
+    )
+
+
+def refresh_relevance_scores(job):
+    """
+    Recomputes the cached scores of the job's applicants whose job vector or resume
+    has changed since they were scored. Returns the number of applications updated.
+    """
+    token, _ = job_vector(job)
+    applications = (
+        StudentApplication.objects.filter(job=job)
+        .select_related('resume')
+        .only('id', 'student', 'resume', 'resume__blob', 'relevance_version')
+        .annotate(text_version=F('resume__blob__text__extractor_version'))
+    )
+    stale = [a for a in applications if a.relevance_version != _score_version(token, a)]
+    if not stale:
+        return 0
+
+    scores = score_applications(job, stale)
+    for application in stale:
+        application.relevance_score = round(scores[application.id], 6)
+        application.relevance_version = _score_version(token, application)
+    StudentApplication.objects.bulk_update(stale, ['relevance_score', 'relevance_version'], batch_size=500)
+    return len(stale)
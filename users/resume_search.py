@@ -0,0 +1,190 @@
+# users/resume_search.py
+"""
+Full-text search over resume contents.
+
+Pipeline (all off the request path):
+  1. A new ResumeBlob queues the extract_resume_text task (see resume_storage.acquire_blob).
+     `manage.py index_resumes` queues or processes whatever is missing, e.g. after an upgrade.
+  2. The task reads each PDF and extracts its text in a pool of worker processes,
+     because PDF parsing is CPU-bound and would otherwise hold the GIL in the task worker.
+  3. The text is normalised into terms (lower case, accents folded, stop words dropped)
+     and stored as ResumeText plus one ResumeTerm row per distinct term (an inverted index).
+
+Indexing is incremental. Blobs are content-addressed and never change, so a blob is
+processed once, when it first appears. Re-uploading the same PDF costs nothing. Bumping
+EXTRACTOR_VERSION marks every blob for re-extraction.
+
+search_resumes() ranks blobs for a query with BM25 over the inverted index. It runs
+on any database backend, not only ones with built-in full-text search.
+
+Text extraction itself lives in pdf_text.py.
+"""
+import logging
+import math
+import multiprocessing
+import re
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+
+from .models import ChangeMarker, ResumeBlob, ResumeTerm, ResumeText
+from .pdf_text import extract_text_safely
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction or normalisation changes; index_resumes then re-processes every blob
+EXTRACTOR_VERSION = 1
+
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from has have i in is it its me my of on or our that the this '
+    'to was were will with you your'.split()
+)
+
+# Keeps the punctuation that belongs to technical terms: c++, c#, node.js, ci/cd
+TOKEN_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#./-]*')
+
+
+# --- Normalisation ---
+
+def normalize_text(text):
+    """Lower-cases, folds accents (é -> e) and collapses whitespace."""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.lower().split())
+
+
+def tokenize(text):
+    """Normalised search terms of `text`, in order, with stop words dropped."""
+    terms = []
+    for token in TOKEN_PATTERN.findall(normalize_text(text)):
+        token = token.rstrip('./-')
+        # Single letters are noise, except the languages C and R
+        if (2 <= len(token) <= 64 and token not in STOP_WORDS) or token in ('c', 'r'):
+            terms.append(token)
+    return terms
+
+
+# --- Indexing ---
+
+def pending_blobs():
+    """Blobs that have never been indexed, or were indexed by an older extractor."""
+    return ResumeBlob.objects.filter(
+        Q(text__isnull=True) | Q(text__extractor_version__lt=EXTRACTOR_VERSION)
+    ).order_by('created_at')
+
+
+def index_blobs(digests, processes=None):
+    """
+    Extracts and indexes the given blobs. Files are read here and parsed in a process pool
+    of settings.RESUME_TEXT_EXTRACTION_PROCESSES workers (1 parses in this thread).
+    Returns the number of blobs indexed.
+    """
+    processes = settings.RESUME_TEXT_EXTRACTION_PROCESSES if processes is None else processes
+    blobs = list(ResumeBlob.objects.filter(digest__in=digests))
+    jobs = []
+    for blob in blobs:
+        try:
+            with blob.file.open('rb') as file:
+                jobs.append((blob.digest, file.read()))
+        except (FileNotFoundError, OSError) as e:
+            logger.warning("Resume blob %s could not be read: %s", blob.digest, e)
+            jobs.append((blob.digest, None))
+
+    readable = [job for job in jobs if job[1] is not None]
+    if processes > 1 and len(readable) > 1:
+        # Spawned, not forked: the task worker has other threads and open database connections,
+        # and a forked child would inherit them mid-use. pdf_text needs nothing from this process.
+        pool = ProcessPoolExecutor(
+            max_workers=min(processes, len(readable)), mp_context=multiprocessing.get_context('spawn'),
+        )
+        with pool:
+            results = list(pool.map(extract_text_safely, readable))
+    else:
+        results = [extract_text_safely(job) for job in readable]
+    results += [(digest, '', 'File is missing from storage.') for digest, data in jobs if data is None]
+
+    save_indexes(results)
+    return len(results)
+
+
+def unit_term_weights(counts):
+    """
+    Sublinear term frequencies (1 + ln count) scaled to a unit-length vector, so long
+    resumes don't outscore short ones just by repeating words. Depends only on the
+    document itself, which is what lets it be stored once per blob.
+    """
+    weights = {term: 1 + math.log(count) for term, count in counts.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values())) or 1
+    return {term: w / norm for term, w in weights.items()}
+
+
+def save_index(digest, text, error=''):
+    """Replaces the blob's stored text, term counts and term weights."""
+    save_indexes([(digest, text, error)])
+
+
+def save_indexes(results):
+    """
+    Stores a batch of (digest, text, error) extraction results in one transaction.
+    Document frequencies changed, so every job's relevance vector is out of date: the
+    resume index marker is bumped once for the whole batch rather than once per blob.
+    """
+    if not results:
+        return
+    with transaction.atomic():
+        for digest, text, error in results:
+            counts = Counter(tokenize(text))
+            weights = unit_term_weights(counts)
+            ResumeText.objects.update_or_create(
+                blob_id=digest,
+                defaults={
+                    'text': text, 'term_count': sum(counts.values()),
+                    'extractor_version': EXTRACTOR_VERSION, 'error': error,
+                },
+            )
+            ResumeTerm.objects.filter(blob_id=digest).delete()
+            ResumeTerm.objects.bulk_create(
+                [ResumeTerm(term=term, blob_id=digest, count=count, weight=weights[term]) for term, count in counts.items()],
+                batch_size=1000,
+            )
+        ChangeMarker.bump(ChangeMarker.RESUME_INDEX)
+
+
+# --- Searching ---
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def search_resumes(query, limit=200):
+    """
+    Ranks indexed resume blobs against `query` with BM25. Every query term counts;
+    blobs matching more of them, more often, in shorter resumes rank higher.
+    Returns [(digest, score)], best first.
+    """
+    terms = set(tokenize(query))
+    if not terms:
+        return []
+
+    corpus = ResumeText.objects.aggregate(total=Count('pk'), average_length=Avg('term_count'))
+    total_docs = corpus['total']
+    if not total_docs:
+        return []
+    average_length = corpus['average_length'] or 1
+
+    postings = ResumeTerm.objects.filter(term__in=terms).values_list('term', 'blob_id', 'count', 'blob__text__term_count')
+    by_term = {}
+    for term, digest, count, length in postings:
+        by_term.setdefault(term, []).append((digest, count, length or 0))
+
+    scores = Counter()
+    for term, docs in by_term.items():
+        idf = math.log(1 + (total_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+        for digest, count, length in docs:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+            scores[digest] += idf * count * (BM25_K1 + 1) / (count + norm)
+    return scores.most_common(limit)
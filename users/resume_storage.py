@@ -0,0 +1,188 @@
+# users/resume_storage.py
+"""
+Content-addressed resume storage.
+
+Every uploaded resume is hashed (SHA-256) as its chunks are read, and the contents
+are stored once, under resumes/blobs/<2 hex>/<digest>.pdf, as a ResumeBlob. Resume rows
+point at the blob and the blob counts them. Uploading a file that is already stored
+(the same PDF for ten applications, or the same file from two students) only adds a
+row and bumps the count. No second copy is written.
+
+When a Resume row is deleted (see signals.py) the count goes down. When it reaches
+zero, the delete_resume_blob task deletes the blob row, but only if its count is still
+zero, and removes the file after that delete has committed. An upload of the same file
+arriving at the same moment either raised the count first, and the blob stays, or
+finds no row and stores the contents again.
+
+The file of a new blob is written before its transaction commits, so for a moment a
+file with no row is normal. Such files are only removed once they are older than
+settings.RESUME_ORPHAN_GRACE_PERIOD. If an upload's transaction rolls back, the caller
+hands the blob to discard_rolled_back_blob(), which queues the task for after that period.
+
+`manage.py dedupe_resumes` moves resumes uploaded before this existed onto blobs,
+repairs the counts and sweeps blob files that no row owns.
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, ProtectedError
+from django.utils import timezone
+
+from .models import Resume, ResumeBlob
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def blob_name(digest):
+    # Two-level fan-out so no directory ends up with tens of thousands of files
+    return f'resumes/blobs/{digest[:2]}/{digest}.pdf'
+
+
+def hash_file(file):
+    """Returns (hex digest, size), reading the file in chunks."""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in file.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return digest.hexdigest(), size
+
+
+def _save_blob_file(digest, file):
+    name = blob_name(digest)
+    # Identical contents always get the same name, so a file already there (e.g. left by
+    # a rolled-back upload) is the right one. Saving again would only add a "_abc123" copy.
+    if not default_storage.exists(name):
+        name = default_storage.save(name, file)
+    return name
+
+
+def acquire_blob(file, digest=None, size=None):
+    """
+    Returns the blob for `file`'s contents with its reference count raised by one,
+    storing the file if these contents are new. Must be called inside a transaction.
+    """
+    if digest is None:
+        digest, size = hash_file(file)
+
+    # Common case first: the blob exists; one UPDATE takes the reference
+    if ResumeBlob.objects.filter(digest=digest).update(ref_count=F('ref_count') + 1):
+        return ResumeBlob.objects.get(digest=digest)
+
+    name = _save_blob_file(digest, file)
+    blob, created = ResumeBlob.objects.get_or_create(digest=digest, defaults={'file': name, 'size': size, 'ref_count': 1})
+    # Tells discard_rolled_back_blob() whether this transaction is the one that stored the contents
+    blob.created_in_this_transaction = created
+    if created:
+        if not default_storage.exists(name):
+            # Cleaned up after a rolled-back upload of the same contents since we checked
+            _save_blob_file(digest, file)
+        # New contents: have the background indexer pick up its text (see resume_search.py)
+        from .tasks import extract_resume_text
+        transaction.on_commit(lambda: extract_resume_text.enqueue(digest=digest))
+    else:
+        # Another upload of the same contents created it in the meantime
+        ResumeBlob.objects.filter(digest=digest).update(ref_count=F('ref_count') + 1)
+        blob.refresh_from_db()
+    return blob
+
+
+def store_resume(student, uploaded_file):
+    """Creates a Resume for `student` backed by the (possibly shared) blob for the upload's contents."""
+    with transaction.atomic():
+        blob = acquire_blob(
+            uploaded_file,
+            # Upload handlers may already have hashed the file while receiving it
+            digest=getattr(uploaded_file, 'sha256', None),
+            size=uploaded_file.size,
+        )
+        return Resume.objects.create(
+            student=student,
+            file=blob.file.name,
+            blob=blob,
+            original_name=os.path.basename(uploaded_file.name)[:255],
+        )
+
+
+def discard_rolled_back_blob(blob):
+    """
+    Called after the transaction that acquired `blob` rolled back. The reference went
+    with it, but a file written for new contents is already in storage: queue its removal
+    for when it is past the grace period.
+    """
+    from .tasks import delete_resume_blob
+
+    if getattr(blob, 'created_in_this_transaction', False):
+        run_at = timezone.now() + timedelta(seconds=settings.RESUME_ORPHAN_GRACE_PERIOD)
+        transaction.on_commit(lambda: delete_resume_blob.enqueue_at(run_at, digest=blob.digest))
+
+
+def release_blob(digest):
+    """Drops one reference. Once none are left the file is queued for deletion after commit."""
+    from .tasks import delete_resume_blob
+
+    ResumeBlob.objects.filter(digest=digest, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+    if ResumeBlob.objects.filter(digest=digest, ref_count=0).exists():
+        transaction.on_commit(lambda: delete_resume_blob.enqueue(digest=digest))
+
+
+def is_past_grace_period(name):
+    """Whether a blob file with no row is old enough that no upload can still be about to claim it."""
+    cutoff = timezone.now() - timedelta(seconds=settings.RESUME_ORPHAN_GRACE_PERIOD)
+    try:
+        return default_storage.get_modified_time(name) < cutoff
+    except (FileNotFoundError, NotImplementedError):
+        return False
+
+
+def delete_blob_if_unreferenced(digest):
+    """
+    Deletes the blob's row if nothing references it any more, then its file once that
+    delete has committed. The DELETE only matches the row while its count is zero, and
+    Resume.blob is PROTECT, so a resume still pointing at the blob also stops it.
+    A file with no row at all (its upload rolled back) is removed once it is past the
+    grace period. Returns True if anything was removed.
+    """
+    blob = ResumeBlob.objects.filter(digest=digest).only('digest', 'file').first()
+    if blob is None:
+        name = blob_name(digest)
+        if not is_past_grace_period(name):
+            return False
+        default_storage.delete(name)
+        return True
+
+    name = blob.file.name
+    try:
+        with transaction.atomic():
+            deleted, _ = ResumeBlob.objects.filter(digest=digest, ref_count=0).delete()
+            if deleted:
+                transaction.on_commit(lambda: default_storage.delete(name))
+    except ProtectedError:
+        # Counted as unreferenced while a resume still uses it; dedupe_resumes repairs the count
+        return False
+    return bool(deleted)
+
+
+def orphaned_blob_files():
+    """
+    Files under resumes/blobs/ with no ResumeBlob row, e.g. left behind by an upload
+    whose transaction was rolled back. Files still within the grace period are skipped:
+    they may belong to an upload that has not committed yet. Yields storage names.
+    """
+    try:
+        shards, _ = default_storage.listdir('resumes/blobs')
+    except FileNotFoundError:
+        return
+    for shard in shards:
+        _, files = default_storage.listdir(f'resumes/blobs/{shard}')
+        digests = {os.path.splitext(name)[0]: name for name in files}
+        known = set(ResumeBlob.objects.filter(digest__in=list(digests)).values_list('digest', flat=True))
+        for digest, name in digests.items():
+            path = f'resumes/blobs/{shard}/{name}'
+            if digest not in known and is_past_grace_period(path):
+                yield path
@@ -1,33 +1,161 @@
 # users/signals.py
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import DEFERRED
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
-from .models import Job, CustomUser, Notification
+from .models import ChangeMarker, CustomUser, EducationDetail, Job, Notification, Profile, Resume, StudentApplication
+from .change_tracking import remember_field_values
+from .job_cards import invalidate_job_card
+from .tasks import announce_jobs, delete_stored_file
+from .notifications import forget_unread_count, publish_notifications
+from .pipeline_stats import adjust_application_counts
+from .profile_completion import completion_may_change, refresh_profile_completion
+from .resume_storage import release_blob
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_card_cache(sender, instance, **kwargs):
+    """Drops the cached job-list card so the next page view renders the new version."""
+    invalidate_job_card(instance.pk)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def mark_job_list_changed(sender, instance, **kwargs):
+    # A deleted or archived job leaves no newer updated_at behind in the active list,
+    # so the jobs API also dates the list by this marker (see api.py)
+    ChangeMarker.bump(ChangeMarker.JOB_LIST)
+
 
 @receiver(post_save, sender=Job)
 def create_job_notification(sender, instance, created, **kwargs):
     """
-    A signal that creates a notification for all students when a new job is created.
+    A signal that queues the announcement of a new job to all students.
     'instance' is the Job object that was just saved.
     'created' is a boolean that is True if this is a new record.
+    Jobs added through the bulk import skip this signal (bulk_create does not send it)
+    and are announced together by the import itself.
     """
     if created:
-        # Get all users who are students
-        students = CustomUser.objects.filter(role=CustomUser.Role.STUDENT)
-
-        # Create the notification message
-        message = (
-            f"New Opening: {instance.title} at {instance.company}. "
-            f"Salary: {instance.currency} {instance.salary_min}-{instance.salary_max}. "
-            f"Apply by: {instance.deadline.strftime('%b %d, %Y')}."
+        announce_jobs.enqueue(job_ids=[instance.pk])
+
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_count_on_save(sender, instance, created, **kwargs):
+    """Keeps the cached unread-notification count in step with personal notifications."""
+    forget_unread_count(instance.user_id)
+    if created and not instance.is_read:
+        # Push it to the student's open browser tabs once it is committed
+        transaction.on_commit(lambda: publish_notifications([instance], user_id=instance.user_id))
+
+
+@receiver(post_delete, sender=Notification)
+def update_unread_count_on_delete(sender, instance, **kwargs):
+    forget_unread_count(instance.user_id)
+
+
+@receiver(post_init, sender=CustomUser)
+@receiver(post_init, sender=Profile)
+def remember_loaded_values(sender, instance, **kwargs):
+    """Snapshot for change_tracking.save_changed_fields."""
+    remember_field_values(instance)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=Profile)
+def remember_saved_values(sender, instance, update_fields=None, **kwargs):
+    # What was written is now the stored state; other unsaved edits stay dirty
+    remember_field_values(instance, fields=update_fields)
+
+
+@receiver(pre_save, sender=Profile)
+def check_profile_completion(sender, instance, update_fields=None, **kwargs):
+    # Decided before the save, while the loaded values are still there to compare with
+    instance._completion_may_change = completion_may_change(instance, update_fields)
+
+
+@receiver(post_save, sender=Profile)
+def update_profile_completion(sender, instance, **kwargs):
+    """Re-scores the profile when the save filled in or emptied a field the score counts."""
+    if instance._completion_may_change:
+        refresh_profile_completion(instance.pk)
+        instance.refresh_from_db(fields=['profile_completion'])
+        remember_field_values(instance, fields=['profile_completion'])
+
+
+@receiver(post_save, sender=EducationDetail)
+@receiver(post_save, sender=Resume)
+def add_to_profile_completion(sender, instance, created, **kwargs):
+    # Only having (or not having) any entry counts, so edits to one change nothing
+    if created:
+        refresh_profile_completion(instance.profile_id if sender is EducationDetail else instance.student_id)
+
+
+@receiver(post_delete, sender=EducationDetail)
+@receiver(post_delete, sender=Resume)
+def remove_from_profile_completion(sender, instance, **kwargs):
+    refresh_profile_completion(instance.profile_id if sender is EducationDetail else instance.student_id)
+
+
+@receiver(post_init, sender=StudentApplication)
+def remember_application_status(sender, instance, **kwargs):
+    """
+    Remembers the status the application was loaded with, so a save can tell whether it changed.
+    Read from __dict__ so that querysets which defer status (.only(...)) don't fetch it row by row.
+    """
+    instance._original_status = instance.__dict__.get('status', DEFERRED)
+
+
+@receiver(pre_save, sender=StudentApplication)
+def load_original_status(sender, instance, **kwargs):
+    # Loaded without its status but given one since: look up what it was before this save
+    if (
+        instance._original_status is DEFERRED and 'status' in instance.__dict__
+        and not instance._state.adding
+    ):
+        instance._original_status = (
+            StudentApplication.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
         )
 
-        # Create a notification object for each student
-        notifications_to_create = [
-            Notification(user=student, job=instance, message=message)
-            for student in students
-        ]
-        
-        # Use bulk_create for efficiency - it's much faster than creating one by one in a loop
-        Notification.objects.bulk_create(notifications_to_create)
 
-        print(f"Created notifications for {len(students)} students for job: {instance.title}")
\ No newline at end of file
+@receiver(post_save, sender=StudentApplication)
+def update_pipeline_stats_on_save(sender, instance, created, **kwargs):
+    """Keeps the per-job, per-status counters in step when an application is created or changes status."""
+    current = instance.__dict__.get('status', DEFERRED)
+    if created:
+        adjust_application_counts({(instance.job_id, current): 1})
+    elif current is not DEFERRED and instance._original_status not in (current, DEFERRED, None):
+        adjust_application_counts({
+            (instance.job_id, instance._original_status): -1,
+            (instance.job_id, current): 1,
+        })
+    instance._original_status = current
+
+
+@receiver(pre_delete, sender=StudentApplication)
+def load_status_before_delete(sender, instance, **kwargs):
+    # Deferred fields can no longer be loaded once the row is gone; fetch both in one query
+    deferred = instance.get_deferred_fields() & {'status', 'job_id'}
+    if deferred:
+        instance.refresh_from_db(fields=sorted(deferred))
+
+
+@receiver(post_delete, sender=StudentApplication)
+def update_pipeline_stats_on_delete(sender, instance, **kwargs):
+    adjust_application_counts({(instance.job_id, instance.status): -1})
+
+
+@receiver(post_delete, sender=Resume)
+def release_resume_file(sender, instance, **kwargs):
+    """
+    Drops the deleted resume's reference to its shared blob, which is removed once unreferenced.
+    Covers every way a resume goes away: the delete view, the admin, a deleted student account.
+    """
+    if instance.blob_id:
+        release_blob(instance.blob_id)
+    elif instance.file:
+        # Uploaded before deduplication, so the file is this row's alone
+        name = instance.file.name
+        transaction.on_commit(lambda: delete_stored_file.enqueue(name=name))
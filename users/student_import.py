@@ -0,0 +1,186 @@
+# users/student_import.py
+"""
+Bulk onboarding of students from the registrar's CSV, used by the import_students
+management command.
+
+The CSV is keyed on College_ID (as in college_student_placement_dataset.csv), which
+becomes the username. Optional columns: email, first_name, last_name (or full_name),
+and password. Other columns, such as the dataset's academic scores, are ignored.
+Rows without a password get a random one, which is returned so it can be handed
+out.
+
+Creating students one by one costs one password hash plus a user INSERT, a Profile
+INSERT and a profile UPDATE from the post_save signals per student. At ~50 ms a
+hash, a 5,000-student batch spends minutes on hashing alone. Here:
+  - passwords are hashed in a pool of worker processes, one core each
+  - users and their Profile rows are inserted with bulk_create in batches. bulk_create
+    sends no post_save signals, so the Profile rows the signal would have made are
+    created here instead.
+  - everything goes in one transaction: a failed batch leaves nothing behind
+  - students can be activated in the same run instead of through the admin action
+
+Every row is validated before any hashing or writing. College_IDs that already
+have an account (matched case-insensitively, like logins) are skipped.
+"""
+import csv
+import io
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .models import CustomUser, Profile
+
+ID_COLUMN = 'College_ID'
+
+# Passwords sent to a worker per round trip
+HASH_CHUNK_SIZE = 50
+
+
+class StudentImportError(Exception):
+    """Raised when the file cannot be read or one or more rows fail validation."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors))
+
+
+def read_student_rows(file):
+    """Reads the registrar's CSV (text or bytes) into a list of dicts."""
+    content = file.read()
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise StudentImportError(["The file must be UTF-8 encoded."])
+    reader = csv.DictReader(io.StringIO(content))
+    if ID_COLUMN not in (reader.fieldnames or []):
+        raise StudentImportError([f"The CSV needs a {ID_COLUMN} column."])
+    return list(reader)
+
+
+def validate_student_rows(rows):
+    """
+    Checks every row and returns [(username, email, first_name, last_name, password or None)],
+    or raises StudentImportError listing all problems.
+    """
+    username_validator = UnicodeUsernameValidator()
+    max_length = CustomUser._meta.get_field('username').max_length
+    students = []
+    errors = []
+    seen = {}
+    for number, row in enumerate(rows, start=1):
+        username = (row.get(ID_COLUMN) or '').strip()
+        email = (row.get('email') or '').strip()
+        if not username:
+            errors.append(f"Row {number}: {ID_COLUMN} is empty.")
+            continue
+        try:
+            username_validator(username)
+            if len(username) > max_length:
+                raise ValidationError(f"longer than {max_length} characters")
+            if email:
+                validate_email(email)
+        except ValidationError as e:
+            errors.append(f"Row {number} ({username}): {' '.join(e.messages)}")
+            continue
+        if username.lower() in seen:
+            errors.append(f"Row {number}: {ID_COLUMN} {username} is already on row {seen[username.lower()]}.")
+            continue
+        seen[username.lower()] = number
+
+        first_name = (row.get('first_name') or '').strip()
+        last_name = (row.get('last_name') or '').strip()
+        if not first_name and row.get('full_name'):
+            # Same split as register_view
+            first_name, _, last_name = row['full_name'].strip().partition(' ')
+        students.append((username, email, first_name[:150], last_name.strip()[:150], row.get('password') or None))
+
+    if not rows:
+        errors.append("The file does not contain any students.")
+    if errors:
+        raise StudentImportError(errors)
+    return students
+
+
+def existing_usernames(usernames, batch_size=500):
+    """The lower-cased usernames among `usernames` that already have an account."""
+    lowered = sorted({username.lower() for username in usernames})
+    found = set()
+    for start in range(0, len(lowered), batch_size):
+        # LOWER(username) IN (...), answered by the username_lower_idx index
+        found.update(
+            CustomUser.objects.annotate(username_lower=Lower('username'))
+            .filter(username_lower__in=lowered[start:start + batch_size])
+            .values_list('username_lower', flat=True)
+        )
+    return found
+
+
+def _setup_worker(settings_module):
+    # Spawned workers (macOS, Windows) start without Django configured
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def _hash_chunk(passwords):
+    return [make_password(password) for password in passwords]
+
+
+def hash_passwords(passwords, processes=None):
+    """make_password for each password, in order, spread over `processes` worker processes."""
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(passwords) <= HASH_CHUNK_SIZE:
+        return _hash_chunk(passwords)
+
+    chunks = [passwords[start:start + HASH_CHUNK_SIZE] for start in range(0, len(passwords), HASH_CHUNK_SIZE)]
+    with ProcessPoolExecutor(
+        max_workers=min(processes, len(chunks)),
+        initializer=_setup_worker,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'placement_project.settings'),),
+    ) as pool:
+        return [encoded for chunk in pool.map(_hash_chunk, chunks) for encoded in chunk]
+
+
+def import_students(rows, activate=False, processes=None, batch_size=500):
+    """
+    Validates the rows and creates the students that don't exist yet, with their
+    profiles, in one transaction. Returns (created users, {username: password} for
+    the generated passwords, number of skipped existing accounts).
+    """
+    students = validate_student_rows(rows)
+    existing = existing_usernames([student[0] for student in students])
+    new_students = [student for student in students if student[0].lower() not in existing]
+
+    generated = {}
+    passwords = []
+    for username, _, _, _, password in new_students:
+        if password is None:
+            password = generated[username] = secrets.token_urlsafe(9)
+        passwords.append(password)
+    encoded_passwords = hash_passwords(passwords, processes=processes)
+
+    users = [
+        CustomUser(
+            username=username, email=email, first_name=first_name, last_name=last_name,
+            password=encoded, role=CustomUser.Role.STUDENT,
+            # Otherwise they wait for approval, like self-registered students
+            is_active=activate,
+        )
+        for (username, email, first_name, last_name, _), encoded in zip(new_students, encoded_passwords)
+    ]
+    with transaction.atomic():
+        created = []
+        for start in range(0, len(users), batch_size):
+            batch = CustomUser.objects.bulk_create(users[start:start + batch_size])
+            # No post_save signals fired, so create the profiles create_user_profile would have
+            Profile.objects.bulk_create([Profile(user=user) for user in batch])
+            created.extend(batch)
+    return created, generated, len(students) - len(new_students)
@@ -0,0 +1,168 @@
+# users/task_queue.py
+"""
+A small task queue backed by the project database (no Redis or broker needed).
+
+Register a function with @task and call .enqueue(**kwargs) on it from a view or signal.
+That stores a BackgroundTask row, which `python manage.py run_task_worker` picks up.
+
+    @task(max_attempts=5)
+    def send_welcome_email(user_id):
+        ...
+
+    send_welcome_email.enqueue(user_id=user.id)                                  # as soon as possible
+    send_welcome_email.enqueue_at(timezone.now() + timedelta(hours=1), user_id=user.id)  # scheduled
+
+The scheduling time is passed positionally, so a task may have its own run_at or
+delay argument without it being taken for a scheduling option.
+
+Tasks declared with batch_size > 1 receive a list of kwargs dicts, so the worker can
+process many queued calls of the same task in one go (e.g. one fan-out for many jobs).
+
+With settings.TASK_QUEUE_EAGER = True (used by tests) enqueue() runs the task immediately
+in the calling thread instead of storing it.
+"""
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+# name -> Task, filled in by the @task decorator when task modules are imported
+registry = {}
+
+
+class Task:
+    def __init__(self, func, name, max_attempts, batch_size):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, /, **kwargs):
+        """
+        Queues a call of this task with JSON-serializable kwargs, to run as soon as possible.
+        Returns the BackgroundTask row, or None when running eagerly.
+        """
+        return self.enqueue_at(None, **kwargs)
+
+    def enqueue_at(self, run_at, /, **kwargs):
+        """Like enqueue(), but not before `run_at` (a datetime, or None for now)."""
+        if settings.TASK_QUEUE_EAGER:
+            self.run([kwargs])
+            return None
+
+        if run_at is None:
+            run_at = timezone.now()
+        return BackgroundTask.objects.create(
+            name=self.name, kwargs=kwargs, run_at=run_at, max_attempts=self.max_attempts,
+        )
+
+    def run(self, kwargs_list):
+        """Runs the task for one or more queued calls."""
+        if self.batch_size > 1:
+            return self.func(kwargs_list)
+        for kwargs in kwargs_list:
+            self.func(**kwargs)
+
+
+def task(name=None, max_attempts=3, batch_size=1):
+    """Registers a function as a background task. See the module docstring."""
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        registry[task_name] = Task(func, task_name, max_attempts, batch_size)
+        return registry[task_name]
+    return decorator
+
+
+# --- Worker side ---
+
+def claim_tasks():
+    """
+    Atomically marks the next unit of work as RUNNING for this worker and returns its tasks.
+    The UPDATE only touches rows that are still QUEUED, so two workers never claim the same row.
+    A unit is a single task, or up to batch_size queued calls of a batched task.
+    """
+    now = timezone.now()
+    # A RUNNING task whose worker vanished is handed out again after this long
+    stale_before = now - timedelta(seconds=settings.TASK_QUEUE_STALE_LOCK_TIMEOUT)
+
+    # Requeue tasks left RUNNING by a worker that died mid-task
+    BackgroundTask.objects.filter(
+        status=BackgroundTask.Status.RUNNING, locked_at__lt=stale_before,
+    ).update(status=BackgroundTask.Status.QUEUED, claim_token='', locked_at=None)
+
+    first = BackgroundTask.objects.filter(
+        status=BackgroundTask.Status.QUEUED, run_at__lte=now,
+    ).order_by('run_at', 'id').values_list('name', flat=True).first()
+    if first is None:
+        return []
+
+    registered = registry.get(first)
+    size = registered.batch_size if registered else 1
+    candidate_ids = list(
+        BackgroundTask.objects.filter(
+            status=BackgroundTask.Status.QUEUED, run_at__lte=now, name=first,
+        ).order_by('run_at', 'id').values_list('id', flat=True)[:size]
+    )
+
+    token = uuid.uuid4().hex
+    BackgroundTask.objects.filter(
+        id__in=candidate_ids, status=BackgroundTask.Status.QUEUED,
+    ).update(status=BackgroundTask.Status.RUNNING, claim_token=token, locked_at=now)
+    return list(BackgroundTask.objects.filter(claim_token=token).order_by('run_at', 'id'))
+
+
+def execute_tasks(tasks):
+    """
+    Runs claimed tasks (all with the same name) and records the outcome.
+    A failed run is retried with exponential backoff until max_attempts is reached.
+    Returns False if the run failed, True otherwise (including when there was nothing to run).
+    """
+    if not tasks:
+        return True
+    name = tasks[0].name
+    ids = [t.id for t in tasks]
+    registered = registry.get(name)
+
+    try:
+        if registered is None:
+            raise LookupError(f"No task registered under the name '{name}'.")
+        with transaction.atomic():
+            registered.run([t.kwargs for t in tasks])
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Task %s failed (ids=%s)", name, ids)
+        now = timezone.now()
+        for t in tasks:
+            t.attempts += 1
+            t.last_error = error
+            t.claim_token = ''
+            t.locked_at = None
+            if t.attempts >= t.max_attempts:
+                t.status = BackgroundTask.Status.FAILED
+                t.finished_at = now
+            else:
+                t.status = BackgroundTask.Status.QUEUED
+                # Attempt n waits TASK_QUEUE_RETRY_BACKOFF * 2 ** (n - 1) seconds
+                t.run_at = now + timedelta(seconds=settings.TASK_QUEUE_RETRY_BACKOFF * 2 ** (t.attempts - 1))
+        BackgroundTask.objects.bulk_update(
+            tasks, ['attempts', 'last_error', 'claim_token', 'locked_at', 'status', 'finished_at', 'run_at'],
+        )
+        return False
+
+    BackgroundTask.objects.filter(id__in=ids).update(
+        status=BackgroundTask.Status.DONE, attempts=F('attempts') + 1,
+        claim_token='', locked_at=None, finished_at=timezone.now(),
+    )
+    return True
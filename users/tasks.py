@@ -0,0 +1,56 @@
+# users/tasks.py
+"""
+Background tasks for the users app. They are queued from signals and views with
+.enqueue(...) and run by `python manage.py run_task_worker` (see task_queue.py).
+"""
+from django.core.files.storage import default_storage
+
+from .models import Job
+from .notifications import notify_students_of_jobs
+from .relevance import refresh_relevance_scores
+from .resume_search import index_blobs
+from .resume_storage import delete_blob_if_unreferenced
+from .task_queue import task
+
+
+@task(name='users.announce_jobs', batch_size=100)
+def announce_jobs(calls):
+    """
+    Announces new jobs to students. Batched: every queued call's job_ids are collected
+    and announced in a single fan-out, so a burst of new jobs costs one insert.
+    """
+    job_ids = {job_id for call in calls for job_id in call['job_ids']}
+    notify_students_of_jobs(Job.objects.filter(id__in=job_ids).order_by('id'))
+
+
+@task(name='users.extract_resume_text', batch_size=20)
+def extract_resume_text(calls):
+    """
+    Extracts and indexes the text of newly stored resume blobs (see resume_search.py).
+    Batched, so a burst of uploads is parsed together in the extraction process pool.
+    """
+    index_blobs({call['digest'] for call in calls})
+
+
+@task(name='users.refresh_relevance', batch_size=20)
+def refresh_relevance(calls):
+    """
+    Rescores the stale applications of the given jobs (see relevance.py). Queued by the
+    applications admin, so a page view never waits for it. Batched, so repeat requests
+    for the same job are done once.
+    """
+    for job in Job.objects.filter(id__in={call['job_id'] for call in calls}):
+        refresh_relevance_scores(job)
+
+
+@task(name='users.delete_resume_blob', max_attempts=5)
+def delete_resume_blob(digest):
+    """Removes a resume blob and its file once no Resume references it (see resume_storage.py)."""
+    delete_blob_if_unreferenced(digest)
+
+
+@task(name='users.delete_stored_file', max_attempts=5)
+def delete_stored_file(name):
+    """Removes a file (e.g. a deleted resume) from media storage."""
+    if name and default_storage.exists(name):
+        default_storage.delete(name)
@@ -1,3 +1,1665 @@
-from django.test import TestCase
+import asyncio
+import csv
+import os
+import multiprocessing
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections
+from django.db.models import QuerySet
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import job_cards, task_queue
+from .admin import set_application_status
+from .applications import apply_for_job
+from .digests import send_digests
+from .exports import _resume_archive_name, stream_applicants_csv, stream_resume_zip
+from .job_import import JobImportError, import_jobs, read_job_definitions
+from .models import (
+    BackgroundTask, BroadcastNotification, ChangeMarker, CustomUser, EducationDetail, Job, JobApplicationStat,
+    Notification, Profile, Resume, ResumeBlob, ResumeTerm, ResumeText, StudentApplication, parse_cgpa_requirement,
+)
+from .notifications import (
+    get_unread_count, mark_all_read, mark_broadcasts_read, notify_students_of_jobs, unread_notifications_for,
+)
+from .paginators import estimate_row_count
+from .pdf_text import extract_pdf_text, extract_text_safely
+from .pipeline_stats import reconcile_application_stats
+from .profile_completion import BASE_SCORE, EDUCATION_WEIGHT, PROFILE_FIELD_WEIGHTS, RESUME_WEIGHT
+from .realtime import NotificationHub, event_id_for
+from .relevance import has_stale_scores, job_vector_token, refresh_relevance_scores
+from .resume_search import index_blobs, save_index, search_resumes, tokenize
+from .resume_storage import blob_name, delete_blob_if_unreferenced, hash_file, orphaned_blob_files, store_resume
+from .student_import import StudentImportError, import_students, read_student_rows, validate_student_rows
+
+# Calls of the test tasks below, as (task, kwargs)
+task_calls = []
+
+
+@task_queue.task(name='tests.record_call')
+def record_call(**kwargs):
+    task_calls.append(('record_call', kwargs))
+
+
+@task_queue.task(name='tests.record_batch', batch_size=10)
+def record_batch(kwargs_list):
+    task_calls.append(('record_batch', kwargs_list))
+
+
+@task_queue.task(name='tests.always_fails', max_attempts=2)
+def always_fails(**kwargs):
+    raise RuntimeError("boom")
+
+
+def run_in_another_process(func, *args):
+    """
+    Runs func(*args) in a forked process, like the task worker would, and returns its
+    exit code. The test database must be a file (see DATABASES['default']['TEST']).
+    """
+    connections.close_all()  # the child opens its own connection
+    process = multiprocessing.get_context('fork').Process(target=func, args=args)
+    process.start()
+    process.join(timeout=30)
+    return process.exitcode
+
+
+def announce_jobs_in_worker(job_ids):
+    notify_students_of_jobs(Job.objects.filter(id__in=job_ids))
+
+
+def notify_in_worker(user_id):
+    Notification.objects.create(user_id=user_id, message='Your application was shortlisted')
+
+
+def mark_all_read_in_worker(user_id):
+    mark_all_read(CustomUser.objects.get(pk=user_id))
+
+
+class MyApplicationsViewTests(TestCase):
+    def setUp(self):
+        self.student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        self.client.force_login(self.student)
+
+    def add_applications(self, count):
+        applications = []
+        for i in range(count):
+            job = Job.objects.create(title=f'Engineer {i}', company=f'Company {i}')
+            resume = Resume.objects.create(student=self.student, file=f'resumes/resume_{i}.pdf')
+            applications.append(StudentApplication.objects.create(student=self.student, job=job, resume=resume))
+        return applications
+
+    def count_page_queries(self, query_string=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('my-applications') + query_string)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_does_not_grow_with_applications(self):
+        self.add_applications(1)
+        baseline, _ = self.count_page_queries()
+
+        applications = self.add_applications(59)
+        queries, response = self.count_page_queries()
+
+        self.assertEqual(queries, baseline)
+        self.assertEqual(response.context['total_applications'], 60)
+        self.assertContains(response, reverse('resume-download', args=[applications[-1].resume_id]))
+
+    def test_numeric_search_matches_application_id_exactly(self):
+        applications = self.add_applications(12)
+        target = applications[0]
+
+        _, response = self.count_page_queries(f'?q={target.id}')
+
+        self.assertEqual([app.id for app in response.context['applications']], [target.id])
+
+    def test_text_search_matches_company_and_title(self):
+        self.add_applications(3)
+
+        _, response = self.count_page_queries('?q=Company 2')
+
+        self.assertEqual([app.job.company for app in response.context['applications']], ['Company 2'])
+
+    def test_other_students_applications_are_not_listed(self):
+        other = CustomUser.objects.create_user('other', 'other@example.com', 'pass12345')
+        job = Job.objects.create(title='Analyst', company='Acme')
+        StudentApplication.objects.create(student=other, job=job)
+
+        _, response = self.count_page_queries()
+
+        self.assertEqual(response.context['total_applications'], 0)
+
+
+class CgpaEligibilityTests(TestCase):
+    def setUp(self):
+        self.student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        self.client.force_login(self.student)
+
+    def test_parse_cgpa_requirement(self):
+        self.assertEqual(parse_cgpa_requirement('7.5 CGPA'), Decimal('7.50'))
+        self.assertEqual(parse_cgpa_requirement('Min. 6.0/10'), Decimal('6.00'))
+        self.assertEqual(parse_cgpa_requirement('8 and above'), Decimal('8.00'))
+        self.assertIsNone(parse_cgpa_requirement('Not specified'))
+        self.assertIsNone(parse_cgpa_requirement(''))
+        # Not on the 10-point scale
+        self.assertIsNone(parse_cgpa_requirement('75% aggregate'))
+
+    def test_saving_a_job_keeps_min_cgpa_in_sync(self):
+        job = Job.objects.create(title='Engineer', company='Acme', cgpa_requirement='7.5 CGPA')
+        self.assertEqual(job.min_cgpa, Decimal('7.50'))
+
+        job.cgpa_requirement = 'No minimum'
+        job.save()
+        job.refresh_from_db()
+        self.assertIsNone(job.min_cgpa)
+
+    def eligible_titles(self):
+        response = self.client.get(reverse('job-list'), {'eligible': '1'})
+        return sorted(job.title for job in response.context['jobs'])
+
+    def test_eligible_filter_excludes_jobs_above_the_best_cgpa(self):
+        Job.objects.create(title='Reachable', company='Acme', cgpa_requirement='7.5 CGPA')
+        Job.objects.create(title='Too high', company='Acme', cgpa_requirement='Min. 9.0/10')
+        Job.objects.create(title='Open', company='Acme', cgpa_requirement='Not specified')
+        for cgpa in ('6.20', '7.80'):
+            EducationDetail.objects.create(
+                profile=self.student.profile, degree='B.Tech', institution='NIT', start_year=2021, cgpa=cgpa,
+            )
+
+        # Compared against the best of the student's CGPAs, in the same query
+        with CaptureQueriesContext(connection) as queries:
+            titles = self.eligible_titles()
+        self.assertEqual(titles, ['Open', 'Reachable'])
+        self.assertTrue(any('MAX' in query['sql'] for query in queries))
+
+    def test_student_without_a_cgpa_sees_only_jobs_without_a_minimum(self):
+        Job.objects.create(title='Reachable', company='Acme', cgpa_requirement='7.5 CGPA')
+        Job.objects.create(title='Open', company='Acme')
+
+        self.assertEqual(self.eligible_titles(), ['Open'])
+
+
+class ApplyForJobTests(TestCase):
+    def setUp(self):
+        self.student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        self.job = Job.objects.create(title='Engineer', company='Acme')
+        self.resume = Resume.objects.create(student=self.student, file='resumes/cv.pdf')
+        self.client.force_login(self.student)
+
+    def test_repeat_apply_is_ignored(self):
+        self.assertIsNotNone(apply_for_job(self.student, self.job, resume=self.resume))
+        self.assertIsNone(apply_for_job(self.student, self.job, resume=self.resume))
+
+        self.assertEqual(StudentApplication.objects.filter(student=self.student, job=self.job).count(), 1)
+        self.assertEqual(JobApplicationStat.objects.get(job=self.job, status='Applied').count, 1)
+
+    def test_double_submitted_form_creates_one_application(self):
+        url = reverse('job-detail', args=[self.job.id])
+        self.client.post(url, {'existing_resume': self.resume.id})
+        response = self.client.post(url, {'existing_resume': self.resume.id}, follow=True)
+
+        self.assertContains(response, 'You have already applied for this job.')
+        self.assertEqual(StudentApplication.objects.filter(student=self.student, job=self.job).count(), 1)
+
+
+class ConcurrentApplyLoadTests(TransactionTestCase):
+    """Fires many simultaneous applies for the same student and job, as a deadline rush would."""
+    WORKERS = 16
+    MAX_SECONDS_PER_APPLY = 2.0
+
+    def test_concurrent_applies_create_exactly_one_application(self):
+        student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        job = Job.objects.create(title='Engineer', company='Acme')
+        resume = Resume.objects.create(student=student, file='resumes/cv.pdf')
+
+        barrier = threading.Barrier(self.WORKERS)
+        results, latencies, errors = [], [], []
+
+        def apply():
+            try:
+                barrier.wait()
+                started = time.monotonic()
+                results.append(apply_for_job(student, job, resume=resume))
+                latencies.append(time.monotonic() - started)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=apply) for _ in range(self.WORKERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len([r for r in results if r is not None]), 1)
+        self.assertEqual(StudentApplication.objects.filter(student=student, job=job).count(), 1)
+        self.assertEqual(JobApplicationStat.objects.get(job=job, status='Applied').count, 1)
+        self.assertLess(max(latencies), self.MAX_SECONDS_PER_APPLY)
+
+
+class WriteQueryCountTests(TestCase):
+    """Saving a user or a profile writes only the rows and columns that changed."""
+
+    def setUp(self):
+        self.student = CustomUser.objects.create_user(
+            'student', 'student@example.com', 'pass12345', first_name='Asha', last_name='Rao',
+        )
+
+    def capture(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data)
+        # Savepoints depend on how many atomic blocks run, not on what is written
+        return response, [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+
+    def profile_writes(self, sql):
+        return [query for query in sql if query.startswith(('INSERT INTO "users_profile"', 'UPDATE "users_profile"'))]
+
+    def test_login_does_not_touch_the_profile(self):
+        response, sql = self.capture('post', reverse('login'), {'username': 'Student', 'password': 'pass12345'})
+
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        self.assertEqual([query for query in sql if 'users_profile' in query], [])
+        # User lookup, session key check and insert, last_login update, session update
+        self.assertEqual(len(sql), 5, sql)
+
+    def test_profile_edit_updates_only_changed_columns(self):
+        self.client.force_login(self.student)
+        data = {
+            'first_name': 'Asha', 'last_name': 'Rao', 'email': 'student@example.com',
+            'date_of_birth': '2003-04-05', 'phone_number': '98450 00000',
+        }
+        self.client.post(reverse('profile-edit'), data)
+
+        data['phone_number'] = '98450 11111'
+        response, sql = self.capture('post', reverse('profile-edit'), data)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual([query for query in sql if query.startswith('UPDATE "users_customuser"')], [])
+        writes = self.profile_writes(sql)
+        self.assertEqual(len(writes), 1, writes)
+        self.assertIn('SET "phone_number" = ', writes[0])
+        self.assertNotIn('"address"', writes[0])
+        self.assertEqual(Profile.objects.get(user=self.student).phone_number, '98450 11111')
+
+    def test_unchanged_profile_edit_writes_nothing(self):
+        self.client.force_login(self.student)
+        data = {'first_name': 'Asha', 'last_name': 'Rao', 'email': 'student@example.com', 'date_of_birth': '2003-04-05'}
+        self.client.post(reverse('profile-edit'), data)
+
+        response, sql = self.capture('post', reverse('profile-edit'), data)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual([query for query in sql if query.startswith(('UPDATE', 'INSERT'))], [])
+
+    def test_registration_inserts_user_and_profile_once(self):
+        response, sql = self.capture('post', reverse('register'), {
+            'full_name': 'Ravi Kumar', 'username': 'ravi', 'email': 'ravi@example.com',
+            'password': 'a-long-pass-phrase', 'confirm_password': 'a-long-pass-phrase',
+        })
+
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+        self.assertEqual(len([query for query in sql if query.startswith('INSERT INTO "users_customuser"')]), 1)
+        writes = self.profile_writes(sql)
+        self.assertEqual(len(writes), 1, writes)
+        self.assertTrue(writes[0].startswith('INSERT'))
+        # Username and email checks, the model's unique check, user insert, profile insert
+        self.assertEqual(len(sql), 5, sql)
+
+
+class JobListApiConditionalTests(TestCase):
+    def setUp(self):
+        self.student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        self.client.force_login(self.student)
+        self.jobs = [Job.objects.create(title=f'Engineer {i}', company='Acme') for i in range(2)]
+        # Everything last changed an hour ago
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Job.objects.update(updated_at=an_hour_ago)
+        ChangeMarker.objects.update(changed_at=an_hour_ago)
+
+    def test_deleting_a_job_advances_last_modified(self):
+        url = reverse('api-job-list')
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, headers={'If-Modified-Since': last_modified}).status_code, 304)
+
+        self.jobs[0].delete()
+
+        response = self.client.get(url, headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+
+
+class JobCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        self.client.force_login(self.student)
+        self.jobs = [Job.objects.create(title=f'Engineer {i}', company='Acme') for i in range(5)]
+
+    def get_job_list(self):
+        with mock.patch('users.job_cards.render_to_string', wraps=job_cards.render_to_string) as render:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('job-list'))
+        self.assertEqual(response.status_code, 200)
+        return response, render.call_count, len(queries)
+
+    def test_cached_cards_are_reused(self):
+        _, rendered, cold_queries = self.get_job_list()
+        self.assertEqual(rendered, len(self.jobs))
+
+        response, rendered, warm_queries = self.get_job_list()
+        self.assertEqual(rendered, 0)
+        self.assertLessEqual(warm_queries, cold_queries)
+        self.assertContains(response, 'Engineer 4')
+
+    def test_editing_a_job_rerenders_only_its_card(self):
+        self.get_job_list()
+
+        job = self.jobs[2]
+        job.title = 'Data Scientist'
+        job.save()
+
+        response, rendered, _ = self.get_job_list()
+        self.assertEqual(rendered, 1)
+        self.assertContains(response, 'Data Scientist')
+        self.assertNotContains(response, 'Engineer 2')
+
+    def test_deleting_a_job_drops_its_card(self):
+        self.get_job_list()
+        job_id = self.jobs[0].id
+
+        self.jobs[0].delete()
+
+        self.assertIsNone(cache.get(job_cards.job_card_cache_key(job_id)))
+        response, rendered, _ = self.get_job_list()
+        self.assertEqual(rendered, 0)
+        self.assertNotContains(response, 'Engineer 0')
+
+
+class ArchiveExpiredJobsTests(TestCase):
+    def setUp(self):
+        self.student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        self.client.force_login(self.student)
+        today = timezone.now().date()
+        self.expired = Job.objects.create(title='Expired', company='Acme', deadline=today - timedelta(days=1))
+        self.open = Job.objects.create(title='Open', company='Acme', deadline=today)
+        self.no_deadline = Job.objects.create(title='Rolling', company='Acme')
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Job.objects.update(updated_at=an_hour_ago)
+        self.an_hour_ago = an_hour_ago
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command('archive_expired_jobs', *args, stdout=out)
+        return out.getvalue()
+
+    def test_archives_only_expired_jobs_and_bumps_updated_at(self):
+        self.assertIn('Archived 1 expired job(s).', self.archive())
+
+        self.expired.refresh_from_db()
+        self.assertTrue(self.expired.is_archived)
+        self.assertIsNotNone(self.expired.archived_at)
+        self.assertGreater(self.expired.updated_at, self.an_hour_ago)
+        self.assertEqual(
+            set(Job.objects.filter(is_archived=False).values_list('title', flat=True)), {'Open', 'Rolling'},
+        )
+        self.assertFalse(Job.objects.filter(is_archived=False, updated_at__gt=self.an_hour_ago).exists())
+
+    def test_dry_run_changes_nothing(self):
+        self.assertIn('1 job(s) would be archived.', self.archive('--dry-run'))
+        self.assertFalse(Job.objects.filter(is_archived=True).exists())
+
+    def test_archived_jobs_move_from_the_job_list_to_past_openings(self):
+        self.archive()
+
+        self.assertNotIn(self.expired, Job.active.all())
+        active = self.client.get(reverse('job-list'))
+        self.assertEqual({job.title for job in active.context['jobs']}, {'Open', 'Rolling'})
+        past = self.client.get(reverse('past-job-list'))
+        self.assertEqual([job.title for job in past.context['jobs']], ['Expired'])
+
+    def test_applying_to_an_archived_job_is_refused(self):
+        self.archive()
+        resume = Resume.objects.create(student=self.student, file='resumes/cv.pdf')
+
+        url = reverse('job-detail', args=[self.expired.id])
+        response = self.client.post(url, {'existing_resume': resume.id}, follow=True)
+
+        self.assertContains(response, 'Applications for this job are closed.')
+        self.assertFalse(StudentApplication.objects.filter(job=self.expired).exists())
+
+
+JOB_IMPORT_CSV = """title,company,location,job_type,cgpa_requirement,salary_min,salary_max,deadline
+Backend Engineer,Acme,Pune,Full-time,7.5 CGPA,600000,900000,2030-01-31
+Data Analyst,Globex,,,,,,
+"""
+
+
+class JobImportTests(TestCase):
+    def import_file(self, content, name):
+        return read_job_definitions(SimpleUploadedFile(name, content.encode()))
+
+    def test_reads_csv_and_json(self):
+        rows = self.import_file(JOB_IMPORT_CSV, 'jobs.csv')
+        self.assertEqual([row['title'] for row in rows], ['Backend Engineer', 'Data Analyst'])
+
+        rows = self.import_file('[{"title": "Engineer", "company": "Acme"}]', 'jobs.json')
+        self.assertEqual(rows, [{'title': 'Engineer', 'company': 'Acme'}])
+
+    def test_unreadable_files_are_rejected(self):
+        for content, name in [('{"title": "x"}', 'jobs.json'), ('[{', 'jobs.json'), ('title', 'jobs.xlsx')]:
+            with self.subTest(name=name, content=content), self.assertRaises(JobImportError):
+                self.import_file(content, name)
+
+    def test_all_row_errors_are_reported_and_nothing_is_imported(self):
+        rows = [
+            {'title': 'Engineer', 'company': 'Acme'},
+            {'title': '', 'company': 'Globex'},
+            {'title': 'Analyst', 'company': 'Initech', 'salary_min': '900', 'salary_max': '100'},
+        ]
+
+        with self.assertRaises(JobImportError) as raised:
+            import_jobs(rows)
+
+        self.assertEqual(len(raised.exception.errors), 2)
+        self.assertTrue(raised.exception.errors[0].startswith('Row 2 (title):'))
+        self.assertTrue(raised.exception.errors[1].startswith('Row 3 (salary_max):'))
+        self.assertFalse(Job.objects.exists())
+        self.assertFalse(BackgroundTask.objects.exists())
+
+    def test_valid_batch_is_bulk_created_with_one_announcement(self):
+        rows = self.import_file(JOB_IMPORT_CSV, 'jobs.csv')
+
+        with CaptureQueriesContext(connection) as queries:
+            jobs = import_jobs(rows)
+
+        job_inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "users_job"')]
+        self.assertEqual(len(job_inserts), 1)
+        backend = Job.objects.get(title='Backend Engineer')
+        self.assertEqual(backend.min_cgpa, Decimal('7.50'))
+        # Blank cells keep the model defaults
+        analyst = Job.objects.get(title='Data Analyst')
+        self.assertEqual(analyst.location, Job._meta.get_field('location').default)
+
+        # One task announces the whole batch
+        task = BackgroundTask.objects.get()
+        self.assertEqual(task.name, 'users.announce_jobs')
+        self.assertEqual(sorted(task.kwargs['job_ids']), sorted(job.pk for job in jobs))
+        task_queue.execute_tasks(task_queue.claim_tasks())
+        self.assertEqual(BroadcastNotification.objects.count(), 2)
+
+    def test_admin_import_page(self):
+        admin_user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.client.force_login(admin_user)
+        url = reverse('admin:users_job_import')
+
+        response = self.client.post(url, {'file': SimpleUploadedFile('jobs.csv', JOB_IMPORT_CSV.encode())}, follow=True)
+        self.assertContains(response, 'Imported 2 job(s).')
+        self.assertEqual(Job.objects.count(), 2)
+
+        bad = SimpleUploadedFile('jobs.csv', b'title,company\n,Acme\n')
+        response = self.client.post(url, {'file': bad})
+        self.assertContains(response, 'Row 1 (title):')
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_import_jobs_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'jobs.csv')
+            with open(path, 'w') as file:
+                file.write(JOB_IMPORT_CSV)
+
+            out = StringIO()
+            call_command('import_jobs', path, '--dry-run', stdout=out)
+            self.assertIn('2 job(s) are valid', out.getvalue())
+            self.assertFalse(Job.objects.exists())
+
+            call_command('import_jobs', path, '--no-notify', stdout=StringIO())
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertFalse(BackgroundTask.objects.exists())
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        task_calls.clear()
+
+    def test_scheduling_options_do_not_clash_with_task_arguments(self):
+        later = timezone.now() + timedelta(hours=1)
+        row = record_call.enqueue_at(later, run_at='task argument', delay=5)
+
+        self.assertEqual(row.run_at, later)
+        self.assertEqual(row.kwargs, {'run_at': 'task argument', 'delay': 5})
+        self.assertEqual(task_queue.claim_tasks(), [])  # not due yet
+
+    def test_claim_marks_tasks_running_once(self):
+        row = record_call.enqueue(n=1)
+
+        claimed = task_queue.claim_tasks()
+
+        self.assertEqual([t.id for t in claimed], [row.id])
+        self.assertEqual(claimed[0].status, BackgroundTask.Status.RUNNING)
+        self.assertEqual(task_queue.claim_tasks(), [])
+
+    def test_batched_task_is_claimed_and_run_together(self):
+        for n in range(3):
+            record_batch.enqueue(n=n)
+
+        claimed = task_queue.claim_tasks()
+
+        self.assertEqual(len(claimed), 3)
+        self.assertIs(task_queue.execute_tasks(claimed), True)
+        self.assertEqual(task_calls, [('record_batch', [{'n': 0}, {'n': 1}, {'n': 2}])])
+        self.assertEqual(BackgroundTask.objects.filter(status=BackgroundTask.Status.DONE).count(), 3)
+
+    @override_settings(TASK_QUEUE_STALE_LOCK_TIMEOUT=60)
+    def test_stale_running_task_is_claimed_again(self):
+        row = record_call.enqueue(n=1)
+        task_queue.claim_tasks()
+        BackgroundTask.objects.filter(pk=row.pk).update(locked_at=timezone.now() - timedelta(seconds=30))
+        self.assertEqual(task_queue.claim_tasks(), [])  # still within the timeout
+
+        BackgroundTask.objects.filter(pk=row.pk).update(locked_at=timezone.now() - timedelta(seconds=61))
+        self.assertEqual([t.id for t in task_queue.claim_tasks()], [row.id])
+
+    @override_settings(TASK_QUEUE_RETRY_BACKOFF=600)
+    def test_failed_task_is_retried_with_backoff_then_fails(self):
+        row = always_fails.enqueue()
+
+        before = timezone.now()
+        with self.assertLogs('users.task_queue', 'ERROR'):
+            self.assertIs(task_queue.execute_tasks(task_queue.claim_tasks()), False)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (BackgroundTask.Status.QUEUED, 1))
+        self.assertGreaterEqual(row.run_at, before + timedelta(seconds=600))
+        self.assertIn('boom', row.last_error)
+
+        BackgroundTask.objects.filter(pk=row.pk).update(run_at=timezone.now())
+        with self.assertLogs('users.task_queue', 'ERROR'):
+            self.assertIs(task_queue.execute_tasks(task_queue.claim_tasks()), False)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (BackgroundTask.Status.FAILED, 2))
+        self.assertIsNotNone(row.finished_at)
+
+    def test_executing_nothing_succeeds(self):
+        self.assertIs(task_queue.execute_tasks([]), True)
+
+    @override_settings(TASK_QUEUE_EAGER=True)
+    def test_eager_mode_runs_immediately(self):
+        self.assertIsNone(record_call.enqueue(n=1))
+        self.assertIsNone(record_call.enqueue_at(timezone.now() + timedelta(days=1), n=2))
+
+        self.assertEqual(task_calls, [('record_call', {'n': 1}), ('record_call', {'n': 2})])
+        self.assertFalse(BackgroundTask.objects.exists())
+
+
+class BroadcastNotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        self.student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        CustomUser.objects.filter(pk=self.student.pk).update(date_joined=self.now - timedelta(days=1))
+        self.student.refresh_from_db()
+        self.job = Job.objects.create(title='Engineer', company='Acme')
+
+    def broadcast(self, message, hours_ago):
+        broadcast = BroadcastNotification.objects.create(job=self.job, message=message)
+        BroadcastNotification.objects.filter(pk=broadcast.pk).update(created_at=self.now - timedelta(hours=hours_ago))
+        return broadcast
+
+    def personal(self, message, hours_ago):
+        notification = Notification.objects.create(user=self.student, job=self.job, message=message)
+        Notification.objects.filter(pk=notification.pk).update(created_at=self.now - timedelta(hours=hours_ago))
+        return notification
+
+    def unread_messages(self, user=None):
+        return [n.message for n in unread_notifications_for(user or self.student)]
+
+    def test_personal_and_broadcast_notifications_are_merged_newest_first(self):
+        self.broadcast('broadcast 5h', 5)
+        self.personal('personal 4h', 4)
+        self.broadcast('broadcast 3h', 3)
+        self.personal('personal 2h', 2)
+        self.broadcast('broadcast 1h', 1)
+
+        self.assertEqual(self.unread_messages(), [
+            'broadcast 1h', 'personal 2h', 'broadcast 3h', 'personal 4h', 'broadcast 5h',
+        ])
+        self.assertEqual(get_unread_count(self.student), 5)
+
+    def test_watermark_hides_broadcasts_up_to_it(self):
+        self.broadcast('old', 3)
+        self.broadcast('new', 1)
+
+        mark_broadcasts_read(self.student, until=self.now - timedelta(hours=2))
+
+        self.assertEqual(self.unread_messages(), ['new'])
+        self.assertEqual(get_unread_count(self.student), 1)
+
+    def test_new_students_do_not_see_earlier_broadcasts(self):
+        self.broadcast('before they joined', 1)
+        newcomer = CustomUser.objects.create_user('newcomer', 'newcomer@example.com', 'pass12345')
+        self.broadcast('after they joined', -1)
+
+        self.assertEqual(self.unread_messages(newcomer), ['after they joined'])
+        self.assertEqual(self.unread_messages(), ['after they joined', 'before they joined'])
+
+    def test_watermark_never_moves_back(self):
+        self.broadcast('old', 3)
+        mark_broadcasts_read(self.student, until=self.now)
+
+        mark_broadcasts_read(self.student, until=self.now - timedelta(hours=4))
+
+        self.assertEqual(self.unread_messages(), [])
+
+    def test_mark_all_read_keeps_broadcasts_newer_than_the_page(self):
+        self.client.force_login(self.student)
+        self.broadcast('shown', 2)
+        self.personal('personal', 1)
+        page = self.client.get(reverse('notification-list'))
+        self.assertEqual(page.context['newest_broadcast'], self.now - timedelta(hours=2))
+        self.assertContains(page, 'name="broadcasts_until"')
+        # Announced while the page was open
+        self.broadcast('not shown', 1)
+
+        self.client.post(reverse('notifications-mark-all-read'), {
+            'broadcasts_until': page.context['newest_broadcast'].isoformat(),
+        })
+
+        self.assertEqual(self.unread_messages(), ['not shown'])
+        self.assertEqual(get_unread_count(self.student), 1)
+
+    def test_admins_get_no_broadcasts(self):
+        admin_user = CustomUser.objects.create_user(
+            'admin', 'admin@example.com', 'pass12345', role=CustomUser.Role.ADMIN,
+        )
+        self.broadcast('for students', -1)
+
+        self.assertEqual(self.unread_messages(admin_user), [])
+
+
+class UnreadCountTests(TransactionTestCase):
+    def test_broadcast_from_another_process_updates_the_cached_count(self):
+        student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        job = Job.objects.create(title='Engineer', company='Acme')
+        self.assertEqual(get_unread_count(student), 0)  # now cached in this process
+
+        self.assertEqual(run_in_another_process(announce_jobs_in_worker, [job.id]), 0)
+
+        self.assertEqual(get_unread_count(student), 1)
+
+    def test_personal_notification_from_another_process_updates_the_cached_count(self):
+        student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        self.assertEqual(get_unread_count(student), 0)
+
+        self.assertEqual(run_in_another_process(notify_in_worker, student.pk), 0)
+        self.assertEqual(get_unread_count(student), 1)
+
+        Notification.objects.filter(user=student).update(is_read=True)
+        self.assertEqual(run_in_another_process(mark_all_read_in_worker, student.pk), 0)
+        self.assertEqual(get_unread_count(student), 0)
+
+
+@override_settings(NOTIFICATION_STREAM_ENABLED=True)
+class NotificationStreamTests(TransactionTestCase):
+    def setUp(self):
+        self.student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        self.job = Job.objects.create(title='Engineer', company='Acme')
+
+    def test_worker_broadcast_reaches_a_subscriber_in_another_process(self):
+        socket_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(socket_dir.cleanup)
+        relay_hub = NotificationHub(socket_dir=socket_dir.name)
+
+        subscribed = threading.Event()
+        received = []
+
+        async def listen():
+            subscription = await relay_hub.subscribe(self.student.pk, is_student=True)
+            subscribed.set()
+            try:
+                received.append(await asyncio.wait_for(subscription.queue.get(), timeout=10))
+            finally:
+                relay_hub.unsubscribe(subscription)
+
+        # This process holds the stream, like an ASGI web worker
+        listener = threading.Thread(target=asyncio.run, args=(listen(),))
+        listener.start()
+        subscribed.wait(timeout=10)
+        # The forked worker inherits the patched hub but none of its subscribers
+        with mock.patch('users.notifications.hub', relay_hub):
+            exit_code = run_in_another_process(announce_jobs_in_worker, [self.job.id])
+        listener.join()
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]['job_id'], self.job.id)
+        self.assertIsNone(received[0]['user_id'])
+
+    async def read_stream(self, chunks, **headers):
+        response = await self.async_client.get(reverse('notification-stream'), headers=headers)
+        content = response.streaming_content
+        try:
+            return [(await anext(content)).decode() for _ in range(chunks)]
+        finally:
+            await content.aclose()
+
+    def test_reconnecting_client_receives_missed_events(self):
+        seen, missed = notify_students_of_jobs([self.job, Job.objects.create(title='Analyst', company='Acme')])
+        asyncio.run(self.async_client.aforce_login(self.student))
+
+        chunks = asyncio.run(self.read_stream(2, **{'Last-Event-ID': str(event_id_for(seen.created_at))}))
+
+        self.assertTrue(chunks[0].startswith('retry: '))
+        self.assertIn(f'id: {event_id_for(missed.created_at)}\n', chunks[1])
+        self.assertIn('"job_id": %d' % missed.job_id, chunks[1])
+
+    def test_stream_is_refused_under_wsgi(self):
+        self.client.force_login(self.student)
+
+        self.assertEqual(self.client.get(reverse('notification-stream')).status_code, 204)
+
+
+class CompactNotificationsTests(TestCase):
+    def setUp(self):
+        student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        self.old, self.recent = Notification.objects.bulk_create([
+            Notification(user=student, message='old', is_read=True),
+            Notification(user=student, message='recent', is_read=True),
+        ])
+        Notification.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timedelta(days=10))
+
+    def compact(self, **options):
+        call_command('compact_notifications', pause=0, stdout=StringIO(), **options)
+
+    @override_settings(NOTIFICATION_RETENTION={'read_after_days': 7, 'expired_jobs': False})
+    def test_retention_comes_from_settings(self):
+        self.compact()
+
+        self.assertEqual(list(Notification.objects.values_list('message', flat=True)), ['recent'])
+
+    @override_settings(NOTIFICATION_RETENTION={'read_after_days': None, 'expired_jobs': False})
+    def test_option_overrides_settings(self):
+        self.compact(read_after_days=30)
+        self.assertEqual(Notification.objects.count(), 2)
+
+        self.compact(read_after_days=7)
+        self.assertEqual(Notification.objects.count(), 1)
+
+
+class NotificationDigestTests(TestCase):
+    def setUp(self):
+        self.asha = CustomUser.objects.create_user('asha', 'asha@example.com', 'pass12345', first_name='Asha')
+        self.ravi = CustomUser.objects.create_user('ravi', 'ravi@example.com', 'pass12345')
+        CustomUser.objects.create_user('noemail', '', 'pass12345')
+        jobs = [Job.objects.create(title=f'Engineer {i}', company='Acme') for i in range(3)]
+        notify_students_of_jobs(jobs)
+        mark_all_read(self.ravi, broadcasts_until=BroadcastNotification.objects.latest('created_at').created_at)
+
+    def test_one_digest_per_student_with_unread_notifications(self):
+        stats = send_digests()
+
+        self.assertEqual(stats, {'students': 2, 'sent': 1})  # noemail is not scanned
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['asha@example.com'])
+        self.assertIn('Hi Asha', mail.outbox[0].body)
+        self.assertIn('Engineer 2', mail.outbox[0].body)
+
+        # Already sent for this period
+        self.assertEqual(send_digests()['sent'], 0)
+
+    @override_settings(NOTIFICATION_DIGEST={'period_days': 1, 'chunk_size': 1, 'max_per_second': None, 'max_items': 2})
+    def test_options_come_from_settings(self):
+        self.assertEqual(send_digests()['sent'], 1)
+
+        self.assertIn('...and 1 more.', mail.outbox[0].body)
+
+    def test_dry_run_sends_nothing(self):
+        self.assertEqual(send_digests(dry_run=True)['sent'], 1)
+
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(send_digests()['sent'], 1)
+
+    def test_file_backend(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.filebased.EmailBackend', EMAIL_FILE_PATH=directory,
+            ):
+                self.assertEqual(send_digests()['sent'], 1)
+            files = os.listdir(directory)
+            self.assertEqual(len(files), 1)
+            with open(os.path.join(directory, files[0])) as file:
+                self.assertIn('To: asha@example.com', file.read())
+
+
+class AdminListTests(TestCase):
+    def setUp(self):
+        admin_user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.client.force_login(admin_user)
+        student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        for company in ('Acme', 'Globex'):
+            StudentApplication.objects.create(student=student, job=Job.objects.create(title='Engineer', company=company))
+
+    def test_company_filter_is_a_text_box(self):
+        url = reverse('admin:users_studentapplication_changelist')
+
+        response = self.client.get(url)
+        self.assertContains(response, 'name="company"')
+        self.assertContains(response, '2 student applications')
+
+        response = self.client.get(url, {'company': 'glo'})
+        self.assertContains(response, '1 student application')
+
+    def test_estimated_count_uses_the_largest_primary_key(self):
+        self.assertEqual(estimate_row_count(Job), Job.objects.latest('pk').pk)
+
+
+class PipelineCounterTests(TestCase):
+    def setUp(self):
+        self.job = Job.objects.create(title='Engineer', company='Acme')
+        for i in range(5):
+            student = CustomUser.objects.create_user(f'student{i}', f'student{i}@example.com', 'pass12345')
+            StudentApplication.objects.create(student=student, job=self.job)
+
+    def counts(self):
+        return dict(JobApplicationStat.objects.filter(job=self.job, count__gt=0).values_list('status', 'count'))
+
+    def test_iterating_without_status_does_not_fetch_it(self):
+        with self.assertNumQueries(1):
+            ids = [application.id for application in StudentApplication.objects.only('id')]
+        self.assertEqual(len(ids), 5)
+
+    def test_status_change_on_a_deferred_instance_moves_the_count(self):
+        application = StudentApplication.objects.only('id', 'job').first()
+        application.status = 'Shortlisted'
+        application.save()
+
+        self.assertEqual(self.counts(), {'Applied': 4, 'Shortlisted': 1})
+
+    def test_deleting_a_deferred_instance_decrements_its_status(self):
+        StudentApplication.objects.only('id').first().delete()
+
+        self.assertEqual(self.counts(), {'Applied': 4})
+
+    def test_bulk_status_change_moves_counts_and_notifies(self):
+        rejected = StudentApplication.objects.first()
+        rejected.status = 'Rejected'
+        rejected.save()
+
+        self.assertEqual(set_application_status(StudentApplication.objects.all(), 'Shortlisted'), 5)
+
+        self.assertEqual(self.counts(), {'Shortlisted': 5})
+        self.assertEqual(Notification.objects.count(), 5)
+        self.assertEqual(set_application_status(StudentApplication.objects.all(), 'Shortlisted'), 0)
+
+    def test_bulk_status_change_racing_another_change_counts_once(self):
+        racer = StudentApplication.objects.first()
+        original_update = QuerySet.update
+        raced = []
+
+        def update_after_a_concurrent_change(queryset, **kwargs):
+            if queryset.model is StudentApplication and not raced:
+                # Someone rejects an application between our read and our UPDATE
+                raced.append(True)
+                application = StudentApplication.objects.get(pk=racer.pk)
+                application.status = 'Rejected'
+                application.save()
+            return original_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=update_after_a_concurrent_change):
+            self.assertEqual(set_application_status(StudentApplication.objects.all(), 'Shortlisted'), 5)
+
+        self.assertEqual(self.counts(), {'Shortlisted': 5})
+        self.assertEqual(reconcile_application_stats(dry_run=True), [])
+        self.assertEqual(Notification.objects.count(), 5)
+
+
+class ApplicantExportTests(TestCase):
+    def test_csv_neutralises_formulas(self):
+        student = CustomUser.objects.create_user(
+            'student', 'student@example.com', 'pass12345', first_name='=HYPERLINK("http://evil")', last_name='@SUM(A1)',
+        )
+        Profile.objects.filter(user=student).update(phone_number='+91 98450 00000')
+        job = Job.objects.create(title='-Engineer', company='Acme')
+        StudentApplication.objects.create(student=student, job=job)
+
+        header, row = csv.reader(''.join(stream_applicants_csv(StudentApplication.objects.all())).splitlines())
+        row = dict(zip(header, row))
+
+        self.assertEqual(row['First name'], '\'=HYPERLINK("http://evil")')
+        self.assertEqual(row['Last name'], "'@SUM(A1)")
+        self.assertEqual(row['Job'], "'-Engineer")
+        self.assertEqual(row['Phone'], "'+91 98450 00000")
+        self.assertEqual(row['Username'], 'student')
+        self.assertEqual(row['Company'], 'Acme')
+
+    def test_resume_zip_streams_every_resume(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        job = Job.objects.create(title='Engineer', company='Acme Corp')
+        # Bigger than one storage chunk, so the member is written in several pieces
+        large = os.urandom(200 * 1024)
+        contents = {}
+        for username, content in [('asha', large), ('ravi', b'%PDF-1.4 ravi')]:
+            student = CustomUser.objects.create_user(username, f'{username}@example.com', 'pass12345')
+            resume = Resume.objects.create(
+                student=student, file=default_storage.save('resumes/cv.pdf', ContentFile(content)),
+            )
+            application = StudentApplication.objects.create(student=student, job=job, resume=resume)
+            contents[f'acme-corp-{job.id}/{username}-{application.id}-{os.path.basename(resume.file.name)}'] = content
+        lost = CustomUser.objects.create_user('lost', 'lost@example.com', 'pass12345')
+        StudentApplication.objects.create(
+            student=lost, job=job, resume=Resume.objects.create(student=lost, file='resumes/gone.pdf'),
+        )
+
+        chunks = list(stream_resume_zip(StudentApplication.objects.all()))
+
+        self.assertGreater(len(chunks), 3)
+        with zipfile.ZipFile(BytesIO(b''.join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.namelist(), [*contents, 'MISSING.txt'])
+            for name, content in contents.items():
+                self.assertEqual(archive.read(name), content)
+            self.assertEqual(archive.read('MISSING.txt'), b'resumes/gone.pdf\n')
+
+    def test_resume_zip_member_names_are_never_repeated(self):
+        job = Job.objects.create(title='Engineer', company='Acme')
+        student = CustomUser.objects.create_user('asha', 'asha@example.com', 'pass12345')
+        application = StudentApplication.objects.create(
+            student=student, job=job, resume=Resume.objects.create(student=student, file='resumes/cv.pdf'),
+        )
+        used_names = set()
+
+        first = _resume_archive_name(application, used_names)
+        second = _resume_archive_name(application, used_names)
+
+        self.assertEqual(first, f'acme-{job.id}/asha-{application.id}-cv.pdf')
+        self.assertEqual(second, f'acme-{job.id}/asha-{application.id}-cv-1.pdf')
+        self.assertEqual(used_names, {first, second})
+
+
+def pdf_upload(content=b'resume', name='cv.pdf'):
+    return SimpleUploadedFile(name, b'%PDF-1.4\n' + content, content_type='application/pdf')
+
+
+class ResumeBlobTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+
+    def run_queued_tasks(self):
+        # Blob files are removed on commit of the task's delete
+        with self.captureOnCommitCallbacks(execute=True):
+            while tasks := task_queue.claim_tasks():
+                task_queue.execute_tasks(tasks)
+
+    def test_identical_uploads_share_one_blob(self):
+        first = store_resume(self.student, pdf_upload())
+        second = store_resume(self.student, pdf_upload(name='copy.pdf'))
+
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(ResumeBlob.objects.get().ref_count, 2)
+        self.assertEqual(default_storage.listdir(f'resumes/blobs/{first.blob_id[:2]}')[1], [f'{first.blob_id}.pdf'])
+
+    def test_shared_blob_survives_one_delete(self):
+        first = store_resume(self.student, pdf_upload())
+        second = store_resume(self.student, pdf_upload())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.run_queued_tasks()
+
+        self.assertEqual(ResumeBlob.objects.get().ref_count, 1)
+        self.assertTrue(default_storage.exists(second.file.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.run_queued_tasks()
+
+        self.assertFalse(ResumeBlob.objects.exists())
+        self.assertFalse(default_storage.exists(second.file.name))
+
+    def age_file(self, name, seconds):
+        path = default_storage.path(name)
+        then = time.time() - seconds
+        os.utime(path, (then, then))
+
+    def test_rolled_back_upload_removes_its_new_file_after_the_grace_period(self):
+        job = Job.objects.create(title='Engineer', company='Acme')
+        apply_for_job(self.student, job, new_resume_file=pdf_upload(b'first'))
+        upload = pdf_upload(b'second')
+        digest, _ = hash_file(upload)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(apply_for_job(self.student, job, new_resume_file=upload))
+
+        self.assertEqual(Resume.objects.count(), 1)
+        self.assertFalse(ResumeBlob.objects.filter(digest=digest).exists())
+        self.assertTrue(default_storage.exists(blob_name(digest)))
+        # Not due until the grace period is over
+        self.run_queued_tasks()
+        self.assertTrue(default_storage.exists(blob_name(digest)))
+
+        self.age_file(blob_name(digest), settings.RESUME_ORPHAN_GRACE_PERIOD + 1)
+        BackgroundTask.objects.filter(name='users.delete_resume_blob').update(run_at=timezone.now())
+        self.run_queued_tasks()
+        self.assertFalse(default_storage.exists(blob_name(digest)))
+
+    def test_file_without_a_row_is_kept_during_the_grace_period(self):
+        # As left by an upload that has written its file but not committed its row yet
+        digest = 'a' * 64
+        default_storage.save(blob_name(digest), ContentFile(b'%PDF-1.4 in flight'))
+
+        self.assertFalse(delete_blob_if_unreferenced(digest))
+        self.assertEqual(list(orphaned_blob_files()), [])
+        call_command('dedupe_resumes', '--remove-orphans', stdout=StringIO())
+        self.assertTrue(default_storage.exists(blob_name(digest)))
+
+        self.age_file(blob_name(digest), settings.RESUME_ORPHAN_GRACE_PERIOD + 1)
+        self.assertEqual(list(orphaned_blob_files()), [blob_name(digest)])
+        call_command('dedupe_resumes', '--remove-orphans', stdout=StringIO())
+        self.assertFalse(default_storage.exists(blob_name(digest)))
+
+    def test_blob_file_is_removed_only_after_its_row_delete_commits(self):
+        resume = store_resume(self.student, pdf_upload())
+        Resume.objects.filter(pk=resume.pk).delete()
+        ResumeBlob.objects.update(ref_count=0)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertTrue(delete_blob_if_unreferenced(resume.blob_id))
+        self.assertFalse(ResumeBlob.objects.exists())
+        self.assertTrue(default_storage.exists(resume.file.name))
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(default_storage.exists(resume.file.name))
+
+    def test_blob_still_used_by_a_resume_is_not_deleted(self):
+        resume = store_resume(self.student, pdf_upload())
+        # A drifted count must not take the file from under the resume
+        ResumeBlob.objects.update(ref_count=0)
+
+        self.assertFalse(delete_blob_if_unreferenced(resume.blob_id))
+        self.assertTrue(ResumeBlob.objects.filter(digest=resume.blob_id).exists())
+        self.assertTrue(default_storage.exists(resume.file.name))
+
+    def test_rolled_back_upload_keeps_a_shared_file(self):
+        job = Job.objects.create(title='Engineer', company='Acme')
+        resume = store_resume(self.student, pdf_upload())
+        apply_for_job(self.student, job, resume=resume)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(apply_for_job(self.student, job, new_resume_file=pdf_upload()))
+        self.run_queued_tasks()
+
+        self.assertEqual(ResumeBlob.objects.get().ref_count, 1)
+        self.assertTrue(default_storage.exists(resume.file.name))
+
+
+def make_pdf(lines, compress=False):
+    """A minimal one-page PDF that draws each of `lines` with Tj, as simple resume builders do."""
+    def escape(text):
+        return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    content = 'BT /F1 12 Tf 72 720 Td ' + ' T* '.join(f'({escape(line)}) Tj' for line in lines) + ' ET'
+    stream = content.encode('latin-1')
+    stream_dict = f'<< /Length {len(stream)} >>'
+    if compress:
+        stream = zlib.compress(stream)
+        stream_dict = f'<< /Length {len(stream)} /Filter /FlateDecode >>'
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        stream_dict.encode() + b'\nstream\n' + stream + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    pdf = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f'{number} 0 obj\n'.encode() + body + b'\nendobj\n'
+    xref = len(pdf)
+    pdf += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    pdf += b''.join(f'{offset:010d} 00000 n \n'.encode() for offset in offsets)
+    pdf += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return pdf
+
+
+class ResumeSearchTests(TestCase):
+    RESUMES = {
+        'asha': ['Backend developer', 'Python, Django (REST) and PostgreSQL', 'Python scripting'],
+        'ravi': ['Frontend developer', 'React, Node.js and CSS', 'Some Python'],
+        'meera': ['Data analyst', 'Excel, SQL and Tableau'],
+    }
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.resumes = {}
+        for i, (username, lines) in enumerate(self.RESUMES.items()):
+            student = CustomUser.objects.create_user(username, f'{username}@example.com', 'pass12345')
+            upload = SimpleUploadedFile(f'{username}.pdf', make_pdf(lines, compress=i % 2 == 1))
+            self.resumes[username] = store_resume(student, upload)
+
+    def test_pdf_text_reads_plain_and_compressed_streams(self):
+        for compress in (False, True):
+            with self.subTest(compress=compress):
+                text = extract_pdf_text(make_pdf(['Python developer', 'Django (REST) APIs'], compress=compress))
+                self.assertEqual(text.split(), ['Python', 'developer', 'Django', '(REST)', 'APIs'])
+
+    def test_pdf_text_never_raises(self):
+        digest, text, error = extract_text_safely(('abc', None))
+        self.assertEqual((digest, text), ('abc', ''))
+        self.assertTrue(error)
+
+    def test_tokenize_keeps_technical_terms(self):
+        self.assertEqual(
+            tokenize('C++, Node.js and CI/CD at the Café; R and a C# API.'),
+            ['c++', 'node.js', 'ci/cd', 'cafe', 'r', 'c#', 'api'],
+        )
+
+    def test_index_resumes_queues_or_indexes_pending_blobs(self):
+        out = StringIO()
+        call_command('index_resumes', stdout=out)
+        self.assertIn('Queued 3 resume(s)', out.getvalue())
+
+        call_command('index_resumes', '--now', '--processes', '1', stdout=StringIO())
+        self.assertEqual(ResumeText.objects.count(), 3)
+        self.assertIn('Django', ResumeText.objects.get(blob_id=self.resumes['asha'].blob_id).text)
+
+        out = StringIO()
+        call_command('index_resumes', '--now', stdout=out)
+        self.assertIn('up to date', out.getvalue())
+
+    def test_batch_is_parsed_in_spawned_processes_and_bumps_the_marker_once(self):
+        generation, _ = ChangeMarker.read(ChangeMarker.RESUME_INDEX)
+
+        self.assertEqual(index_blobs([resume.blob_id for resume in self.resumes.values()], processes=2), 3)
+
+        self.assertEqual(ChangeMarker.read(ChangeMarker.RESUME_INDEX)[0], generation + 1)
+        self.assertFalse(ResumeText.objects.exclude(error='').exists())
+        self.assertEqual(ResumeTerm.objects.filter(term='python').count(), 2)
+
+    def test_bm25_ranks_more_and_rarer_matches_first(self):
+        index_blobs([resume.blob_id for resume in self.resumes.values()], processes=1)
+        digests = {resume.blob_id: username for username, resume in self.resumes.items()}
+
+        ranked = [digests[digest] for digest, _ in search_resumes('python django')]
+        self.assertEqual(ranked, ['asha', 'ravi'])
+        self.assertEqual([digests[digest] for digest, _ in search_resumes('sql')], ['meera'])
+        self.assertEqual(search_resumes('kubernetes'), [])
+        self.assertEqual(search_resumes('the and'), [])
+
+    def test_admin_search_orders_by_rank(self):
+        index_blobs([resume.blob_id for resume in self.resumes.values()], processes=1)
+        admin_user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.client.force_login(admin_user)
+        url = reverse('admin:users_resume_changelist')
+
+        response = self.client.get(url, {'q': 'python django'})
+        self.assertEqual([r.student.username for r in response.context['cl'].result_list], ['asha', 'ravi'])
+
+        # A username matches too, below the content matches
+        response = self.client.get(url, {'q': 'meera'})
+        self.assertEqual([r.student.username for r in response.context['cl'].result_list], ['meera'])
+
+        # A clicked column header wins over the rank
+        response = self.client.get(url, {'q': 'python', 'o': '-1'})
+        self.assertEqual([r.student.username for r in response.context['cl'].result_list], ['ravi', 'asha'])
+
+
+class RelevanceTests(TestCase):
+    def setUp(self):
+        self.job = Job.objects.create(title='Backend Engineer', company='Acme', required_skills='Python, Django, SQL')
+        for i, text in enumerate(['python django sql developer', 'java spring developer']):
+            student = CustomUser.objects.create_user(f'student{i}', f'student{i}@example.com', 'pass12345')
+            digest = f'{i}' * 64
+            blob = ResumeBlob.objects.create(digest=digest, file=blob_name(digest), size=1, ref_count=1)
+            resume = Resume.objects.create(student=student, file=blob.file.name, blob=blob)
+            save_index(digest, text)
+            StudentApplication.objects.create(student=student, job=self.job, resume=resume)
+        student = CustomUser.objects.create_user('noresume', 'noresume@example.com', 'pass12345')
+        StudentApplication.objects.create(student=student, job=self.job)
+
+    def test_version_token_depends_only_on_stored_inputs(self):
+        token = job_vector_token(self.job)
+        cache.clear()
+        self.assertEqual(job_vector_token(self.job), token)
+
+        save_index('0' * 64, 'python django sql developer')
+        self.assertNotEqual(job_vector_token(self.job), token)
+
+    def test_refreshed_scores_stay_fresh(self):
+        self.assertTrue(has_stale_scores(self.job))
+        self.assertEqual(refresh_relevance_scores(self.job), 3)
+
+        cache.clear()  # as in another process, or after the job vector expired
+        self.assertFalse(has_stale_scores(self.job))
+        self.assertEqual(refresh_relevance_scores(self.job), 0)
+
+        scores = dict(StudentApplication.objects.values_list('student__username', 'relevance_score'))
+        self.assertGreater(scores['student0'], scores['student1'])
+        self.assertEqual(scores['noresume'], 0)
+
+    def test_admin_queues_the_refresh_instead_of_scoring(self):
+        admin_user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.client.force_login(admin_user)
+        url = reverse('admin:users_studentapplication_changelist')
+
+        response = self.client.get(url, {'job__id__exact': self.job.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(StudentApplication.objects.filter(relevance_score__isnull=False).exists())
+        queued = BackgroundTask.objects.filter(name='users.refresh_relevance')
+        self.assertEqual(queued.get().kwargs, {'job_id': self.job.id})
+
+        task_queue.execute_tasks(list(queued))
+        self.assertFalse(StudentApplication.objects.filter(relevance_score__isnull=True).exists())
+
+        self.client.get(url, {'job__id__exact': self.job.id})
+        self.assertEqual(queued.count(), 1)
+
+    def test_recompute_action_queues_one_refresh_per_job(self):
+        admin_user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.client.force_login(admin_user)
+        url = reverse('admin:users_studentapplication_changelist')
+
+        response = self.client.post(url, {
+            'action': 'recompute_relevance',
+            '_selected_action': list(StudentApplication.objects.values_list('pk', flat=True)),
+        }, follow=True)
+
+        self.assertContains(response, 'Queued relevance scoring for 1 job(s).')
+        self.assertFalse(StudentApplication.objects.filter(relevance_score__isnull=False).exists())
+        queued = BackgroundTask.objects.filter(name='users.refresh_relevance')
+        self.assertEqual([task.kwargs for task in queued], [{'job_id': self.job.id}])
+
+
+class ResumeUploadTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        self.client.force_login(self.student)
+
+    def upload(self, upload, client=None, **data):
+        return (client or self.client).post(reverse('resume-management'), {'file': upload, **data})
+
+    def assertRejected(self, response, message):
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(message, ' '.join(response.context['form'].errors['file']))
+        self.assertFalse(Resume.objects.exists())
+
+    def test_digest_matches_hash_file(self):
+        for memory_limit in (settings.FILE_UPLOAD_MAX_MEMORY_SIZE, 0):  # in memory, then a temporary file
+            with self.subTest(memory_limit=memory_limit), override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=memory_limit):
+                content = f'{memory_limit}'.encode() * 1000
+                # The handler hashed it while receiving it, so storing doesn't read it again
+                with mock.patch('users.resume_storage.hash_file', side_effect=AssertionError("hashed twice")):
+                    response = self.upload(pdf_upload(content))
+
+                self.assertRedirects(response, reverse('resume-management'), fetch_redirect_response=False)
+                self.assertEqual(Resume.objects.latest('id').blob_id, hash_file(pdf_upload(content))[0])
+
+    def test_rejects_files_that_are_not_pdfs(self):
+        upload = SimpleUploadedFile('cv.pdf', b'MZ\x90\x00 not a pdf', content_type='application/pdf')
+
+        self.assertRejected(self.upload(upload), 'Only PDF files are allowed.')
+
+    @override_settings(RESUME_UPLOAD_MAX_SIZE=1024)
+    def test_rejects_oversized_files(self):
+        self.assertRejected(self.upload(pdf_upload(b'x' * 2048)), 'The file is too large')
+
+    def test_rejects_empty_files(self):
+        self.assertRejected(self.upload(SimpleUploadedFile('cv.pdf', b'')), 'The submitted file is empty.')
+
+    def test_csrf_is_still_enforced(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.student)
+
+        self.assertEqual(self.upload(pdf_upload(), client=client).status_code, 403)
+
+        client.get(reverse('resume-management'))
+        token = client.cookies[settings.CSRF_COOKIE_NAME].value
+        response = self.upload(pdf_upload(), client=client, csrfmiddlewaretoken=token)
+        self.assertRedirects(response, reverse('resume-management'), fetch_redirect_response=False)
+
+
+class ResumeDownloadTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+        self.content = b'%PDF-1.4\n' + os.urandom(150 * 1024)
+        self.resume = store_resume(self.student, SimpleUploadedFile('cv.pdf', self.content))
+        self.url = reverse('resume-download', args=[self.resume.id])
+        self.client.force_login(self.student)
+
+    def get(self, headers=None):
+        response = self.client.get(self.url, headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_owner_and_admin_get_the_file_and_other_students_a_404(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['ETag'], f'"{self.resume.blob_id}"')
+
+        other = CustomUser.objects.create_user('other', 'other@example.com', 'pass12345')
+        self.client.force_login(other)
+        self.assertEqual(self.get()[0].status_code, 404)
+
+        self.client.force_login(CustomUser.objects.create_superuser('admin', 'admin@example.com', 'pass12345'))
+        response, body = self.get()
+        self.assertEqual((response.status_code, body), (200, self.content))
+
+    def test_matching_if_none_match_is_not_modified(self):
+        etag = self.get()[0]['ETag']
+
+        response, body = self.get({'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(body, b'')
+
+    def test_range_requests(self):
+        size = len(self.content)
+        for header, start, end in [('bytes=0-99', 0, 99), ('bytes=1000-', 1000, size - 1), ('bytes=-10', size - 10, size - 1)]:
+            with self.subTest(range=header):
+                response, body = self.get({'Range': header})
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{size}')
+                self.assertEqual(body, self.content[start:end + 1])
+
+    def test_unsatisfiable_range(self):
+        response, _ = self.get({'Range': f'bytes={len(self.content)}-'})
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_range_with_a_stale_if_range_gets_the_whole_file(self):
+        etag = self.get()[0]['ETag']
+
+        response, body = self.get({'Range': 'bytes=0-99', 'If-Range': '"stale"'})
+        self.assertEqual((response.status_code, body), (200, self.content))
+
+        response, body = self.get({'Range': 'bytes=0-99', 'If-Range': etag})
+        self.assertEqual((response.status_code, body), (206, self.content[:100]))
+
+    @override_settings(PROTECTED_MEDIA_SENDFILE='x-accel-redirect', PROTECTED_MEDIA_INTERNAL_URL='/internal/')
+    def test_sendfile_hands_the_file_to_the_front_end_server(self):
+        response, body = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/internal/{self.resume.file.name}')
+        self.assertEqual(body, b'')
+
+
+class LoginTests(TestCase):
+    PASSWORD = 'pass12345'
+
+    def log_in(self, username, password=PASSWORD):
+        response = self.client.post(reverse('login'), {'username': username, 'password': password})
+        return response, self.client.session.get('_auth_user_id')
+
+    def test_login_ignores_case(self):
+        student = CustomUser.objects.create_user('student', 'student@example.com', self.PASSWORD)
+
+        response, user_id = self.log_in('Student')
+
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        self.assertEqual(user_id, str(student.pk))
+
+    def test_exact_spelling_wins_between_legacy_accounts(self):
+        # Created before usernames were unique regardless of case
+        upper = CustomUser.objects.create_user('Asha', 'asha1@example.com', 'upper-password')
+        lower = CustomUser.objects.create_user('asha', 'asha2@example.com', 'lower-password')
+
+        self.assertEqual(self.log_in('Asha', 'upper-password')[1], str(upper.pk))
+        self.client.logout()
+        self.assertEqual(self.log_in('asha', 'lower-password')[1], str(lower.pk))
+        self.client.logout()
+        self.assertIsNone(self.log_in('Asha', 'lower-password')[1])
+
+    def test_registration_rejects_a_username_differing_only_in_case(self):
+        CustomUser.objects.create_user('student', 'student@example.com', self.PASSWORD)
+
+        response = self.client.post(reverse('register'), {
+            'full_name': 'Other Student', 'username': 'STUDENT', 'email': 'other@example.com',
+            'password': 'a-long-pass-phrase', 'confirm_password': 'a-long-pass-phrase',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('username', response.context['form'].errors)
+        self.assertEqual(CustomUser.objects.count(), 1)
+
+    def test_pbkdf2_hash_is_upgraded_on_login(self):
+        student = CustomUser.objects.create_user('student', 'student@example.com')
+        CustomUser.objects.filter(pk=student.pk).update(password=make_password(self.PASSWORD, hasher='pbkdf2_sha256'))
+
+        self.log_in('student')
+
+        student.refresh_from_db()
+        self.assertTrue(student.password.startswith(f'{get_hasher().algorithm}$'))
+        self.assertTrue(student.check_password(self.PASSWORD))
+
+    def test_hash_costs_follow_the_policy_setting(self):
+        hasher = get_hasher('scrypt')
+        encoded = make_password(self.PASSWORD, hasher='scrypt')
+        policy = {**settings.PASSWORD_HASH_POLICY, 'scrypt': {'work_factor': 2 ** 12, 'block_size': 8, 'parallelism': 1}}
+
+        with override_settings(PASSWORD_HASH_POLICY=policy):
+            self.assertEqual(hasher.work_factor, 2 ** 12)
+            self.assertTrue(hasher.must_update(encoded))
+            self.assertTrue(make_password(self.PASSWORD, hasher='scrypt').startswith('scrypt$4096$'))
+        self.assertFalse(hasher.must_update(encoded))
+
+
+class StudentImportTests(TestCase):
+    CSV = (
+        "College_ID,email,full_name,password,CGPA\n"
+        "CS001,asha@example.com,Asha Rao,first-pass-123,8.1\n"
+        "CS002,,Ravi Kumar,,7.4\n"
+        "CS003,meena@example.com,Meena,,9.0\n"
+    )
+
+    def rows(self, content=CSV):
+        return read_student_rows(StringIO(content))
+
+    def test_validation_lists_every_problem(self):
+        rows = self.rows(
+            "College_ID,email\n"
+            ",blank@example.com\n"
+            "CS 004,\n"
+            "CS005,not-an-email\n"
+            "CS006,\n"
+            "cs006,\n"
+        )
+
+        with self.assertRaises(StudentImportError) as raised:
+            validate_student_rows(rows)
+
+        errors = raised.exception.errors
+        self.assertEqual(len(errors), 4, errors)
+        self.assertIn('Row 1: College_ID is empty.', errors)
+        self.assertTrue(errors[1].startswith('Row 2 (CS 004)'))
+        self.assertTrue(errors[2].startswith('Row 3 (CS005)'))
+        self.assertIn('Row 5: College_ID cs006 is already on row 4.', errors)
+        self.assertFalse(CustomUser.objects.exists())
+
+    def test_missing_id_column_and_empty_file(self):
+        with self.assertRaises(StudentImportError):
+            self.rows("Student,email\nCS001,\n")
+        with self.assertRaises(StudentImportError):
+            validate_student_rows(self.rows("College_ID,email\n"))
+
+    def test_creates_students_with_profiles_and_skips_existing_ones(self):
+        CustomUser.objects.create_user('cs001', 'old@example.com', 'old-pass-123')
+
+        created, generated, skipped = import_students(self.rows(), activate=True, processes=1)
+
+        self.assertEqual(sorted(user.username for user in created), ['CS002', 'CS003'])
+        self.assertEqual(skipped, 1)
+        self.assertEqual(sorted(generated), ['CS002', 'CS003'])
+        ravi = CustomUser.objects.get(username='CS002')
+        self.assertEqual((ravi.first_name, ravi.last_name, ravi.is_active), ('Ravi', 'Kumar', True))
+        self.assertTrue(ravi.check_password(generated['CS002']))
+        self.assertEqual(Profile.objects.filter(user__in=created).count(), 2)
+        # The existing account is untouched
+        self.assertTrue(CustomUser.objects.get(username='cs001').check_password('old-pass-123'))
+
+    def test_command_writes_the_generated_passwords(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        source = os.path.join(directory.name, 'students.csv')
+        credentials = os.path.join(directory.name, 'credentials.csv')
+        with open(source, 'w') as file:
+            file.write(self.CSV)
+
+        call_command('import_students', source, credentials_out=credentials, processes=1, stdout=StringIO())
+
+        with open(credentials, newline='') as file:
+            written = list(csv.reader(file))
+        self.assertEqual(written[0], ['College_ID', 'password'])
+        self.assertEqual([row[0] for row in written[1:]], ['CS002', 'CS003'])
+        self.assertTrue(CustomUser.objects.get(username='CS003').check_password(written[2][1]))
+        self.assertFalse(CustomUser.objects.get(username='CS003').is_active)
+        self.assertEqual(os.stat(credentials).st_mode & 0o777, 0o600)
+
+        # Never overwrites an earlier batch's passwords
+        with self.assertRaises(CommandError):
+            call_command('import_students', source, credentials_out=credentials, processes=1, stdout=StringIO())
+
+    def test_failed_import_removes_the_credentials_file(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        source = os.path.join(directory.name, 'students.csv')
+        credentials = os.path.join(directory.name, 'credentials.csv')
+        with open(source, 'w') as file:
+            file.write(self.CSV)
+
+        failing = mock.patch(
+            'users.management.commands.import_students.import_students', side_effect=IntegrityError("boom"),
+        )
+        with failing, self.assertRaises(IntegrityError):
+            call_command('import_students', source, credentials_out=credentials, processes=1, stdout=StringIO())
+
+        self.assertFalse(os.path.exists(credentials))
+
+    def test_failed_credentials_write_rolls_back_the_import(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        source = os.path.join(directory.name, 'students.csv')
+        credentials = os.path.join(directory.name, 'credentials.csv')
+        with open(source, 'w') as file:
+            file.write(self.CSV)
+
+        # E.g. the disk filling up while the passwords are written
+        failing = mock.patch(
+            'users.management.commands.import_students.os.fsync', side_effect=OSError("No space left on device"),
+        )
+        with failing, self.assertRaises(OSError):
+            call_command('import_students', source, credentials_out=credentials, processes=1, stdout=StringIO())
+
+        self.assertFalse(os.path.exists(credentials))
+        self.assertFalse(CustomUser.objects.filter(username__in=['CS001', 'CS002', 'CS003']).exists())
+
+
+class ProfileCompletionTests(TestCase):
+    def setUp(self):
+        self.student = CustomUser.objects.create_user('student', 'student@example.com', 'pass12345')
+
+    def score(self):
+        return Profile.objects.get(user=self.student).profile_completion
+
+    def test_new_profile_has_the_base_score(self):
+        self.assertEqual(self.score(), BASE_SCORE)
+
+    def test_filling_and_emptying_a_weighted_field(self):
+        profile = Profile.objects.get(user=self.student)
+        profile.phone_number = '98450 00000'
+        profile.save()
+        self.assertEqual(self.score(), BASE_SCORE + PROFILE_FIELD_WEIGHTS['phone_number'])
+        self.assertEqual(profile.profile_completion, self.score())
+
+        profile.phone_number = ''
+        profile.save()
+        self.assertEqual(self.score(), BASE_SCORE)
+
+    def test_editing_a_filled_field_does_not_rescore(self):
+        profile = Profile.objects.get(user=self.student)
+        profile.phone_number = '98450 00000'
+        profile.save()
+
+        profile = Profile.objects.get(user=self.student)
+        profile.phone_number = '98450 11111'
+        with CaptureQueriesContext(connection) as queries:
+            profile.save()
+
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1, updates)  # the save itself, no score refresh
+
+    def test_education_entries_and_resumes_count(self):
+        education = EducationDetail.objects.create(
+            profile=self.student.profile, degree='B.Tech', institution='NIT', start_year=2021,
+        )
+        self.assertEqual(self.score(), BASE_SCORE + EDUCATION_WEIGHT)
+        resume = Resume.objects.create(student=self.student, file='resumes/cv.pdf')
+        self.assertEqual(self.score(), BASE_SCORE + EDUCATION_WEIGHT + RESUME_WEIGHT)
+
+        education.delete()
+        self.assertEqual(self.score(), BASE_SCORE + RESUME_WEIGHT)
+        resume.delete()
+        self.assertEqual(self.score(), BASE_SCORE)
+
+    def test_refresh_command_changes_only_stale_rows(self):
+        other = CustomUser.objects.create_user('other', 'other@example.com', 'pass12345')
+        # Skips the signals, like bulk imports do
+        Profile.objects.filter(user=other).update(profile_completion=90)
+
+        output = StringIO()
+        call_command('refresh_profile_completion', batch_size=1, stdout=output)
+
+        self.assertIn('Updated the completion score of 1 profile(s).', output.getvalue())
+        self.assertEqual(Profile.objects.get(user=other).profile_completion, BASE_SCORE)
+        call_command('refresh_profile_completion', stdout=output)
+        self.assertIn('Updated the completion score of 0 profile(s).', output.getvalue())
+
+    def test_admin_filter_bands(self):
+        admin_user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.client.force_login(admin_user)
+        for username, score in (('partial', 45), ('most', 85), ('complete', 100)):
+            user = CustomUser.objects.create_user(username, f'{username}@example.com', 'pass12345')
+            Profile.objects.filter(user=user).update(profile_completion=score)
+        # The admin (20) and the student (20) are in the low band
+
+        url = reverse('admin:users_profile_changelist')
+        for band, expected in (('low', 2), ('partial', 1), ('most', 1), ('complete', 1)):
+            with self.subTest(band=band):
+                response = self.client.get(url, {'completion': band})
+                self.assertEqual(response.context['cl'].result_count, expected)
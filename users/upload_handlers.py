@@ -0,0 +1,174 @@
+# users/upload_handlers.py
+"""
+Validates resume uploads while they are being received, not after.
+
+Django's default handlers store the whole upload (in memory or a temp file)
+before any form code runs. Only then could the form look at the filename. For
+the resume fields, ResumeUploadHandler takes over from the defaults:
+  - the first bytes must be the PDF signature (%PDF-). Anything else is rejected
+    at the first chunk.
+  - the upload is rejected as soon as it passes RESUME_UPLOAD_MAX_SIZE.
+  - the SHA-256 is computed while the chunks are written, so
+    resume_storage.store_resume does not read the file a second time.
+
+A rejected upload stops being stored or hashed. The rest of the request body is
+read and thrown away. The form still receives a (rejected) file so it can show why.
+Other file fields in the same request go to the default handlers unchanged.
+
+Handlers have to be installed before anything reads request.POST, which CSRF
+checking does. Views therefore use the accepts_resume_uploads decorator, which
+installs the handler and then runs the CSRF check itself.
+"""
+import hashlib
+from functools import wraps
+from io import BytesIO
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile, TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+PDF_SIGNATURE = b'%PDF-'
+
+
+def _too_large_message(max_size):
+    return f"The file is too large (maximum {max_size // (1024 * 1024)} MB)."
+
+
+class RejectedUpload(UploadedFile):
+    """Stands in for an upload the handler refused. It has no content, only the reason."""
+
+    def __init__(self, name, size, error):
+        super().__init__(file=BytesIO(), name=name, size=size)
+        self.upload_error = error
+
+
+class ResumeUploadHandler(FileUploadHandler):
+    """Streams the given file fields into storage, checking type and size and hashing on the way."""
+
+    def __init__(self, request=None, field_names=(), max_size=None):
+        super().__init__(request)
+        self.field_names = set(field_names)
+        self.max_size = settings.RESUME_UPLOAD_MAX_SIZE if max_size is None else max_size
+        self.in_memory = False
+        self.active = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Same rule as MemoryFileUploadHandler: small requests stay in memory
+        self.in_memory = content_length is not None and content_length <= settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.active = self.field_name in self.field_names
+        if not self.active:
+            return
+
+        self.error = None
+        self.received = 0
+        self.header = b''
+        self.digest = hashlib.sha256()
+        if self.in_memory:
+            self.file = BytesIO()
+        else:
+            self.file = TemporaryUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+        # This handler stores the file; the default ones shouldn't also start on it
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        if self.error:
+            return None  # already rejected: discard the rest
+
+        self.received += len(raw_data)
+        if len(self.header) < len(PDF_SIGNATURE):
+            self.header += raw_data[:len(PDF_SIGNATURE) - len(self.header)]
+            if not PDF_SIGNATURE.startswith(self.header):
+                self._reject("Only PDF files are allowed.")
+                return None
+        if self.received > self.max_size:
+            self._reject(_too_large_message(self.max_size))
+            return None
+
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def _reject(self, error):
+        self.error = error
+        self._discard_file()
+
+    def _discard_file(self):
+        file = getattr(self, 'file', None)
+        if file is not None:
+            # Closing a TemporaryUploadedFile also deletes it
+            file.close()
+            self.file = None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.active = False
+
+        if self.error is None and len(self.header) < len(PDF_SIGNATURE):
+            # Shorter than the signature itself, so not a PDF
+            self._reject("Only PDF files are allowed." if self.received else "The submitted file is empty.")
+        if self.error:
+            return RejectedUpload(self.file_name, self.received or 1, self.error)
+
+        self.file.seek(0)
+        if self.in_memory:
+            uploaded = InMemoryUploadedFile(
+                file=self.file, field_name=self.field_name, name=self.file_name,
+                content_type=self.content_type, size=file_size,
+                charset=self.charset, content_type_extra=self.content_type_extra,
+            )
+        else:
+            uploaded = self.file
+            uploaded.size = file_size
+        # Read by resume_storage.store_resume instead of hashing the file again
+        uploaded.sha256 = self.digest.hexdigest()
+        return uploaded
+
+    def upload_interrupted(self):
+        if self.active:
+            self._discard_file()
+
+
+def accepts_resume_uploads(*field_names):
+    """
+    View decorator: receives the named file fields through ResumeUploadHandler.
+    The view stays CSRF-protected; the check just runs after the handler is installed.
+    """
+    def decorator(view):
+        protected = csrf_protect(view)
+
+        @csrf_exempt
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method == 'POST':
+                request.upload_handlers.insert(0, ResumeUploadHandler(request, field_names))
+            return protected(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def validate_resume_file(file):
+    """
+    Form-side check. Uploads that came through ResumeUploadHandler were already
+    checked while streaming, so only their verdict is read. Anything else (e.g. a
+    file built in code) gets the same checks here.
+    """
+    error = getattr(file, 'upload_error', None)
+    if error:
+        raise forms.ValidationError(error)
+    if getattr(file, 'sha256', None):
+        return
+    if file.size > settings.RESUME_UPLOAD_MAX_SIZE:
+        raise forms.ValidationError(_too_large_message(settings.RESUME_UPLOAD_MAX_SIZE))
+    file.seek(0)
+    header = file.read(len(PDF_SIGNATURE))
+    file.seek(0)
+    if header != PDF_SIGNATURE:
+        raise forms.ValidationError("Only PDF files are allowed.")
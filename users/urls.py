@@ -1,6 +1,6 @@
 # users/urls.py
 from django.urls import path
-from . import views
+from . import views, api
 
 urlpatterns = [
     path('register/', views.register_view, name='register'),
@@ -8,12 +8,20 @@ urlpatterns = [
     path('dashboard/', views.student_dashboard_view, name='dashboard'),
     path('logout/', views.logout_view, name='logout'),
     path('jobs/', views.job_list_view, name='job-list'),
+    path('jobs/past/', views.past_job_list_view, name='past-job-list'),
     path('jobs/<int:job_id>/', views.job_detail_view, name='job-detail'),
     path('my-applications/', views.my_applications_view, name='my-applications'),
     path('resumes/', views.resume_management_view, name='resume-management'),
     path('resumes/<int:resume_id>/delete/', views.delete_resume_view, name='delete-resume'),
+    path('resumes/<int:resume_id>/download/', views.resume_download_view, name='resume-download'),
     path('notifications/', views.notification_list_view, name='notification-list'),
+    path('notifications/stream/', views.notification_stream_view, name='notification-stream'),
+    path('notifications/mark-all-read/', views.mark_all_notifications_read_view, name='notifications-mark-all-read'),
     path('profile/', views.profile_view, name='profile'),
     path('profile/edit/', views.profile_edit_view, name='profile-edit'),
     path('profile/education/edit/', views.education_edit_view, name='education-edit'),
+
+    # Read-only JSON API for the mobile app and kiosk screens
+    path('api/jobs/', api.job_list_api, name='api-job-list'),
+    path('api/jobs/<int:job_id>/', api.job_detail_api, name='api-job-detail'),
 ]
\ No newline at end of file
@@ -1,12 +1,18 @@
 # users/views.py
 
-from django.db.models import Q
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q, Max, Subquery
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from .forms import RegistrationForm, LoginForm
 from django.contrib.auth.decorators import login_required
-from .models import StudentApplication, Job, Resume, Profile, Notification, EducationDetail, CustomUser
+from .models import StudentApplication, Job, Resume, Profile, Notification, EducationDetail, CustomUser, BroadcastNotification
 from django.utils import timezone
 from datetime import timedelta
 from django.shortcuts import render, redirect, get_object_or_404
@@ -19,7 +25,15 @@ from .forms import ProfileUpdateForm
 from django.forms import inlineformset_factory
 from django import forms
 from django.urls import reverse
+from django.utils.dateparse import parse_datetime
 from django.shortcuts import render, redirect, get_object_or_404
+from .job_cards import get_job_cards
+from .notifications import unread_notifications_for, mark_all_read, notifications_since
+from .realtime import hub as notification_hub, event_id_to_datetime
+from .applications import apply_for_job
+from .resume_storage import store_resume
+from .file_serving import file_etag, serve_protected_file
+from .upload_handlers import accepts_resume_uploads
 
 
 # In your users/views.py
@@ -67,10 +81,13 @@ def login_view(request):
             # --- START OF NEW, CORRECTED LOGIC ---
             
             try:
-                # Step 1: Find the user by their username first.
-                user = CustomUser.objects.get(username=username)
+                # Step 1: Find the user by their username first
+                # (one indexed, case-insensitive query; see CustomUserManager).
+                user = CustomUser.objects.get_by_natural_key(username)
                 
                 # Step 2: Check if the password is correct for that user.
+                # A hash made with an older algorithm or cost is upgraded here and saved
+                # (see users/hashers.py).
                 if user.check_password(password):
                     # Step 3: NOW, check if the user is active.
                     if user.is_active:
@@ -91,7 +108,9 @@ def login_view(request):
                     return redirect('login')
                     
             except CustomUser.DoesNotExist:
-                # The username does not exist in the database.
+                # The username does not exist in the database. Hash the password anyway,
+                # so an unknown username takes as long as a wrong password.
+                CustomUser().set_password(password)
                 messages.error(request, 'Invalid username or password.')
                 return redirect('login')
             
@@ -155,17 +174,17 @@ def student_dashboard_view(request):
     }
     return render(request, 'users/student_dashboard.html', context)
 
-@login_required
-def job_list_view(request):
-    """This view displays all available jobs and handles search/filter functionality."""
-    
-    # Start with all jobs
-    queryset = Job.objects.all().order_by('-created_at')
-    
+def filter_jobs(request, queryset):
+    """
+    Applies the job list search/filter parameters from the URL to a Job queryset.
+    Shared by job_list_view and the JSON jobs API so both always agree on what a filter means.
+    Returns the filtered queryset and a dict of the filter values that were read.
+    """
     # Get the filter parameters from the URL
     search_query = request.GET.get('q', '')
     location_filter = request.GET.get('location', '')
     job_type_filter = request.GET.get('type', '')
+    eligible_only = request.GET.get('eligible') == '1'
     
     # --- Apply filters if they exist ---
     
@@ -184,66 +203,93 @@ def job_list_view(request):
     # 3. Job Type filter
     if job_type_filter:
         queryset = queryset.filter(job_type__iexact=job_type_filter)
+
+    # 4. Eligibility filter - compares the indexed min_cgpa against the student's best CGPA
+    #    in the same query, so jobs they cannot apply for are never sent to the template.
+    if eligible_only:
+        best_cgpa = EducationDetail.objects.filter(
+            profile_id=request.user.pk
+        ).values('profile_id').annotate(best=Max('cgpa')).values('best')
+        queryset = queryset.filter(
+            Q(min_cgpa__isnull=True) | Q(min_cgpa__lte=Subquery(best_cgpa))
+        )
+
+    filters = {
+        'search_query': search_query,
+        'location_filter': location_filter,
+        'job_type_filter': job_type_filter,
+        'eligible_only': eligible_only,
+    }
+    return queryset, filters
+
+def _render_job_list(request, base_queryset, past_openings=False):
+    """Shared by the active job list and the "past openings" list - only the base queryset differs."""
+    queryset, filters = filter_jobs(request, base_queryset)
         
     # --- Prepare data for dropdowns ---
     
-    # Get distinct locations and job types from the database to populate the filters
-    distinct_locations = Job.objects.values_list('location', flat=True).distinct().order_by('location')
+    # Get distinct locations from the same set of jobs (active or archived) to populate the filters
+    distinct_locations = base_queryset.order_by().values_list('location', flat=True).distinct().order_by('location')
     
     context = {
         'jobs': queryset,
+        # Pre-rendered cards, mostly served from the fragment cache (see job_cards.py)
+        'job_cards': get_job_cards(queryset),
         'job_types': Job.JobType.choices, # Pass the choices from the model
         'distinct_locations': distinct_locations,
+        'past_openings': past_openings,
         
         # Pass the current filter values back to the template to pre-fill the form
-        'search_query': search_query,
-        'location_filter': location_filter,
-        'job_type_filter': job_type_filter,
+        **filters,
     }
     return render(request, 'users/job_list.html', context)
 
+@login_required
+def job_list_view(request):
+    """This view displays all available jobs and handles search/filter functionality."""
+    
+    # Start with the active (non-archived) jobs only
+    return _render_job_list(request, Job.active.order_by('-created_at'))
 
 @login_required
+def past_job_list_view(request):
+    """Archived jobs whose deadline has passed, with the same search/filter functionality."""
+    return _render_job_list(request, Job.objects.filter(is_archived=True).order_by('-deadline'), past_openings=True)
+
+
+@login_required
+@accepts_resume_uploads('new_resume')
 def job_detail_view(request, job_id):
     job = get_object_or_404(Job, id=job_id)
-    has_applied = StudentApplication.objects.filter(student=request.user, job=job).exists()
 
     if request.method == 'POST':
-        # Only process the form if the user has not already applied
-        if not has_applied:
-            # Pass the user to the form so it can validate correctly
-            form = ApplicationForm(request.POST, request.FILES, user=request.user)
-            
-            if form.is_valid():
-                chosen_resume = None
-                
-                # Check if the user uploaded a new resume
-                if form.cleaned_data.get('new_resume'):
-                    # Create and save the new Resume object
-                    new_resume_file = form.cleaned_data['new_resume']
-                    chosen_resume = Resume.objects.create(student=request.user, file=new_resume_file)
-                else:
-                    # Use the existing resume they selected
-                    chosen_resume = form.cleaned_data['existing_resume']
-
-                # Create the application, linking the chosen resume
-                StudentApplication.objects.create(
-                    student=request.user, 
-                    job=job,
-                    resume=chosen_resume
-                )
-                
+        # Archived jobs stay viewable, but their applications are closed
+        if job.is_archived:
+            messages.error(request, "Applications for this job are closed.")
+            return redirect('job-detail', job_id=job.id)
+
+        # Pass the user to the form so it can validate correctly
+        form = ApplicationForm(request.POST, request.FILES, user=request.user)
+
+        if form.is_valid():
+            # No "already applied?" check first: the unique (student, job) constraint
+            # turns a repeat apply (double-click, second tab) into a no-op
+            application = apply_for_job(
+                request.user, job,
+                resume=form.cleaned_data['existing_resume'],
+                new_resume_file=form.cleaned_data.get('new_resume'),
+            )
+            if application is None:
+                messages.error(request, "You have already applied for this job.")
+            else:
                 messages.success(request, f"You have successfully applied for the {job.title} position.")
-                return redirect('job-detail', job_id=job.id)
-        else:
-            # This case prevents re-application if they somehow bypass the disabled button
-            messages.error(request, "You have already applied for this job.")
             return redirect('job-detail', job_id=job.id)
 
     else: # This is a GET request
         # Create an empty form instance, passing the user to populate the resume list
         form = ApplicationForm(user=request.user)
 
+    has_applied = StudentApplication.objects.filter(student=request.user, job=job).exists()
     context = {
         'job': job,
         'has_applied': has_applied,
@@ -257,21 +303,36 @@ def job_detail_view(request, job_id):
 @login_required
 def my_applications_view(request):
     """This view lists all applications for the current student and handles search."""
-    queryset = StudentApplication.objects.filter(student=request.user).order_by('-applied_date')
-    search_query = request.GET.get('q', '')
+    # One joined query: the job and resume for every card come back in the same row,
+    # and only the columns the template shows are loaded.
+    queryset = (
+        StudentApplication.objects.filter(student=request.user)
+        .select_related('job', 'resume')
+        .only(
+            'id', 'status', 'applied_date',
+            'job__id', 'job__title', 'job__company',
+            'resume__id', 'resume__file',
+        )
+        .order_by('-applied_date')
+    )
+    search_query = request.GET.get('q', '').strip()
     
     if search_query:
-        # THE FIX IS HERE: We now search by the simple, built-in 'id' field
-        queryset = queryset.filter(
-            Q(job__title__icontains=search_query) |
-            Q(job__company__icontains=search_query) |
-            Q(id__icontains=search_query) 
-        )
+        application_id = search_query.lstrip('#')
+        if application_id.isdigit():
+            # Fast path: the cards show "ID: 123", so a number is an exact primary-key lookup
+            queryset = queryset.filter(id=int(application_id))
+        else:
+            queryset = queryset.filter(
+                Q(job__title__icontains=search_query) |
+                Q(job__company__icontains=search_query)
+            )
         
-    total_applications = queryset.count()
+    # Evaluate once and count in Python instead of running a separate COUNT(*)
+    applications = list(queryset)
     context = {
-        'applications': queryset,
-        'total_applications': total_applications,
+        'applications': applications,
+        'total_applications': len(applications),
         'search_query': search_query,
     }
     return render(request, 'users/my_applications.html', context)
@@ -283,6 +344,7 @@ def logout_view(request):
     return redirect('login')
 
 @login_required
+@accepts_resume_uploads('file')
 def resume_management_view(request):
     """Handles displaying and uploading resumes."""
     
@@ -290,9 +352,8 @@ def resume_management_view(request):
     if request.method == 'POST':
         form = ResumeUploadForm(request.POST, request.FILES)
         if form.is_valid():
-            resume = form.save(commit=False)
-            resume.student = request.user
-            resume.save()
+            # Stored once per unique file contents; see resume_storage.py
+            store_resume(request.user, form.cleaned_data['file'])
             messages.success(request, 'Your resume has been uploaded successfully.')
             return redirect('resume-management')
 
@@ -308,25 +369,111 @@ def delete_resume_view(request, resume_id):
     """Handles deleting a resume."""
     resume = get_object_or_404(Resume, id=resume_id, student=request.user) # Security check
     if request.method == 'POST':
-        resume.file.delete() # Delete the file from storage
-        resume.delete()      # Delete the object from the database
+        # Delete the object from the database. The stored file is shared with any identical
+        # uploads, so signals.py only queues it for deletion once the last reference is gone.
+        resume.delete()
         messages.success(request, 'Your resume has been deleted.')
     return redirect('resume-management')
 
+@login_required
+def resume_download_view(request, resume_id):
+    """
+    Sends a resume to its owner or to an admin. The file itself is sent by the front-end
+    server when PROTECTED_MEDIA_SENDFILE is configured, or streamed otherwise (see file_serving.py).
+    """
+    resumes = Resume.objects.all()
+    if not (request.user.is_staff or request.user.role == CustomUser.Role.ADMIN):
+        # Other students' resumes look the same as missing ones
+        resumes = resumes.filter(student=request.user)
+    resume = get_object_or_404(resumes, id=resume_id)
+    try:
+        # Blobs are named by content digest, which makes a free, strong ETag
+        etag = file_etag(resume.file.name, digest=resume.blob_id)
+        return serve_protected_file(request, resume.file.name, resume.filename, etag)
+    except FileNotFoundError:
+        raise Http404("This resume file is no longer available.")
+
 @login_required
 def notification_list_view(request):
-    # Get all unread notifications for the current user
-    notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')
+    # Unread personal notifications and job broadcasts, merged newest first
+    notifications = unread_notifications_for(request.user)
+    # "Mark all as read" moves the broadcast watermark only this far, so a job announced
+    # while the page was open stays unread
+    newest_broadcast = max(
+        (n.created_at for n in notifications if isinstance(n, BroadcastNotification)), default=None,
+    )
     
     context = {
-        'notifications': notifications
+        'notifications': notifications,
+        'newest_broadcast': newest_broadcast,
     }
-    
-    # Optional: Mark notifications as read when the user visits the page
-    # notifications.update(is_read=True)
-    
+
     return render(request, 'users/notification_list.html', context)
 
+@login_required
+async def notification_stream_view(request):
+    """
+    Server-Sent Events stream of new notifications, for use with the browser's EventSource.
+    Run the site under ASGI (see placement_project/asgi.py) so that each open stream is a cheap
+    coroutine instead of a blocked worker thread. A client reconnecting with Last-Event-ID
+    first receives everything it missed, then live events.
+    """
+    if not getattr(settings, 'NOTIFICATION_STREAM_ENABLED', False) or not isinstance(request, ASGIRequest):
+        # Under WSGI the never-ending stream would tie up a worker thread for good.
+        # 204 tells EventSource to stop reconnecting.
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 20)
+
+    async def event_stream():
+        subscription = await notification_hub.subscribe(user.pk, user.role == CustomUser.Role.STUDENT)
+        try:
+            yield f"retry: {heartbeat * 1000}\n\n"
+
+            # Replay anything created after the last event this client saw
+            if last_event_id and last_event_id.isdigit():
+                since = event_id_to_datetime(last_event_id)
+                for event in await sync_to_async(notifications_since)(user, since):
+                    yield format_sse_event(event)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # A comment line keeps proxies from closing an idle connection
+                    yield ": heartbeat\n\n"
+                    continue
+                yield format_sse_event(event)
+        finally:
+            notification_hub.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
+
+def format_sse_event(event):
+    return f"id: {event['id']}\nevent: notification\ndata: {json.dumps(event)}\n\n"
+
+@login_required
+def mark_all_notifications_read_view(request):
+    """
+    Marks all of the user's notifications as read with one UPDATE plus one watermark update,
+    up to the newest broadcast the notification page showed.
+    """
+    if request.method == 'POST':
+        try:
+            broadcasts_until = parse_datetime(request.POST.get('broadcasts_until', ''))
+        except ValueError:
+            broadcasts_until = None
+        if broadcasts_until is not None and timezone.is_naive(broadcasts_until):
+            broadcasts_until = timezone.make_aware(broadcasts_until)
+        mark_all_read(request.user, broadcasts_until=broadcasts_until)
+        messages.success(request, 'All notifications marked as read.')
+    return redirect('notification-list')
+
 @login_required
 def profile_view(request):
     profile = request.user.profile